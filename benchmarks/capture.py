@@ -0,0 +1,43 @@
+""" Benchmark of the packet capture.
+
+Measure the cost for a connection thread of capturing a packet, with the
+writer thread running, compared with the hexdump previously printed for each
+packet in debug mode.
+
+    python -m benchmarks.capture [-n N]
+"""
+
+import argparse
+import io
+import tempfile
+
+from benchmarks.utils import measure
+from durator.common.networking.packet_capture import DIRECTION_SENT, PacketCapture
+from durator.world.opcodes import OpCode
+from lib.utilities import get_data_dump
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the packet capture.")
+    argparser.add_argument("-n", "--iterations", type=int, default=100000, help="packets per benchmark")
+    args = argparser.parse_args()
+
+    data = bytes(range(120))
+    opcode_value = OpCode.SMSG_MESSAGECHAT.value
+    with tempfile.TemporaryDirectory() as directory:
+        capture = PacketCapture("world", OpCode, enabled=True, directory=directory, opcodes="", accounts="")
+        capture.start()
+        measure(
+            "capture, 120 bytes",
+            lambda index: capture.capture(DIRECTION_SENT, 1, opcode_value, data, "ACCOUNT"),
+            args.iterations,
+        )
+        capture.stop()
+        print("capture stats:", capture.get_stats())
+
+    output = io.StringIO()
+    measure("hexdump (legacy), 120 bytes", lambda _: output.write(get_data_dump(data)), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
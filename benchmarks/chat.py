@@ -0,0 +1,108 @@
+""" Benchmark of the chat manager channels.
+
+Fill the "General" channel with many members, then measure membership checks,
+channel messages fanned out to all members, join/leave of a member and the
+channels cleanup of players leaving the world. The same players are spread on
+a map to measure says, which are only sent to the players in range. Packets are queued in the
+outgoing queues of fake in-world connections, like a real broadcast.
+
+    python -m benchmarks.chat [-m MEMBERS] [-n N]
+"""
+
+import argparse
+import random
+import threading
+
+from benchmarks.utils import measure
+from durator.world.connection_index import ConnectionIndex
+from durator.world.game.chat.language import Language
+from durator.world.game.chat.manager import ChatManager
+from durator.world.game.chat.message import ChatMessageType, ClientChatMessage
+from durator.world.game.object.manager import ObjectManager
+from durator.world.game.object.object_fields import ObjectField
+from durator.world.game.object.type.player import Player
+from durator.world.game.position import Position
+from durator.world.outgoing_queue import OutgoingQueue
+from durator.world.world_connection_state import WorldConnectionState
+from durator.world.world_server import WorldServer
+
+CHANNEL_NAME = "General"
+WORLD_SIZE = 2000.0
+
+
+class _Player:
+    def __init__(self, guid):
+        self.guid = guid
+        self.name = "Player" + str(guid)
+        self.lock = threading.RLock()
+
+
+class _Connection:
+    def __init__(self):
+        self.state = WorldConnectionState.IN_WORLD
+        self.outgoing_queue = OutgoingQueue()
+
+
+class _Server:
+    broadcast = WorldServer.broadcast
+
+    def __init__(self):
+        self.world_connections = ConnectionIndex()
+        self.object_manager = ObjectManager(self)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the chat channels.")
+    argparser.add_argument("-m", "--members", type=int, default=5000, help="members in the channel")
+    argparser.add_argument("-n", "--iterations", type=int, default=100, help="operations per benchmark")
+    args = argparser.parse_args()
+
+    server = _Server()
+    chat_manager = ChatManager(server)
+    players = [_Player(guid) for guid in range(1, args.members + 1)]
+    for player in players:
+        connection = _Connection()
+        server.world_connections.add(connection)
+        server.world_connections.set_player_guid(connection, player.guid)
+        server.object_manager.add_player(_get_world_player(player.guid))
+    # Fill the channel without notifying every member of every join.
+    chat_manager.create_channel(CHANNEL_NAME)
+    channel = chat_manager.get_channel(CHANNEL_NAME)
+    for player in players[args.iterations :]:
+        channel.add_member(player.guid)
+        chat_manager._add_player_channel(player.guid, CHANNEL_NAME)
+    measure("join", lambda index: chat_manager.join_channel(players[index], CHANNEL_NAME, ""), args.iterations)
+
+    message = ClientChatMessage()
+    message.message_type = ChatMessageType.CHANNEL
+    message.language = Language.UNIVERSAL
+    message.channel_name = CHANNEL_NAME
+    message.content = "Hello"
+
+    last_player = players[-1]
+    measure("is_member", lambda index: channel.is_member(index + 1), args.members)
+    measure("channel message", lambda index: chat_manager.receive_message(index + 1, message), args.iterations)
+    measure(
+        "leave and rejoin",
+        lambda _: (
+            chat_manager.leave_channel(last_player, CHANNEL_NAME),
+            chat_manager.join_channel(last_player, CHANNEL_NAME, ""),
+        ),
+        args.iterations,
+    )
+    measure("leave world", lambda index: chat_manager.leave_all_channels(players[index].guid), args.iterations)
+
+    message.message_type = ChatMessageType.SAY
+    measure("say", lambda index: chat_manager.receive_message(index % args.members + 1, message), args.members)
+
+
+def _get_world_player(guid):
+    """Return a Player at a random position of the map."""
+    player = Player()
+    player.set(ObjectField.GUID, guid)
+    player.position = Position(random.uniform(0.0, WORLD_SIZE), random.uniform(0.0, WORLD_SIZE))
+    return player
+
+
+if __name__ == "__main__":
+    main()
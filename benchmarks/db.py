@@ -0,0 +1,143 @@
+""" Benchmark the persistence layer.
+
+Measure the throughput of the database operations done on logins and in world:
+account creation, session lookup, character enumeration, player load and save.
+By default it uses an in-memory SQLite database so it can be run anywhere;
+use "--backend mysql" to run it against the configured MySQL database, but do
+not run it on a production database as it creates and removes bench data.
+
+    python -m benchmarks.db [--backend sqlite|mysql] [--sqlite-path PATH] [-n N]
+"""
+
+import argparse
+import os
+
+from benchmarks.utils import measure
+from durator.common.account.account import Account
+from durator.common.account.account_data import AccountData
+from durator.common.account.account_session import AccountSession
+from durator.common.account.managers import AccountManager, AccountSessionManager
+from durator.db.database import DB, SQLITE_MEMORY, db_connection, setup_database
+from durator.db.models import MODELS
+from durator.world.game.character.constants import CharacterClass, CharacterGender, CharacterRace
+from durator.world.game.character.character_data import CharacterData
+from durator.world.game.character.manager import CharacterManager
+from durator.world.game.object.manager import ObjectManager
+from durator.world.handlers.character.char_enum import CharEnumHandler
+
+BENCH_ACCOUNT_PREFIX = "BENCH"
+NUM_CHARS_PER_ACCOUNT = 10
+
+
+class _BenchConnection:
+    """Bare connection holding an account, enough for account handlers."""
+
+    def __init__(self, account):
+        self.account = account
+
+
+def _get_char_values(account, index):
+    return {
+        "account": account,
+        "name": f"Bench{index}",
+        "race": CharacterRace.UNDEAD,
+        "class": CharacterClass.ROGUE,
+        "gender": CharacterGender.MALE,
+        "features": {"skin": 0, "face": 0, "hair_style": 0, "hair_color": 0, "facial_hair": 0},
+    }
+
+
+@db_connection
+def _install_tables():
+    DB.create_tables(MODELS, safe=True)
+
+
+@db_connection
+def _get_bench_accounts():
+    return list(Account.select().where(Account.name.startswith(BENCH_ACCOUNT_PREFIX)))
+
+
+@db_connection
+def _get_account_chars(account):
+    return list(CharacterData.select().where(CharacterData.account == account))
+
+
+@db_connection
+def _remove_bench_data():
+    for account in _get_bench_accounts():
+        for char_data in _get_account_chars(account):
+            CharacterManager.delete_char(char_data.guid)
+        AccountSession.delete().where(AccountSession.account == account).execute()
+        AccountData.delete().where(AccountData.account == account).execute()
+        account.delete_instance()
+
+
+def bench_account_creation(iterations):
+    def create_account(index):
+        AccountManager.create_account(f"{BENCH_ACCOUNT_PREFIX}{index}", "bench")
+
+    measure("account creation", create_account, iterations)
+
+
+def bench_session_lookup(iterations, accounts):
+    for account in accounts:
+        AccountSessionManager.add_session(account, os.urandom(40))
+
+    def get_session(index):
+        AccountSessionManager.get_session(accounts[index % len(accounts)].name)
+
+    measure("session lookup", get_session, iterations)
+
+
+def bench_char_enum(iterations, account):
+    for index in range(NUM_CHARS_PER_ACCOUNT):
+        CharacterManager.create_char(_get_char_values(account, index))
+
+    connection = _BenchConnection(account)
+
+    def char_enum(_):
+        CharEnumHandler(connection, b"")._get_characters_packet()
+
+    measure(f"char enum ({NUM_CHARS_PER_ACCOUNT} chars)", char_enum, iterations)
+
+
+def bench_player_load_and_save(iterations, account):
+    object_manager = ObjectManager(None)
+    chars = _get_account_chars(account)
+    players = []
+
+    def load_player(index):
+        char_data = CharacterManager.get_char_data(chars[index % len(chars)].guid)
+        players.append(object_manager.load_player(char_data))
+
+    def save_player(index):
+        object_manager.save_player(players[index])
+
+    measure("player load", load_player, iterations)
+    measure("player save", save_player, iterations)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the persistence layer.")
+    argparser.add_argument("--backend", type=str, default="sqlite", choices=["sqlite", "mysql"])
+    argparser.add_argument("--sqlite-path", type=str, default=SQLITE_MEMORY, help="SQLite database file")
+    argparser.add_argument("-n", "--iterations", type=int, default=200, help="operations per benchmark")
+    args = argparser.parse_args()
+
+    setup_database(args.backend, args.sqlite_path)
+    _install_tables()
+    _remove_bench_data()
+
+    print(f"Backend: {args.backend}")
+    try:
+        bench_account_creation(args.iterations)
+        accounts = _get_bench_accounts()
+        bench_session_lookup(args.iterations, accounts)
+        bench_char_enum(args.iterations, accounts[0])
+        bench_player_load_and_save(args.iterations, accounts[0])
+    finally:
+        _remove_bench_data()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+""" Benchmark of the packet dispatch of world connections.
+
+Measure the overhead of ConnectionAutomaton._handle_packet for already parsed
+packets: legality check, rate limit lookup and handler call, with handlers
+doing (almost) nothing. The previous dispatch, creating a handler object per
+packet after enum lookups in dicts and lists, is measured for comparison.
+
+    python -m benchmarks.dispatch [-n N]
+"""
+
+import argparse
+import logging
+
+from benchmarks.utils import measure
+from durator.common.log import LOG
+from durator.common.networking.connection_automaton import ConnectionAutomaton
+from durator.world.opcodes import OpCode
+from durator.world.world_connection import WorldConnection
+from durator.world.world_connection_state import WorldConnectionState
+
+
+class _Connection(WorldConnection):
+    """WorldConnection without socket, taking (opcode, data) packets."""
+
+    def __init__(self, state):
+        ConnectionAutomaton.__init__(self, None)
+        self.state = state
+
+    def _on_state_change(self, old_state, new_state):
+        pass
+
+    def _parse_packet(self, packet):
+        return packet
+
+    def send_packet(self, world_packet):
+        pass
+
+
+class _LegacyNopHandler:
+    def __init__(self, connection, packet):
+        self.conn = connection
+        self.packet = packet
+
+    def process(self):
+        return None, None
+
+
+def _legacy_handle_packet(connection, packet):
+    """The dispatch before the precomputed tables, with a NopHandler."""
+    opcode, packet_data = connection._parse_packet(packet)
+    if (
+        connection.state not in connection.UNMANAGED_STATES
+        and opcode not in connection.UNMANAGED_OPS
+        and opcode not in connection.LEGAL_OPS[connection.state]
+    ):
+        LOG.debug("{}: received illegal opcode {} in state {}".format(type(connection).__name__, opcode.name, connection.state.name))
+        return
+    connection.RATE_LIMITED_OPS.get(opcode)
+    handler_class = {}.get(opcode, _LegacyNopHandler)
+    handler = handler_class(connection, packet_data)
+    connection._process_handler_result(*handler.process())
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the world packet dispatch.")
+    argparser.add_argument("-n", "--iterations", type=int, default=1000000, help="packets per benchmark")
+    args = argparser.parse_args()
+    LOG.setLevel(logging.WARNING)
+
+    in_world = _Connection(WorldConnectionState.IN_WORLD)
+    auth_ok = _Connection(WorldConnectionState.AUTH_OK)
+    nop_packet = (OpCode.CMSG_SET_ACTIVE_MOVER, b"")
+    ping_packet = (OpCode.CMSG_PING, b"\x00\x00\x00\x00")
+    illegal_packet = (OpCode.CMSG_MESSAGECHAT, b"")
+
+    measure("nop, in world", lambda _: in_world._handle_packet(nop_packet), args.iterations)
+    measure("nop, in world (legacy)", lambda _: _legacy_handle_packet(in_world, nop_packet), args.iterations)
+    measure("ping, unmanaged opcode", lambda _: auth_ok._handle_packet(ping_packet), args.iterations)
+    measure("illegal opcode", lambda _: auth_ok._handle_packet(illegal_packet), args.iterations)
+    measure("illegal opcode (legacy)", lambda _: _legacy_handle_packet(auth_ok, illegal_packet), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
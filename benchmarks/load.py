@@ -0,0 +1,190 @@
+""" Load generator: bots playing the whole protocol against the servers.
+
+Start a login and a world server in this process on a temporary SQLite
+database, then run bots concurrently: each one logs in with SRP, enters the
+world with its character (created on the first run) and plays for a while,
+walking with movement heartbeats, pinging and saying something regularly.
+With --external, the bots connect to servers started separately, with
+the addresses of the configuration; their accounts are created in the
+configured database if they don't exist.
+
+It reports the latency percentiles of each stage, the ping and say round
+trips, and the sessions and packets per second.
+
+    python -m benchmarks.load [-n BOTS] [-c CONCURRENCY] [-d DURATION] [--chat-interval SECONDS] [--external]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.login_client import ScriptedLoginClient
+from benchmarks.login_server import _get_free_port, _install_tables, _start_server
+from benchmarks.utils import report
+from benchmarks.world_client import ScriptedWorldClient
+from durator.auth.login_server import LoginServer
+from durator.common.account.account import Account
+from durator.common.account.managers import AccountManager
+from durator.common.log import LOG
+from durator.config import CONFIG
+from durator.db.database import db_connection, setup_database
+from durator.world.world_server import WorldServer
+
+LOGIN_STAGES = ("connect", "challenge", "proof", "realmlist", "login")
+WORLD_STAGES = ("world_connect", "auth_session", "char_create", "char_enum", "player_login", "enter_world")
+HEARTBEAT_INTERVAL = 0.5
+
+
+def _get_bot_name(index):
+    # Character names are letters only, so the index is spelled with letters.
+    letters = ""
+    while True:
+        index, digit = divmod(index, 26)
+        letters = chr(ord("a") + digit) + letters
+        if not index:
+            return "Bot" + letters
+
+
+@db_connection
+def _does_account_exist(name):
+    return Account.select().where(Account.name == name).exists()
+
+
+def _create_accounts(num_bots):
+    for index in range(num_bots):
+        name = _get_bot_name(index).upper()
+        if not _does_account_exist(name):
+            AccountManager.create_account(name, name)
+
+
+def _start_world_server(login_server):
+    server = WorldServer()
+    server.hostname = "127.0.0.1"
+    server.port = _get_free_port()
+    server._create_realm()
+    server.realm_link.address = (login_server.REALMS_HOST, login_server.REALMS_PORT)
+    thread = threading.Thread(target=server.start)
+    thread.start()
+    while server.clients_socket is None or server.realm.name not in login_server.realms:
+        time.sleep(0.01)
+    return server, thread
+
+
+class LoadStats:
+    """Stage timings, round-trip samples and packet counts of all bots."""
+
+    def __init__(self):
+        self.timings = {stage: [] for stage in LOGIN_STAGES + WORLD_STAGES + ("ping", "chat")}
+        self.num_sessions = 0
+        self.num_sent = 0
+        self.num_received = 0
+        self.failures = []
+
+    def add_login(self, login_client):
+        for stage, value in login_client.timings.items():
+            self.timings[stage].append(value)
+
+    def add_world(self, world_client):
+        for stage, value in world_client.timings.items():
+            self.timings[stage].append(value)
+        for name, values in world_client.samples.items():
+            self.timings[name].extend(values)
+        self.num_sent += world_client.num_sent
+        self.num_received += world_client.num_received
+
+    def print_latencies(self):
+        print("{:<16}{:>8}{:>12}{:>12}{:>12}".format("stage", "samples", "p50 (ms)", "p90 (ms)", "p99 (ms)"))
+        for stage, values in self.timings.items():
+            if not values:
+                continue
+            values.sort()
+            percentiles = [values[min(len(values) - 1, int(len(values) * p))] * 1000 for p in (0.5, 0.9, 0.99)]
+            print("{:<16}{:>8}{:>12.1f}{:>12.1f}{:>12.1f}".format(stage, len(values), *percentiles))
+
+
+async def _run_bot(index, login_address, world_address, args, login_semaphore, stats):
+    name = _get_bot_name(index)
+    world_client = None
+    try:
+        # Only the logins and world entries are limited, so that all bots end
+        # up playing at the same time.
+        async with login_semaphore:
+            login_client = ScriptedLoginClient(*login_address, name, name)
+            await login_client.login()
+            stats.add_login(login_client)
+            world_client = ScriptedWorldClient(*world_address, name, login_client.srp.session_key, name)
+            await world_client.enter_world()
+        await world_client.play(args.duration, HEARTBEAT_INTERVAL, args.chat_interval)
+        stats.num_sessions += 1
+    except Exception as exc:
+        stats.failures.append(exc)
+    finally:
+        if world_client is not None:
+            stats.add_world(world_client)
+            await world_client.close()
+
+
+async def _run_bots(login_address, world_address, args):
+    stats = LoadStats()
+    login_semaphore = asyncio.Semaphore(args.concurrency)
+    await asyncio.gather(
+        *(_run_bot(index, login_address, world_address, args, login_semaphore, stats) for index in range(args.bots))
+    )
+    return stats
+
+
+def run_load(login_address, world_address, args):
+    print(f"Bots: {args.bots}, concurrency: {args.concurrency}, duration: {args.duration} s")
+    start = time.perf_counter()
+    stats = asyncio.run(_run_bots(login_address, world_address, args))
+    elapsed = time.perf_counter() - start
+
+    stats.print_latencies()
+    report("sessions", stats.num_sessions, elapsed)
+    report("packets sent", stats.num_sent, elapsed)
+    report("packets received", stats.num_received, elapsed)
+    if stats.failures:
+        print(f"    {len(stats.failures)} failed bots, first error: {stats.failures[0]!r}")
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Run bots through login and world.")
+    argparser.add_argument("-n", "--bots", type=int, default=50, help="number of bots")
+    argparser.add_argument("-c", "--concurrency", type=int, default=10, help="logins and world entries in flight")
+    argparser.add_argument("-d", "--duration", type=float, default=10.0, help="seconds each bot plays in world")
+    argparser.add_argument("--chat-interval", type=float, default=5.0, help="seconds between the says of a bot")
+    argparser.add_argument("--external", action="store_true", help="use servers started separately")
+    args = argparser.parse_args()
+
+    # Keep the console quiet: no connection logs.
+    LOG.setLevel(logging.WARNING)
+
+    if args.external:
+        _create_accounts(args.bots)
+        login_address = (LoginServer.CLIENTS_HOST, LoginServer.CLIENTS_PORT)
+        world_address = (CONFIG["realm"]["hostname"], int(CONFIG["realm"]["port"]))
+        run_load(login_address, world_address, args)
+        return
+
+    with tempfile.TemporaryDirectory() as db_dir:
+        setup_database("sqlite", os.path.join(db_dir, "load.sqlite3"))
+        _install_tables()
+        _create_accounts(args.bots)
+        login_server, login_thread = _start_server(LoginServer)
+        world_server, world_thread = _start_world_server(login_server)
+        try:
+            login_address = (login_server.CLIENTS_HOST, login_server.CLIENTS_PORT)
+            run_load(login_address, (world_server.hostname, world_server.port), args)
+        finally:
+            world_server.shutdown_flag.set()
+            world_thread.join()
+            login_server.shutdown_flag.set()
+            login_thread.join()
+
+
+if __name__ == "__main__":
+    main()
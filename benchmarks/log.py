@@ -0,0 +1,70 @@
+""" Benchmark of the logging overhead on the handler threads.
+
+Measure the time spent in the calling thread by typical log calls: a chat
+join at info level and a name query at debug level (disabled), with eager
+f-string formatting written by a synchronous handler as before, then with
+lazy formatting through the queue pipeline of durator.common.log, and a
+message repeated past the RepeatFilter limit. The queued records are then
+written by the listener thread, whose time is measured separately. Records are
+written to devnull.
+
+    python -m benchmarks.log [-n N]
+"""
+
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+from benchmarks.utils import measure, report
+from durator.common.log import LOG_FORMAT, LazyQueueHandler, RepeatFilter, disable_unused_record_info
+
+
+def _get_logger(name, handler):
+    logger = logging.getLogger("durator.benchmark." + name)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return logger
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the logging overhead.")
+    argparser.add_argument("-n", "--iterations", type=int, default=100000, help="log calls per benchmark")
+    args = argparser.parse_args()
+    disable_unused_record_info()
+
+    devnull = open(os.devnull, "w")
+    formatter = logging.Formatter(LOG_FORMAT)
+    output_handler = logging.StreamHandler(devnull)
+    output_handler.setFormatter(formatter)
+
+    sync_log = _get_logger("sync", output_handler)
+    log_queue = queue.SimpleQueue()
+    async_log = _get_logger("async", LazyQueueHandler(log_queue))
+    filtered_handler = LazyQueueHandler(log_queue)
+    filtered_handler.addFilter(RepeatFilter(20, 10.0))
+    filtered_log = _get_logger("filtered", filtered_handler)
+    listener = logging.handlers.QueueListener(log_queue, output_handler)
+
+    name, channel, guid = "Shgck", "General - Elwynn Forest", 0xABCDEF
+    measure("info, sync f-string", lambda i: sync_log.info(f"{name} joins channel '{channel}' ({i})."), args.iterations)
+    measure(
+        "info, queue lazy", lambda i: async_log.info("%s joins channel '%s' (%d).", name, channel, i), args.iterations
+    )
+    start = time.perf_counter()
+    listener.start()
+    listener.stop()
+    report("info, listener thread", args.iterations, time.perf_counter() - start)
+
+    measure("debug off, f-string", lambda _: sync_log.debug(f"NameQuery: GUID {guid:X}"), args.iterations)
+    measure("debug off, lazy", lambda _: async_log.debug("NameQuery: GUID %X", guid), args.iterations)
+    measure("warning, sync repeated", lambda _: sync_log.warning("client too slow: %d", guid), args.iterations)
+    measure("warning, queue repeated", lambda _: filtered_log.warning("client too slow: %d", guid), args.iterations)
+    devnull.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+""" Scripted SRP login client, used to benchmark the login servers.
+
+It plays the client side of a login with asyncio streams: challenge, proof
+(checking the server proof) and realmlist request. With fragment_size, the
+messages are sent in small pieces to exercise the server framing.
+"""
+
+import asyncio
+import os
+import time
+from struct import Struct
+
+from durator.auth.constants import LoginOpCode, LoginResult
+from durator.auth.srp import Srp
+from durator.common.crypto.sha1 import sha1, sha1_interleave
+
+CHALL_HEADER_BIN = Struct("<BBH")
+CHALL_CONTENT_BIN = Struct("<4s3BH4s4s4sI4BB")
+CHALL_RESPONSE_SUCC_BIN = Struct("<3B32sB1sB32s32s16s")
+CHALL_RESPONSE_FAIL_SIZE = 3
+PROOF_BIN = Struct("<B32s20s20sB")
+PROOF_RESPONSE_SUCC_BIN = Struct("<2B20sI")
+PROOF_RESPONSE_FAIL_SIZE = 2
+REALMLIST_BIN = Struct("<BI")
+REALMLIST_HEADER_BIN = Struct("<BH")
+
+
+class LoginError(Exception):
+    pass
+
+
+def get_challenge_packet(account_name):
+    name = account_name.encode("ascii")
+    content = CHALL_CONTENT_BIN.pack(
+        b"\x00WoW", 1, 1, 2, 4125, b"\x0068x", b"\x00niW", b"SUne", 60, 127, 0, 0, 1, len(name)
+    )
+    header = CHALL_HEADER_BIN.pack(LoginOpCode.LOGIN_CHALL.value, 0, len(content) + len(name))
+    return header + content + name
+
+
+class ClientSrp:
+    """Client side of the SRP math: ephemeral, session key and proofs."""
+
+    def __init__(self, account_name, password):
+        self.account_name = account_name.upper()
+        self.password = password.upper()
+        self.priv_ephemeral = Srp.generate_priv_ephemerals(1)[0]
+        self.client_ephemeral = Srp.compute_public_ephemeral(self.priv_ephemeral)
+        self.session_key = b""
+        self.client_proof = b""
+        self.server_proof = b""
+
+    def compute_proofs(self, server_ephemeral, salt):
+        logs = (self.account_name + ":" + self.password).encode("ascii")
+        x_int = int.from_bytes(sha1(salt + sha1(logs)), "little")
+        scramble = Srp._scramble_a_b(self.client_ephemeral, server_ephemeral)
+        base = (server_ephemeral - Srp.MULTIPLIER * pow(Srp.GENERATOR, x_int, Srp.MODULUS)) % Srp.MODULUS
+        secret = pow(base, self.priv_ephemeral + scramble * x_int, Srp.MODULUS)
+        self.session_key = sha1_interleave(secret)
+        self.client_proof = Srp.compute_client_proof(
+            server_ephemeral, self.client_ephemeral, self.session_key, self.account_name, salt
+        )
+        self.server_proof = Srp.compute_server_proof(self.client_ephemeral, self.client_proof, self.session_key)
+
+
+class ScriptedLoginClient:
+    """Log in with an account on a login server and record the duration of
+    each stage in the timings dict (seconds)."""
+
+    def __init__(self, host, port, account_name, password, fragment_size=0):
+        self.host = host
+        self.port = port
+        self.srp = ClientSrp(account_name, password)
+        self.fragment_size = fragment_size
+        self.reader = None
+        self.writer = None
+        self.timings = {}
+
+    async def login(self):
+        """Do the whole login, raise LoginError if the server refuses it."""
+        start = time.perf_counter()
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            self.timings["connect"] = time.perf_counter() - start
+            await self._timed("challenge", self._challenge())
+            await self._timed("proof", self._proof())
+            await self._timed("realmlist", self._realmlist())
+        finally:
+            self.writer.close()
+        self.timings["login"] = time.perf_counter() - start
+
+    async def _timed(self, stage, coroutine):
+        start = time.perf_counter()
+        result = await coroutine
+        self.timings[stage] = time.perf_counter() - start
+        return result
+
+    async def _send(self, data):
+        if self.fragment_size:
+            for offset in range(0, len(data), self.fragment_size):
+                self.writer.write(data[offset : offset + self.fragment_size])
+                await self.writer.drain()
+                await asyncio.sleep(0)
+        else:
+            self.writer.write(data)
+            await self.writer.drain()
+
+    async def _challenge(self):
+        await self._send(get_challenge_packet(self.srp.account_name))
+        response = await self.reader.readexactly(CHALL_RESPONSE_FAIL_SIZE)
+        if response[2] != LoginResult.SUCCESS.value:
+            raise LoginError("challenge refused ({})".format(response[2]))
+        response += await self.reader.readexactly(CHALL_RESPONSE_SUCC_BIN.size - len(response))
+        data = CHALL_RESPONSE_SUCC_BIN.unpack(response)
+        self.server_ephemeral = int.from_bytes(data[3], "little")
+        self.salt = data[8]
+
+    async def _proof(self):
+        srp = self.srp
+        srp.compute_proofs(self.server_ephemeral, self.salt)
+        client_eph = int.to_bytes(srp.client_ephemeral, 32, "little")
+        packet = PROOF_BIN.pack(LoginOpCode.LOGIN_PROOF.value, client_eph, srp.client_proof, os.urandom(20), 0)
+        await self._send(packet)
+        response = await self.reader.readexactly(PROOF_RESPONSE_FAIL_SIZE)
+        if response[1] != LoginResult.SUCCESS.value:
+            raise LoginError("proof refused ({})".format(response[1]))
+        response += await self.reader.readexactly(PROOF_RESPONSE_SUCC_BIN.size - len(response))
+        if PROOF_RESPONSE_SUCC_BIN.unpack(response)[2] != srp.server_proof:
+            raise LoginError("wrong server proof")
+
+    async def _realmlist(self):
+        await self._send(REALMLIST_BIN.pack(LoginOpCode.REALMLIST.value, 0))
+        header = await self.reader.readexactly(REALMLIST_HEADER_BIN.size)
+        size = REALMLIST_HEADER_BIN.unpack(header)[1]
+        return await self.reader.readexactly(size)
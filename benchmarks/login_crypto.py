@@ -0,0 +1,52 @@
+""" Microbenchmark of the login crypto hashes.
+
+Measure the hashing parts of an SRP login, which do not depend on the big
+integer exponentiations: interleaved SHA1 of the session key, client and
+server proofs, and the whole proof step for comparison.
+
+    python -m benchmarks.login_crypto [-n N]
+"""
+
+import argparse
+import os
+
+from benchmarks.utils import measure
+from durator.auth.srp import Srp
+from durator.common.crypto.sha1 import sha1_interleave
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the login crypto hashes.")
+    argparser.add_argument("-n", "--iterations", type=int, default=100000, help="operations per benchmark")
+    args = argparser.parse_args()
+
+    account_name = "BENCH"
+    salt = os.urandom(32)
+    verifier = int.from_bytes(os.urandom(32), "little") % Srp.MODULUS
+    priv_ephemeral = Srp.generate_priv_ephemerals(1)[0]
+    server_eph = Srp.compute_server_ephemeral(priv_ephemeral, verifier)
+    client_eph = int.from_bytes(os.urandom(32), "little") % Srp.MODULUS
+    session_key = Srp.compute_session_key(priv_ephemeral, server_eph, client_eph, verifier)
+    client_proof = Srp.compute_client_proof(server_eph, client_eph, session_key, account_name, salt)
+    interleave_input = int.from_bytes(os.urandom(32), "little") ** 2
+
+    measure("sha1_interleave", lambda _: sha1_interleave(interleave_input), args.iterations)
+    measure(
+        "client proof",
+        lambda _: Srp.compute_client_proof(server_eph, client_eph, session_key, account_name, salt),
+        args.iterations,
+    )
+    measure(
+        "server proof",
+        lambda _: Srp.compute_server_proof(client_eph, client_proof, session_key),
+        args.iterations,
+    )
+    measure(
+        "proof step (with session key)",
+        lambda _: Srp.compute_proofs(priv_ephemeral, server_eph, client_eph, verifier, account_name, salt),
+        args.iterations // 10,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+""" Compare the threaded and asyncio login servers.
+
+Start each server in this process on a temporary SQLite database, then log
+in with scripted SRP clients, keeping a number of handshakes in flight. It
+reports the logins per second and the login latency percentiles.
+
+    python -m benchmarks.login_server [-n LOGINS] [-c CONCURRENCY] [--fragment SIZE]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from benchmarks.login_client import ScriptedLoginClient
+from benchmarks.utils import report
+from durator.auth.async_login_server import AsyncLoginServer
+from durator.auth.login_server import LoginServer
+from durator.common.account.managers import AccountManager
+from durator.common.log import LOG
+from durator.db.database import DB, db_connection, setup_database
+from durator.db.models import MODELS
+
+@db_connection
+def _install_tables():
+    DB.create_tables(MODELS)
+
+
+def _get_free_port():
+    with socket.socket() as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        return free_socket.getsockname()[1]
+
+
+def _start_server(server_class):
+    server = server_class()
+    server.CLIENTS_HOST = server.REALMS_HOST = "127.0.0.1"
+    server.CLIENTS_PORT = _get_free_port()
+    server.REALMS_PORT = _get_free_port()
+    thread = threading.Thread(target=server.start)
+    thread.start()
+    while server.clients_socket is None:
+        time.sleep(0.01)
+    return server, thread
+
+
+async def _run_clients(port, num_logins, concurrency, fragment_size):
+    # Each handshake in flight takes an account from this queue, so there are
+    # no simultaneous logins of the same account.
+    free_accounts = asyncio.Queue()
+    for index in range(concurrency):
+        free_accounts.put_nowait(f"BENCH{index}")
+    latencies = []
+    failures = []
+
+    async def log_in():
+        name = await free_accounts.get()
+        client = ScriptedLoginClient("127.0.0.1", port, name, name, fragment_size=fragment_size)
+        try:
+            await client.login()
+        except Exception as exc:
+            failures.append(exc)
+        else:
+            latencies.append(client.timings["login"])
+        finally:
+            free_accounts.put_nowait(name)
+
+    await asyncio.gather(*(log_in() for _ in range(num_logins)))
+    return latencies, failures
+
+
+def bench_server(server_class, num_logins, concurrency, fragment_size):
+    server, thread = _start_server(server_class)
+    try:
+        start = time.perf_counter()
+        latencies, failures = asyncio.run(_run_clients(server.CLIENTS_PORT, num_logins, concurrency, fragment_size))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown_flag.set()
+        thread.join()
+
+    report(f"{server_class.__name__} logins", len(latencies), elapsed)
+    if latencies:
+        latencies.sort()
+        percentiles = [latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 for p in (0.5, 0.9, 0.99)]
+        print("    latency p50 {:.1f} ms, p90 {:.1f} ms, p99 {:.1f} ms".format(*percentiles))
+    if failures:
+        print(f"    {len(failures)} failed logins, first error: {failures[0]!r}")
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Compare the threaded and asyncio login servers.")
+    argparser.add_argument("-n", "--logins", type=int, default=1000, help="total number of logins")
+    argparser.add_argument("-c", "--concurrency", type=int, default=200, help="handshakes in flight")
+    argparser.add_argument("--fragment", type=int, default=0, help="send messages in pieces of that size")
+    args = argparser.parse_args()
+
+    # Keep the console quiet: no connection logs.
+    LOG.setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as db_dir:
+        setup_database("sqlite", os.path.join(db_dir, "bench.sqlite3"))
+        _install_tables()
+        for index in range(args.concurrency):
+            AccountManager.create_account(f"BENCH{index}", f"BENCH{index}")
+
+        print(f"Logins: {args.logins}, concurrency: {args.concurrency}, fragment size: {args.fragment}")
+        bench_server(LoginServer, args.logins, args.concurrency, args.fragment)
+        bench_server(AsyncLoginServer, args.logins, args.concurrency, args.fragment)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+""" Benchmark of the encoding of frequent or large server packets.
+
+Each packet is encoded from already prepared values with its PacketSchema (or
+the to_bytes method of its structure), without database access or sending.
+
+    python -m benchmarks.packets [-n N]
+"""
+
+import argparse
+
+from benchmarks.utils import measure
+from durator.world.game.chat.language import Language
+from durator.world.game.chat.message import ChatMessageTag, ChatMessageType, ServerChatMessage
+from durator.world.game.chat.notification import Notification, NotificationType
+from durator.world.game.movement import Movement, MovementFlags
+from durator.world.game.position import Position
+from durator.world.game.spell.initial_packet import InitialSpellsPacket
+from durator.world.handlers.character.char_enum import CharEnumHandler
+from durator.world.handlers.game.name_query import NameQueryHandler
+from durator.world.realm import Realm, RealmFlags, RealmId, RealmPopulation
+
+
+class _Channel:
+    name = "General - Elwynn Forest"
+    internal_id = 0
+
+
+def _get_character_values(index):
+    return {
+        "guid": index + 1,
+        "name": f"Character{index}",
+        "race": 1,
+        "class_id": 1,
+        "gender": 0,
+        "skin": 0,
+        "face": 0,
+        "hair_style": 0,
+        "hair_color": 0,
+        "facial_hair": 0,
+        "level": 60,
+        "zone_id": 12,
+        "map_id": 0,
+        "pos_x": -8949.95,
+        "pos_y": -132.493,
+        "pos_z": 83.5312,
+        "guild": 0,
+        "char_flags": 0,
+        "first_login": 0,
+        "pet_display": 0,
+        "pet_level": 0,
+        "pet_family": 0,
+        "equipment": CharEnumHandler.EMPTY_EQUIPMENT,
+    }
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the server packets encoding.")
+    argparser.add_argument("-n", "--iterations", type=int, default=100000, help="packets per benchmark")
+    args = argparser.parse_args()
+
+    name_query_values = {"guid": 0xABCDEF, "name": "Shgck", "race": 2, "gender": 1, "class_id": 4}
+    characters = [_get_character_values(index) for index in range(10)]
+    char_enum_values = {"num_chars": len(characters), "characters": characters}
+    spells = [{"spell_id": 133 + index, "unk": index + 1} for index in range(50)]
+    cooldowns = [
+        {"spell_id": 133 + index, "item_id": 0, "spell_category": 0, "cooldown": 0, "cooldown_category": 0}
+        for index in range(50)
+    ]
+    spells_values = {
+        "unk": 0,
+        "num_spells": len(spells),
+        "spells": spells,
+        "num_cooldowns": len(cooldowns),
+        "cooldowns": cooldowns,
+    }
+
+    realm = Realm("Lordaeron", "127.0.0.1:13250", RealmId.SERVER1_PVP)
+
+    message = ServerChatMessage()
+    message.message_type = ChatMessageType.CHANNEL
+    message.language = Language.COMMON
+    message.channel_name = _Channel.name
+    message.content = "LF tank for Deadmines, PST"
+    message.sender_guid = 0x1234
+    message.tag = ChatMessageTag.NONE
+
+    notification = Notification(NotificationType.JOINED, _Channel())
+    notification.join_leave_guid = 0x1234
+
+    movement = Movement()
+    movement.flags = MovementFlags.IS_FALLING.value
+    movement.time = 123456
+    movement.position = Position(-8949.95, -132.493, 83.5312, 1.5)
+
+    measure("name query response", lambda _: NameQueryHandler.RESPONSE_SCHEMA.pack(name_query_values), args.iterations)
+    measure("char enum, 10 characters", lambda _: CharEnumHandler.RESPONSE_SCHEMA.pack(char_enum_values), args.iterations)
+    measure("realm state", lambda _: realm.get_state_packet(RealmFlags.NORMAL, RealmPopulation.LOW), args.iterations)
+    measure("chat message", lambda _: message.to_bytes(), args.iterations)
+    measure("channel notification", lambda _: notification.to_bytes(), args.iterations)
+    measure("movement, falling", lambda _: movement.to_bytes(), args.iterations)
+    measure("initial spells, 50 spells", lambda _: InitialSpellsPacket.SCHEMA.pack(spells_values), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
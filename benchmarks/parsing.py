@@ -0,0 +1,81 @@
+""" Benchmark of the parsing of received chat messages.
+
+Parse CMSG_MESSAGECHAT contents of realistic sizes, from a short say to a
+channel message near the 255 characters limit of the client, with
+ClientChatMessage.from_client. The previous parsing, reading strings one byte
+at a time from a BytesIO, is measured for comparison.
+
+    python -m benchmarks.parsing [-n N]
+"""
+
+import argparse
+import io
+from struct import Struct
+
+from benchmarks.utils import measure
+from durator.world.game.chat.language import Language
+from durator.world.game.chat.message import ChatMessageType, ClientChatMessage
+
+HEADER_BIN = Struct("<2I")
+
+MESSAGES = [
+    ("say, 12 chars", ChatMessageType.SAY, "", "hello there!"),
+    (
+        "channel, 60 chars",
+        ChatMessageType.CHANNEL,
+        "Trade - City",
+        "WTS [Arcanite Bar] and [Black Lotus], good prices, whisper me",
+    ),
+    (
+        "channel, 250 chars",
+        ChatMessageType.CHANNEL,
+        "General - Elwynn Forest",
+        "LFM Molten Core, need tanks and healers! " * 6 + "pst",
+    ),
+]
+
+
+def _legacy_read_cstring(file_object):
+    cstring = b""
+    while True:
+        char = file_object.read(1)
+        if char and char != b"\x00":
+            cstring += char
+        else:
+            break
+    return cstring
+
+
+def _legacy_from_client(data):
+    """The parsing before PacketReader."""
+    message = ClientChatMessage()
+    data_io = io.BytesIO(data)
+    header_data = HEADER_BIN.unpack(data_io.read(HEADER_BIN.size))
+    message.message_type = ChatMessageType(header_data[0])
+    message.language = Language(header_data[1])
+    if message.message_type == ChatMessageType.CHANNEL:
+        message.channel_name = _legacy_read_cstring(data_io).decode("utf8")
+    message.content = _legacy_read_cstring(data_io).decode("utf8")
+    return message
+
+
+def _get_data(message_type, channel_name, content):
+    data = HEADER_BIN.pack(message_type.value, Language.COMMON.value)
+    if message_type == ChatMessageType.CHANNEL:
+        data += channel_name.encode("utf8") + b"\x00"
+    return data + content.encode("utf8") + b"\x00"
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the chat messages parsing.")
+    argparser.add_argument("-n", "--iterations", type=int, default=100000, help="messages per benchmark")
+    args = argparser.parse_args()
+
+    for name, message_type, channel_name, content in MESSAGES:
+        data = _get_data(message_type, channel_name, content)
+        measure(name, lambda _: ClientChatMessage.from_client(data), args.iterations)
+        measure(name + " (legacy)", lambda _: _legacy_from_client(data), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
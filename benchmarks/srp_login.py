@@ -0,0 +1,106 @@
+""" Load test of the login server SRP math.
+
+Simulate concurrent logins, each in its own thread like the login server does:
+compute the server ephemeral (AUTH_LOGON_CHALLENGE) then the session key and
+proofs (AUTH_LOGON_PROOF), through an SrpExecutor. It reports logins per
+second with the math done inline and with 1 to N worker processes, to show
+how logins scale with the number of cores. It also measures the cost of
+answering a challenge with and without the precomputed ephemeral pool, and the
+pool refill rate with the builtin pow and with fixed-base windowed tables.
+
+    python -m benchmarks.srp_login [-n LOGINS] [-c CLIENTS] [--max-processes N]
+"""
+
+import argparse
+import os
+import threading
+import time
+
+from benchmarks.utils import measure, report
+from durator.auth.srp import Srp
+from durator.auth.srp_ephemeral_pool import SrpEphemeralPool
+from durator.auth.srp_executor import SrpExecutor
+
+
+class _BenchAccount:
+    """Bare account with the SRP data used by the login process."""
+
+    def __init__(self):
+        self.name = "BENCH"
+        Srp.generate_account_srp_data(self, "bench")
+
+
+def _login(executor, account):
+    srp = Srp()
+    srp.submit_server_ephemeral(executor, account.srp_verifier_as_int).result()
+    client_ephemeral = int.from_bytes(os.urandom(32), "little") % Srp.MODULUS
+    srp.submit_proofs(executor, client_ephemeral, account).result()
+
+
+def bench_logins(num_processes, num_logins, num_clients, account):
+    executor = SrpExecutor(num_processes=num_processes)
+    executor.start()
+    _login(executor, account)  # Warm up the worker processes.
+
+    logins_per_client = num_logins // num_clients
+
+    def client():
+        for _ in range(logins_per_client):
+            _login(executor, account)
+
+    threads = [threading.Thread(target=client) for _ in range(num_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    executor.stop()
+
+    name = "logins (inline)" if num_processes == 0 else f"logins ({num_processes} processes)"
+    return report(name, logins_per_client * num_clients, elapsed)
+
+
+def bench_challenge(iterations, account):
+    verifier = account.srp_verifier_as_int
+
+    def challenge(_):
+        Srp().generate_server_ephemeral(verifier)
+
+    measure("challenge (no pool)", challenge, iterations)
+
+    pool = SrpEphemeralPool(size=iterations)
+    pool.fill()
+
+    def pooled_challenge(_):
+        Srp(pool.get()).generate_server_ephemeral(verifier)
+
+    measure("challenge (pooled)", pooled_challenge, iterations)
+
+
+def bench_pool_refill(iterations):
+    for window_bits in (0, 4, 6, 8):
+        pool = SrpEphemeralPool(size=iterations, window_bits=window_bits)
+        name = "pool refill (pow)" if window_bits == 0 else f"pool refill ({window_bits}-bit window)"
+        start = time.perf_counter()
+        pool.fill()
+        report(name, iterations, time.perf_counter() - start)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the SRP math of logins.")
+    argparser.add_argument("-n", "--logins", type=int, default=2000, help="total number of logins")
+    argparser.add_argument("-c", "--clients", type=int, default=32, help="concurrent clients")
+    argparser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    args = argparser.parse_args()
+
+    print(f"Cores: {os.cpu_count()}, clients: {args.clients}")
+    account = _BenchAccount()
+    bench_challenge(args.logins, account)
+    bench_pool_refill(args.logins)
+    for num_processes in range(args.max_processes + 1):
+        bench_logins(num_processes, args.logins, args.clients, account)
+
+
+if __name__ == "__main__":
+    main()
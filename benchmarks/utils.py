@@ -0,0 +1,26 @@
+""" Small helpers shared by the benchmark scripts.
+
+Benchmarks are plain modules that can be started with "python -m", e.g.
+"python -m benchmarks.db". They print one line per measured operation.
+"""
+
+import time
+
+
+def measure(name, func, iterations):
+    """Call func(index) iterations times, print and return the throughput in
+    operations per second."""
+    start = time.perf_counter()
+    for index in range(iterations):
+        func(index)
+    elapsed = time.perf_counter() - start
+    return report(name, iterations, elapsed)
+
+
+def report(name, num_ops, elapsed):
+    """Print a result line for num_ops operations done in elapsed seconds and
+    return the throughput in operations per second."""
+    ops_per_sec = num_ops / elapsed if elapsed > 0 else float("inf")
+    usec_per_op = elapsed / num_ops * 1000000 if num_ops else 0.0
+    print(f"{name:<32}{num_ops:>8} ops {elapsed:>9.3f} s {ops_per_sec:>12.1f} ops/s {usec_per_op:>10.1f} us/op")
+    return ops_per_sec
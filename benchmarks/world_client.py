@@ -0,0 +1,254 @@
+""" Scripted world client, used by the load generator.
+
+It plays the client side of a world session with asyncio streams, after a
+login with the ScriptedLoginClient: session authentication with the login
+session key, character creation and list, entering the world, then movement
+heartbeats, pings and says. Like the real client, it encrypts the headers of
+its packets and decrypts those of the server once the session is set up.
+
+A reader task receives all the server packets: requests wait for a response
+with a given opcode, the other packets (e.g. updates of the other players)
+are only counted.
+"""
+
+import asyncio
+import math
+import os
+import time
+from struct import Struct
+
+from durator.common.crypto.session_cipher import SessionCipher
+from durator.common.crypto.sha1 import sha1
+from durator.common.networking.packet_reader import PacketReader
+from durator.config import CONFIG
+from durator.world.game.character.constants import CharacterClass, CharacterGender, CharacterRace
+from durator.world.game.chat.language import Language
+from durator.world.game.chat.message import ChatMessageType
+from durator.world.handlers.auth_session import AuthSessionResponseCode
+from durator.world.handlers.character.char_create import CharCreateResponseCode
+from durator.world.handlers.character.char_enum import CharEnumHandler
+from durator.world.opcodes import OpCode
+
+# Server headers: uint16 size (big endian), uint16 opcode.
+SERVER_HEADER_SIZE = 4
+SERVER_OPCODE_BIN = Struct("<H")
+# Client headers: uint16 size (big endian), uint32 opcode.
+CLIENT_SIZE_BIN = Struct(">H")
+CLIENT_OPCODE_BIN = Struct("<I")
+
+AUTH_CHALLENGE_BIN = Struct("<I")
+AUTH_SESSION_PART1_BIN = Struct("<2I")
+AUTH_SESSION_PART2_BIN = Struct("<I20s")
+CHAR_CREATE_BIN = Struct("<9B")
+# Fixed part of a character entry after its name, then its equipment entries.
+CHAR_ENUM_ENTRY_BIN = Struct("<3B5BB2I3f2IB3I")
+CHAR_ENUM_EQUIPMENT_SIZE = Struct("<IB").size * len(CharEnumHandler.EMPTY_EQUIPMENT)
+PLAYER_LOGIN_BIN = Struct("<Q")
+VERIFY_WORLD_BIN = Struct("<I4f")
+MOVEMENT_BIN = Struct("<2I4f")
+PING_BIN = Struct("<2I")
+CHAT_HEADER_BIN = Struct("<2I")
+
+
+class WorldClientError(Exception):
+    pass
+
+
+class ClientSessionCipher(SessionCipher):
+    """Client side of the session cipher: the client encrypts the 6-byte
+    headers it sends and decrypts the 4-byte headers it receives."""
+
+    ENCRYPT_HEADER_SIZE = SessionCipher.DECRYPT_HEADER_SIZE
+    DECRYPT_HEADER_SIZE = SessionCipher.ENCRYPT_HEADER_SIZE
+
+
+class ScriptedWorldClient:
+    """Play a world session for an account logged in with that session key,
+    recording the duration of each stage in the timings dict (seconds) and the
+    round-trip times of the pings and says in the samples dict of lists.
+
+    Attributes:
+    - num_received, num_sent: packets received and sent
+    - position: (x, y, z, o) of the character in world
+    """
+
+    RESPONSE_TIMEOUT = 30
+
+    def __init__(self, host, port, account_name, session_key, char_name):
+        self.host = host
+        self.port = port
+        self.account_name = account_name.upper()
+        self.session_key = session_key
+        self.char_name = char_name
+        self.reader = None
+        self.writer = None
+        self.cipher = None
+        self.reader_task = None
+        self.waiters = []
+        self.timings = {}
+        self.samples = {"ping": [], "chat": []}
+        self.num_received = 0
+        self.num_sent = 0
+        self.position = (0.0, 0.0, 0.0, 0.0)
+
+    async def enter_world(self):
+        """Connect, authenticate, create the character if needed and enter
+        the world with it; raise WorldClientError if the server refuses."""
+        start = time.perf_counter()
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.reader_task = asyncio.create_task(self._read_packets())
+        auth_seed = AUTH_CHALLENGE_BIN.unpack((await self._expect(OpCode.SMSG_AUTH_CHALLENGE))[:4])[0]
+        self.timings["world_connect"] = time.perf_counter() - start
+        await self._timed("auth_session", self._auth_session(auth_seed))
+        await self._timed("char_create", self._create_char())
+        guid = await self._timed("char_enum", self._get_char_guid())
+        await self._timed("player_login", self._player_login(guid))
+        self.timings["enter_world"] = time.perf_counter() - start
+
+    async def play(self, duration, heartbeat_interval, chat_interval):
+        """Walk in circles for duration seconds, sending heartbeats and pings
+        every heartbeat_interval and a say every chat_interval seconds."""
+        start = time.monotonic()
+        next_chat = start + chat_interval
+        center_x, center_y, z, _ = self.position
+        angle = 0.0
+        ping_id = 0
+        while time.monotonic() - start < duration:
+            angle += 0.1
+            x, y = center_x + 5 * math.cos(angle), center_y + 5 * math.sin(angle)
+            elapsed_ms = int((time.monotonic() - start) * 1000)
+            self._send(OpCode.MSG_MOVE_HEARTBEAT, MOVEMENT_BIN.pack(1, elapsed_ms, x, y, z, angle + math.pi / 2))
+
+            ping_id += 1
+            ping_start = time.perf_counter()
+            self._send(OpCode.CMSG_PING, PING_BIN.pack(ping_id, 0))
+            await self._expect(OpCode.SMSG_PONG, lambda data: data[:4] == ping_id.to_bytes(4, "little"))
+            self.samples["ping"].append(time.perf_counter() - ping_start)
+
+            if time.monotonic() >= next_chat:
+                next_chat += chat_interval
+                await self._say()
+            await self.writer.drain()
+            await asyncio.sleep(heartbeat_interval)
+
+    async def close(self):
+        if self.reader_task is not None:
+            self.reader_task.cancel()
+        if self.writer is not None:
+            self.writer.close()
+
+    async def _timed(self, stage, coroutine):
+        start = time.perf_counter()
+        result = await coroutine
+        self.timings[stage] = time.perf_counter() - start
+        return result
+
+    def _send(self, opcode, data):
+        header = CLIENT_SIZE_BIN.pack(CLIENT_OPCODE_BIN.size + len(data)) + CLIENT_OPCODE_BIN.pack(opcode.value)
+        if self.cipher is not None:
+            header = self.cipher.encrypt(header)
+        self.writer.write(header + data)
+        self.num_sent += 1
+
+    async def _read_packets(self):
+        """Read the server packets, resolving the waiters matching them."""
+        try:
+            while True:
+                header = await self.reader.readexactly(SERVER_HEADER_SIZE)
+                if self.cipher is not None:
+                    header = self.cipher.decrypt(header)
+                size = int.from_bytes(header[:2], "big")
+                opcode_value = SERVER_OPCODE_BIN.unpack(header[2:])[0]
+                data = await self.reader.readexactly(size - 2)
+                self.num_received += 1
+                self._resolve_waiters(opcode_value, data)
+        except (asyncio.IncompleteReadError, ConnectionError) as exc:
+            for _, _, future in self.waiters:
+                if not future.done():
+                    future.set_exception(WorldClientError(f"connection lost: {exc!r}"))
+            self.waiters = []
+
+    def _resolve_waiters(self, opcode_value, data):
+        for waiter in self.waiters:
+            waiter_opcode, predicate, future = waiter
+            if waiter_opcode.value == opcode_value and (predicate is None or predicate(data)):
+                self.waiters.remove(waiter)
+                if not future.done():
+                    future.set_result(data)
+                return
+
+    def _expect(self, opcode, predicate=None):
+        """Wait for the next packet with that opcode, and matching
+        predicate(data) if given, from now on; return a coroutine returning
+        its data. Call it before sending the request."""
+        waiter = (opcode, predicate, asyncio.get_running_loop().create_future())
+        self.waiters.append(waiter)
+        return self._wait_response(waiter)
+
+    async def _wait_response(self, waiter):
+        try:
+            return await asyncio.wait_for(waiter[2], self.RESPONSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            raise WorldClientError(f"no {waiter[0].name} received")
+
+    async def _auth_session(self, auth_seed):
+        client_seed = int.from_bytes(os.urandom(4), "little")
+        name = self.account_name.encode("ascii")
+        seeds = client_seed.to_bytes(4, "little") + auth_seed.to_bytes(4, "little")
+        client_hash = sha1(name + bytes(4) + seeds + self.session_key)
+        data = (
+            AUTH_SESSION_PART1_BIN.pack(int(CONFIG["general"]["build"]), 0)
+            + name
+            + b"\x00"
+            + AUTH_SESSION_PART2_BIN.pack(client_seed, client_hash)
+        )
+        response = self._expect(OpCode.SMSG_AUTH_RESPONSE)
+        self._send(OpCode.CMSG_AUTH_SESSION, data)
+        # The server encrypts its headers from its response on.
+        self.cipher = ClientSessionCipher(self.session_key)
+        result = (await response)[0]
+        while result == AuthSessionResponseCode.AUTH_WAIT_QUEUE.value:
+            result = (await self._expect(OpCode.SMSG_AUTH_RESPONSE))[0]
+        if result != AuthSessionResponseCode.AUTH_OK.value:
+            raise WorldClientError(f"session refused ({result:#x})")
+
+    async def _create_char(self):
+        # Undead rogue is the only combination with character defaults.
+        char_data = CHAR_CREATE_BIN.pack(
+            CharacterRace.UNDEAD.value, CharacterClass.ROGUE.value, CharacterGender.MALE.value, 0, 0, 0, 0, 0, 0
+        )
+        response = self._expect(OpCode.SMSG_CHAR_CREATE)
+        self._send(OpCode.CMSG_CHAR_CREATE, self.char_name.encode("utf8") + b"\x00" + char_data)
+        result = (await response)[0]
+        # The character of a previous run can be used again.
+        if result not in (CharCreateResponseCode.SUCCESS.value, CharCreateResponseCode.NAME_IN_USE.value):
+            raise WorldClientError(f"character creation failed ({result:#x})")
+
+    async def _get_char_guid(self):
+        response = self._expect(OpCode.SMSG_CHAR_ENUM)
+        self._send(OpCode.CMSG_CHAR_ENUM, b"")
+        reader = PacketReader(await response)
+        for _ in range(reader.read_struct(Struct("<B"))[0]):
+            guid = reader.read_struct(PLAYER_LOGIN_BIN)[0]
+            name = reader.read_cstring()
+            reader.skip(CHAR_ENUM_ENTRY_BIN.size + CHAR_ENUM_EQUIPMENT_SIZE)
+            if name == self.char_name:
+                return guid
+        raise WorldClientError(f"character {self.char_name} not in list")
+
+    async def _player_login(self, guid):
+        response = self._expect(OpCode.SMSG_LOGIN_VERIFY_WORLD)
+        self._send(OpCode.CMSG_PLAYER_LOGIN, PLAYER_LOGIN_BIN.pack(guid))
+        self.position = VERIFY_WORLD_BIN.unpack(await response)[1:]
+
+    async def _say(self):
+        token = os.urandom(4).hex()
+        content = f"Hello from {self.char_name} {token}".encode("utf8")
+        start = time.perf_counter()
+        echo = self._expect(OpCode.SMSG_MESSAGECHAT, lambda data: token.encode("ascii") in data)
+        header = CHAT_HEADER_BIN.pack(ChatMessageType.SAY.value, Language.COMMON.value)
+        self._send(OpCode.CMSG_MESSAGECHAT, header + content + b"\x00")
+        await echo
+        self.samples["chat"].append(time.perf_counter() - start)
@@ -0,0 +1,91 @@
+import asyncio
+
+from durator.auth.login_connection import BaseLoginConnection
+from durator.common.log import get_logger
+from durator.common.networking.packet_capture import DIRECTION_RECEIVED, DIRECTION_SENT
+
+LOG = get_logger("login")
+
+
+class AsyncLoginConnection(BaseLoginConnection):
+    """Handle the login process of a client on an asyncio stream.
+
+    Messages are read and framed in the event loop; each one is then handled
+    by the usual login handlers, in a worker thread of the server as
+    they can block on the database or the SRP executor. The responses they
+    send are buffered and written back by the event loop.
+    """
+
+    def __init__(self, server, reader, writer):
+        super().__init__(server, None)
+        self.reader = reader
+        self.writer = writer
+        self.output_buffer = []
+
+    async def handle_stream(self):
+        """Coroutine equivalent of ThreadedConnectionAutomaton.handle_connection."""
+        loop = asyncio.get_running_loop()
+        self._actions_before_main_loop()
+
+        while self.state not in self.END_STATES:
+            packet = await self.read_message()
+            if packet is None:
+                break
+            await loop.run_in_executor(self.server.handler_executor, self._try_handle_packet, packet)
+            if not await self._flush():
+                break
+
+        self._actions_after_main_loop()
+
+    async def read_message(self):
+        """Read the next complete message, or None if the connection is lost,
+        times out or sends something unexpected."""
+        message = b""
+        message_size = 1
+        try:
+            while len(message) < message_size:
+                data = await asyncio.wait_for(
+                    self.reader.readexactly(message_size - len(message)), self.server.CLIENT_TIMEOUT
+                )
+                message += data
+                message_size = self.get_message_size(message)
+        except asyncio.IncompleteReadError:
+            LOG.debug("Client closed the connection.")
+            return None
+        except asyncio.TimeoutError:
+            LOG.info("Login: client timed out.")
+            return None
+        except ConnectionError:
+            LOG.info("Lost connection.")
+            return None
+        except ValueError as exc:
+            LOG.warning("Login: %s", exc)
+            return None
+        self._count_packet(DIRECTION_RECEIVED, message[0], len(message))
+        if self.server.packet_capture.enabled:
+            self._capture_packet(DIRECTION_RECEIVED, message)
+        return message
+
+    def send_packet(self, packet):
+        self._count_packet(DIRECTION_SENT, packet[0], len(packet))
+        if self.server.packet_capture.enabled:
+            self._capture_packet(DIRECTION_SENT, packet)
+        self.output_buffer.append(packet)
+
+    async def _flush(self):
+        """Write the buffered responses, return False if the connection is
+        lost."""
+        if not self.output_buffer:
+            return True
+        self.writer.write(b"".join(self.output_buffer))
+        self.output_buffer = []
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            LOG.info("Lost connection.")
+            return False
+        return True
+
+    def _actions_after_main_loop(self):
+        LOG.debug("LoginConnection: session ended.")
+        self.writer.close()
@@ -0,0 +1,60 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from durator.auth.async_login_connection import AsyncLoginConnection
+from durator.auth.login_server import LoginServer
+from durator.common.log import get_logger
+from durator.config import CONFIG
+
+LOG = get_logger("login")
+
+
+class AsyncLoginServer(LoginServer):
+    """Login server handling all clients in an asyncio event loop.
+
+    Instead of a thread per client, connections are coroutines framing the
+    login messages (see AsyncLoginConnection), so it can hold thousands of
+    handshakes at once; only the handlers run in a small thread pool. Realms
+    are handled as in the LoginServer.
+    """
+
+    BACKLOG_SIZE = 1024
+    HANDLER_WORKERS = int(CONFIG["login"].get("async_handler_workers", "8"))
+    CLIENT_TIMEOUT = float(CONFIG["login"].get("async_client_timeout", "60"))
+
+    def __init__(self):
+        super().__init__()
+        self.handler_executor = None
+
+    def _start_workers(self):
+        super()._start_workers()
+        self.handler_executor = ThreadPoolExecutor(
+            max_workers=self.HANDLER_WORKERS, thread_name_prefix="login-handler"
+        )
+
+    def _stop_workers(self):
+        self.handler_executor.shutdown()
+        super()._stop_workers()
+
+    def _accept_clients(self):
+        """Serve clients on the listening socket until manual interruption."""
+        try:
+            asyncio.run(self._serve_clients())
+        except KeyboardInterrupt:
+            LOG.info("KeyboardInterrupt received, stop accepting clients.")
+
+    async def _serve_clients(self):
+        server = await asyncio.start_server(self._handle_client_stream, sock=self.clients_socket)
+        async with server:
+            while not self.shutdown_flag.is_set():
+                await asyncio.sleep(1)
+
+    async def _handle_client_stream(self, reader, writer):
+        address = writer.get_extra_info("peername")
+        LOG.info("Accepting client connection from %s:%s", address[0], address[1])
+        connection = AsyncLoginConnection(self, reader, writer)
+        try:
+            await connection.handle_stream()
+        except Exception as exc:
+            LOG.error("AsyncLoginConnection: uncaught exception: %s", exc)
+            writer.close()
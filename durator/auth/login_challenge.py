@@ -1,12 +1,15 @@
 import os
 from struct import Struct
 
+from durator.auth import login_crypto
 from durator.auth.constants import LoginOpCode, LoginResult
 from durator.auth.login_connection_state import LoginConnectionState
-from durator.auth.srp import Srp
 from durator.common.account.account import AccountStatus
 from durator.common.account.managers import AccountManager
-from durator.common.log import LOG
+from durator.common.log import get_logger
+from durator.common.networking.packet_reader import PacketReader
+
+LOG = get_logger("login")
 
 
 class LoginChallenge:
@@ -40,25 +43,21 @@ class LoginChallenge:
         """Process the challenge packet: parse its data and check whether that
         account name can log."""
         self._parse_packet(self.packet)
-        LOG.debug("Login: account " + self.account_name)
+        LOG.debug("Login: account %s", self.account_name)
         return self._process_account()
 
     def _parse_packet(self, packet):
-        self._parse_packet_header(packet)
-        self._parse_packet_content(packet)
+        reader = PacketReader(packet)
+        self._parse_packet_header(reader)
+        self._parse_packet_content(reader)
 
-    def _parse_packet_header(self, packet):
-        end_offset = self.HEADER_BIN.size
-        header = packet[0:end_offset]
-        header_data = self.HEADER_BIN.unpack(header)
+    def _parse_packet_header(self, reader):
+        header_data = reader.read_struct(self.HEADER_BIN)
         self.unk_code = header_data[0]
         self.size = header_data[1]
 
-    def _parse_packet_content(self, packet):
-        offset = self.HEADER_BIN.size
-        end_offset = offset + self.CONTENT_BIN.size
-        content = packet[offset:end_offset]
-        content_data = self.CONTENT_BIN.unpack(content)
+    def _parse_packet_content(self, reader):
+        content_data = reader.read_struct(self.CONTENT_BIN)
 
         self.game_name = _decode_chall_cstring(content_data[0])
         self.version_major = content_data[1]
@@ -72,19 +71,19 @@ class LoginChallenge:
         self.ip_address = content_data[9:13]
         self.account_name_size = content_data[13]
 
-        account_name = packet[end_offset : end_offset + self.account_name_size]
-        self.account_name = account_name.decode("ascii")
+        self.account_name = reader.read_bytes(self.account_name_size).decode("ascii")
 
     def _process_account(self):
         """Check if the account received can log to the server."""
         account = AccountManager.get_account(self.account_name)
         if account is not None and account.is_valid():
             self.conn.account = account
-            self.conn.srp.generate_server_ephemeral(account.srp_verifier_as_int)
+            srp_executor = self.conn.server.srp_executor
+            self.conn.srp.submit_server_ephemeral(srp_executor, account.srp_verifier_as_int).result()
             response = self._get_success_response()
             return LoginConnectionState.SENT_CHALL, response
         else:
-            LOG.warning("Invalid account {} tried to login".format(self.account_name))
+            LOG.warning("Invalid account %s tried to login", self.account_name)
             response = self._get_failure_response(account)
             return LoginConnectionState.CLOSED, response
 
@@ -92,8 +91,8 @@ class LoginChallenge:
         """Return a success packet with appropriate SRP data."""
         server_eph = int.to_bytes(self.conn.srp.server_ephemeral, 32, "little")
         salt = self.conn.account.srp_salt_as_bytes
-        generator = int.to_bytes(Srp.GENERATOR, 1, "little")
-        modulus = int.to_bytes(Srp.MODULUS, 32, "little")
+        generator = login_crypto.GENERATOR_BYTES
+        modulus = login_crypto.MODULUS_BYTES
 
         response = self.RESPONSE_SUCC_BIN.pack(
             LoginOpCode.LOGIN_CHALL.value,
@@ -1,3 +1,5 @@
+from struct import Struct
+
 from durator.auth.constants import LoginOpCode
 from durator.auth.login_challenge import LoginChallenge
 from durator.auth.login_connection_state import LoginConnectionState
@@ -6,14 +8,18 @@ from durator.auth.realmlist_request import RealmlistRequest
 from durator.auth.recon_challenge import ReconChallenge
 from durator.auth.recon_proof import ReconProof
 from durator.auth.srp import Srp
-from durator.common.log import LOG
-from durator.common.networking.connection_automaton import ConnectionAutomaton
-from durator.config import DEBUG
-from lib.utilities import get_data_dump as dump_data
+from durator.common.log import get_logger
+from durator.common.networking.connection_automaton import ConnectionAutomaton, ThreadedConnectionAutomaton
+from durator.common.networking.opcode_table import OpcodeTable
+from durator.common.networking.packet_capture import DIRECTION_RECEIVED, DIRECTION_SENT
+
+LOG = get_logger("login")
 
 
-class LoginConnection(ConnectionAutomaton):
-    """Handle the login process of a client with a SRP challenge."""
+class BaseLoginConnection(ConnectionAutomaton):
+    """Handle the login process of a client with a SRP challenge: states,
+    handlers and message framing shared by the threaded LoginConnection and
+    the AsyncLoginConnection, which receive and send messages their own way."""
 
     LEGAL_OPS = {
         LoginConnectionState.INIT: [LoginOpCode.LOGIN_CHALL, LoginOpCode.RECON_CHALL],
@@ -36,40 +42,99 @@ class LoginConnection(ConnectionAutomaton):
     END_STATES = [LoginConnectionState.CLOSED]
     MAIN_ERROR_STATE = LoginConnectionState.CLOSED
 
+    # Challenges have a header with the size of the remaining data; other
+    # messages have a fixed size, opcode included.
+    SIZED_HEADER_BIN = Struct("<BBH")
+    SIZED_OPS = [LoginOpCode.LOGIN_CHALL.value, LoginOpCode.RECON_CHALL.value]
+    FIXED_SIZES = {
+        LoginOpCode.LOGIN_PROOF.value: 1 + LoginProof.PROOF_BIN.size,
+        LoginOpCode.RECON_PROOF.value: 1 + ReconProof.CONTENT_BIN.size,
+        LoginOpCode.REALMLIST.value: 5,
+    }
+    OPCODE_TABLE = OpcodeTable(LoginOpCode, "login")
+
     def __init__(self, server, connection):
         super().__init__(connection)
         self.server = server
         self.account = None
-        self.srp = Srp()
+        self.srp = Srp(server.srp_ephemeral_pool.get())
         self.recon_challenge = b""
+        self.capture_id = server.packet_capture.new_connection_id()
+
+    @staticmethod
+    def get_message_size(data):
+        """Return the size of the message at the start of data, or the size
+        of its header if data is too short to know it. Raise a ValueError if
+        the opcode can't be received by the login server."""
+        opcode = data[0]
+        if opcode in BaseLoginConnection.SIZED_OPS:
+            header_size = BaseLoginConnection.SIZED_HEADER_BIN.size
+            if len(data) < header_size:
+                return header_size
+            return header_size + BaseLoginConnection.SIZED_HEADER_BIN.unpack_from(data)[2]
+        try:
+            return BaseLoginConnection.FIXED_SIZES[opcode]
+        except KeyError:
+            raise ValueError("unexpected login opcode {}".format(opcode))
+
+    def _parse_packet(self, packet):
+        return self.OPCODE_TABLE.get(packet[0]), packet[1:]
+
+    def _capture_packet(self, direction, packet):
+        """Capture a whole login message, its opcode being the first byte."""
+        account_name = self.account.name if self.account else None
+        self.server.packet_capture.capture(direction, self.capture_id, packet[0], packet, account_name)
+
+    def accept_login(self):
+        """Ask the login server to validate this account session."""
+        self.server.accept_account_login(self.account, self.srp.session_key)
+
+
+class LoginConnection(BaseLoginConnection, ThreadedConnectionAutomaton):
+    """Login connection in a thread of its own, on a blocking socket."""
+
+    def __init__(self, server, connection):
+        super().__init__(server, connection)
+        self.recv_buffer = b""
 
     def __del__(self):
-        self.socket.close()
+        if self.socket is not None:
+            self.socket.close()
 
     def _recv_packet(self):
-        # This assumes that all packets are received in no more or less than one
-        # piece, which is a wrong. However, exceptions shouldn't occur often
-        # with how short login messages are.
+        """Return the next complete message, as several messages can arrive
+        in one piece or one message in several pieces."""
         try:
-            data = self.socket.recv(1024)
-            if data and DEBUG:
-                print(dump_data(data), end="")
-            return data or None
+            while True:
+                if self.recv_buffer:
+                    message_size = self.get_message_size(self.recv_buffer)
+                    if len(self.recv_buffer) >= message_size:
+                        break
+                data = self.socket.recv(1024)
+                if not data:
+                    return None
+                self.recv_buffer += data
         except ConnectionError:
             LOG.info("Lost connection.")
             return None
+        except ValueError as exc:
+            LOG.warning("Login: %s", exc)
+            return None
 
-    def _parse_packet(self, packet):
-        return LoginOpCode(packet[0]), packet[1:]
+        packet = self.recv_buffer[:message_size]
+        self.recv_buffer = self.recv_buffer[message_size:]
+        self._count_packet(DIRECTION_RECEIVED, packet[0], len(packet))
+        if self.server.packet_capture.enabled:
+            self._capture_packet(DIRECTION_RECEIVED, packet)
+        return packet
 
     def send_packet(self, packet):
+        self._count_packet(DIRECTION_SENT, packet[0], len(packet))
+        if self.server.packet_capture.enabled:
+            self._capture_packet(DIRECTION_SENT, packet)
         self.socket.sendall(packet)
 
     def _actions_after_main_loop(self):
         """Close connection with client."""
         LOG.debug("LoginConnection: session ended.")
         self.socket.close()
-
-    def accept_login(self):
-        """Ask the login server to validate this account session."""
-        self.server.accept_account_login(self.account, self.srp.session_key)
@@ -0,0 +1,32 @@
+""" Constants and hashes of the SRP login process that can be cached.
+
+The WoW SRP variant uses a fixed modulus and generator, so every value derived
+only from them is computed once at import instead of on every login.
+"""
+
+import functools
+
+from durator.common.crypto.sha1 import sha1
+
+MODULUS = 0x894B645E89E1535BBDAD5B8B290650530801B18EBFBF5E8FAB3C82872A3E9BB7
+GENERATOR = 7
+MULTIPLIER = 3
+
+MODULUS_BYTES = int.to_bytes(MODULUS, 32, "little")
+GENERATOR_BYTES = int.to_bytes(GENERATOR, 1, "little")
+
+
+def _xor_bytes(bytes_a, bytes_b):
+    xor_int = int.from_bytes(bytes_a, "little") ^ int.from_bytes(bytes_b, "little")
+    return int.to_bytes(xor_int, len(bytes_a), "little")
+
+
+# H(N) xor H(g), the first part of the client proof hash.
+MODULUS_GENERATOR_HASH_XOR = _xor_bytes(sha1(MODULUS_BYTES.rstrip(b"\x00")), sha1(GENERATOR_BYTES))
+
+
+@functools.lru_cache(maxsize=4096)
+def get_account_name_hash(account_name):
+    """Return H(account_name), cached as it is the same for every login of
+    this account."""
+    return sha1(account_name.encode("ascii"))
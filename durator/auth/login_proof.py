@@ -2,7 +2,9 @@ from struct import Struct
 
 from durator.auth.constants import LoginOpCode, LoginResult
 from durator.auth.login_connection_state import LoginConnectionState
-from durator.common.log import LOG
+from durator.common.log import get_logger
+
+LOG = get_logger("login")
 
 
 class LoginProof:
@@ -24,16 +26,14 @@ class LoginProof:
     def process(self):
         self._parse_packet(self.packet)
 
-        account = self.conn.account
-        verifier = account.srp_verifier_as_int
-        self.conn.srp.generate_session_key(self.client_ephemeral, verifier)
-        self.conn.srp.generate_client_proof(self.client_ephemeral, account)
+        # The session key and both proofs are computed in a single SRP job.
+        srp_executor = self.conn.server.srp_executor
+        self.conn.srp.submit_proofs(srp_executor, self.client_ephemeral, self.conn.account).result()
         local_client_proof = self.conn.srp.client_proof
 
         if local_client_proof == self.client_proof:
             LOG.debug("Login: authenticated!")
             self.conn.accept_login()
-            self.conn.srp.generate_server_proof(self.client_ephemeral)
             response = self._get_success_response()
             return LoginConnectionState.SENT_PROOF, response
         else:
@@ -2,13 +2,22 @@ import socket
 import threading
 import time
 
+from durator.auth.constants import LoginOpCode
 from durator.auth.login_connection import LoginConnection
 from durator.auth.realm_connection import RealmConnection
+from durator.auth.realmlist_request import RealmlistRequest
+from durator.auth.srp_ephemeral_pool import SrpEphemeralPool
+from durator.auth.srp_executor import SrpExecutor
 from durator.common.account.managers import AccountSessionManager
-from durator.common.log import LOG
+from durator.common.admin_console import AdminConsole
+from durator.common.log import get_logger
+from durator.common.metrics import MetricsExporter
+from durator.common.networking.packet_capture import PacketCapture
 from durator.config import CONFIG
 from lib.utilities import simple_thread
 
+LOG = get_logger("login")
+
 
 class LoginServer:
     """Listen for clients and start a new thread for each connection.
@@ -26,8 +35,14 @@ class LoginServer:
     listener function. This may suck as this packet contains user specific data.
 
     self.realms is dict mapping realm names to realm_state dicts. These dicts
-    contains a ready RealmInfo_S "packet" to be send to clients, and a timestamp
-    "last_update" of the last time it got updated by the remote world server.
+    contains a ready RealmInfo_S "packet" to be send to clients, a timestamp
+    "last_update" of the last time it got updated by the remote world server,
+    and the RealmConnection "link" it was received from.
+
+    The realmlist response sent to clients is built once every time the realm
+    list changes (self.realmlist, numbered by self.realmlist_version), so
+    serving it is only an attribute read. Expired realms are removed by a
+    maintenance thread every REALM_MAINTENANCE_INTERVAL seconds.
     """
 
     CLIENTS_HOST = CONFIG["login"]["clients_conn_hostname"]
@@ -36,24 +51,35 @@ class LoginServer:
     REALMS_PORT = int(CONFIG["login"]["realm_conn_port"])
     BACKLOG_SIZE = 64
     REALM_MAX_UPDATE_TIME = int(CONFIG["login"]["realm_max_update_time"])
+    REALM_MAINTENANCE_INTERVAL = 1
 
     def __init__(self):
         self.clients_socket = None
         self.realms_socket = None
         self.realms = {}
+        self.realmlist = RealmlistRequest.get_realmlist_packet([])
+        self.realmlist_version = 0
         self.shutdown_flag = threading.Event()
+        self.srp_executor = SrpExecutor()
+        self.srp_ephemeral_pool = SrpEphemeralPool()
+        self.packet_capture = PacketCapture("login", LoginOpCode)
+        self.metrics_exporter = MetricsExporter("login")
+        self.admin_console = AdminConsole("login")
 
         self.locks = {attr: threading.Lock() for attr in ["realms_socket", "realms"]}
 
     def start(self):
         LOG.info("Starting login server")
         self._start_listen()
+        self._start_workers()
 
         simple_thread(self._accept_realms)
+        simple_thread(self._maintain_realms)
         self._accept_clients()
 
         self.shutdown_flag.set()
         self._stop_listen()
+        self._stop_workers()
         AccountSessionManager.delete_all_sessions()
         LOG.info("Login server stopped.")
 
@@ -67,6 +93,21 @@ class LoginServer:
         self._stop_listen_clients()
         self._stop_listen_realms()
 
+    def _start_workers(self):
+        self.srp_executor.start()
+        self.srp_ephemeral_pool.fill()
+        self.srp_ephemeral_pool.start()
+        self.packet_capture.start()
+        self.metrics_exporter.start()
+        self.admin_console.start()
+
+    def _stop_workers(self):
+        self.srp_executor.stop()
+        self.srp_ephemeral_pool.stop()
+        self.packet_capture.stop()
+        self.metrics_exporter.stop()
+        self.admin_console.stop()
+
     # ------------------------------
     # Clients connection
     # ------------------------------
@@ -96,7 +137,7 @@ class LoginServer:
     def _handle_client(self, connection, address):
         """Start another thread to securely handle the client connection."""
         address_string = str(address[0]) + ":" + str(address[1])
-        LOG.info("Accepting client connection from " + address_string)
+        LOG.info("Accepting client connection from %s", address_string)
         login_connection = LoginConnection(self, connection)
         simple_thread(login_connection.handle_connection)
 
@@ -104,12 +145,40 @@ class LoginServer:
         """Accept the account login in the active sessions table."""
         AccountSessionManager.add_session(account, session_key)
 
-    def get_realm_list(self):
-        """Return a copy of the realm states dict."""
-        self._maintain_realm_list()
+    def get_realmlist(self):
+        """Return the current realmlist response packet."""
+        return self.realmlist
+
+    def register_realm(self, realm_name, realm_state):
+        """Add or update the state of that realm."""
+        with self.locks["realms"]:
+            old_state = self.realms.get(realm_name)
+            if old_state is None:
+                LOG.info("Realm %s up.", realm_name)
+            self.realms[realm_name] = realm_state
+            if old_state is None or old_state["packet"] != realm_state["packet"]:
+                self._rebuild_realmlist()
+
+    def refresh_realm(self, realm_name, realm_link):
+        """Update the timestamp of that realm after a keepalive."""
         with self.locks["realms"]:
-            realm_list_copy = self.realms.copy()
-        return realm_list_copy
+            realm_state = self.realms.get(realm_name)
+            if realm_state is not None and realm_state["link"] is realm_link:
+                realm_state["last_update"] = time.time()
+
+    def unregister_realm(self, realm_name, realm_link):
+        """Remove that realm from the list when its link ends, unless it has
+        already been registered again through another link."""
+        with self.locks["realms"]:
+            realm_state = self.realms.get(realm_name)
+            if realm_state is not None and realm_state["link"] is realm_link:
+                del self.realms[realm_name]
+                LOG.info("Realm %s down, removed from list.", realm_name)
+                self._rebuild_realmlist()
+
+    def _maintain_realms(self):
+        while not self.shutdown_flag.wait(self.REALM_MAINTENANCE_INTERVAL):
+            self._maintain_realm_list()
 
     def _maintain_realm_list(self):
         """Maintain realmlist by removing realms not updated for a while."""
@@ -119,9 +188,17 @@ class LoginServer:
                 update_delay = time.time() - self.realms[realm]["last_update"]
                 if update_delay > self.REALM_MAX_UPDATE_TIME:
                     to_remove.append(realm)
-                    LOG.debug("Realm " + realm + " down, removed from list.")
+                    LOG.debug("Realm %s down, removed from list.", realm)
             for realm_to_remove in to_remove:
                 del self.realms[realm_to_remove]
+            if to_remove:
+                self._rebuild_realmlist()
+
+    def _rebuild_realmlist(self):
+        """Build the realmlist response; the realms lock must be held."""
+        realm_packets = [realm_state["packet"] for realm_state in self.realms.values()]
+        self.realmlist = RealmlistRequest.get_realmlist_packet(realm_packets)
+        self.realmlist_version += 1
 
     def _stop_listen_clients(self):
         self.clients_socket.close()
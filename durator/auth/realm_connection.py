@@ -1,12 +1,24 @@
-import io
+import socket
 import time
 
-from lib.utilities import read_cstring
+from durator.common.log import get_logger
+from durator.common.networking.packet_reader import PacketReader
+from durator.config import CONFIG
+
+LOG = get_logger("login")
 
 
 class RealmConnection:
-    """Handle the connection with a world server to update the local login
-    server realm state list."""
+    """Handle the realm link with a world server to update the local login
+    server realm state list.
+
+    The link stays open as long as the realm is up: each message is a uint8
+    size followed by a RealmInfo_S packet, or an empty keepalive. If nothing
+    is received for LINK_TIMEOUT seconds or the link is closed, the realm is
+    removed from the list.
+    """
+
+    LINK_TIMEOUT = float(CONFIG["login"].get("realm_link_timeout", "6"))
 
     def __init__(self, server, connection, address):
         self.server = server
@@ -14,46 +26,53 @@ class RealmConnection:
         self.address = address
 
         self.realm_name = ""
+        self.recv_buffer = b""
 
     def handle_connection(self):
-        data = self._get_whole_packet()
-        if data is None:
-            return
-
-        realm_info_packet = data[1:]
-        self._parse_realm_info_packet(realm_info_packet)
-        realm_state = self._get_realm_state(realm_info_packet)
-        self._register_realm_state(realm_state)
-
-        self.socket.close()
-
-    def _get_whole_packet(self):
-        data = self.socket.recv(1024)
-        if not data:
-            return None
-
-        packet_size = data[0]
-        while len(data[1:]) < packet_size:
-            try:
-                data_part = self.socket.recv(1024)
-                if not data_part:
-                    return None
-            except ConnectionError:
+        self.socket.settimeout(self.LINK_TIMEOUT)
+        try:
+            self._handle_messages()
+        except socket.timeout:
+            LOG.warning("Realm link of %s timed out.", self.realm_name or self.address)
+        except ConnectionError:
+            LOG.warning("Realm link of %s lost.", self.realm_name or self.address)
+        finally:
+            if self.realm_name:
+                self.server.unregister_realm(self.realm_name, self)
+            self.socket.close()
+
+    def _handle_messages(self):
+        while True:
+            message = self._recv_message()
+            if message is None:
+                LOG.debug("Realm link of %s closed.", self.realm_name or self.address)
+                return
+            if message:
+                self._parse_realm_info_packet(message)
+                realm_state = self._get_realm_state(message)
+                self.server.register_realm(self.realm_name, realm_state)
+            elif self.realm_name:
+                self.server.refresh_realm(self.realm_name, self)
+
+    def _recv_message(self):
+        """Return the next message content, or None if the link is closed."""
+        while not self.recv_buffer or len(self.recv_buffer) <= self.recv_buffer[0]:
+            data = self.socket.recv(1024)
+            if not data:
                 return None
-            data += data_part
+            self.recv_buffer += data
 
-        return data
+        message_end = 1 + self.recv_buffer[0]
+        message = self.recv_buffer[1:message_end]
+        self.recv_buffer = self.recv_buffer[message_end:]
+        return message
 
     def _parse_realm_info_packet(self, packet):
         """Parse that realm packet and grab the realm name."""
-        packet_io = io.BytesIO(packet)
-        packet_io.seek(5)  # skip some data, we only grab name for now
-        self.realm_name = read_cstring(packet_io).decode("ascii")
+        reader = PacketReader(packet)
+        reader.skip(5)  # skip some data, we only grab name for now
+        self.realm_name = reader.read_cstring("ascii")
 
     def _get_realm_state(self, packet):
-        realm_state = {"packet": packet, "last_update": time.time()}
+        realm_state = {"packet": packet, "last_update": time.time(), "link": self}
         return realm_state
-
-    def _register_realm_state(self, realm_state):
-        with self.server.locks["realms"]:
-            self.server.realms[self.realm_name] = realm_state
@@ -4,7 +4,11 @@ from durator.auth.constants import LoginOpCode
 
 
 class RealmlistRequest:
-    """Handle a realm list request (opcode 0x10)."""
+    """Handle a realm list request (opcode 0x10).
+
+    The response is prebuilt by the login server every time the realm list
+    changes, see get_realmlist_packet.
+    """
 
     MIN_RESPONSE_SIZE = 7
 
@@ -17,20 +21,15 @@ class RealmlistRequest:
         self.packet = packet
 
     def process(self):
-        realm_list = self.conn.server.get_realm_list()
-        realminfos = self._get_realminfo_packets(realm_list)
-        response = self._get_realmlist_packet(realminfos, len(realm_list))
-        return None, response
-
-    def _get_realminfo_packets(self, realm_list):
-        packets = [None] * len(realm_list)
-        for index, realm_name in enumerate(realm_list):
-            realminfo = realm_list[realm_name]["packet"]
-            packets[index] = realminfo
-        return b"".join(packets)
-
-    def _get_realmlist_packet(self, realminfos, num_realms):
-        full_packet_size = self.MIN_RESPONSE_SIZE + len(realminfos)
-        header = self.RESPONSE_HEADER_BIN.pack(LoginOpCode.REALMLIST.value, full_packet_size, 0, num_realms)  # unknown
-        footer = self.RESPONSE_FOOTER_BIN.pack(0)  # unknown
+        return None, self.conn.server.get_realmlist()
+
+    @staticmethod
+    def get_realmlist_packet(realm_packets):
+        """Return a realmlist response with those RealmInfo_S packets."""
+        realminfos = b"".join(realm_packets)
+        full_packet_size = RealmlistRequest.MIN_RESPONSE_SIZE + len(realminfos)
+        header = RealmlistRequest.RESPONSE_HEADER_BIN.pack(
+            LoginOpCode.REALMLIST.value, full_packet_size, 0, len(realm_packets)  # unknown
+        )
+        footer = RealmlistRequest.RESPONSE_FOOTER_BIN.pack(0)  # unknown
         return header + realminfos + footer
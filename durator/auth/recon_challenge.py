@@ -4,9 +4,12 @@ from struct import Struct
 from durator.auth.constants import LoginOpCode, LoginResult
 from durator.auth.login_connection_state import LoginConnectionState
 from durator.common.account.managers import AccountSessionManager
-from durator.common.log import LOG
+from durator.common.log import get_logger
+from durator.common.networking.packet_reader import PacketReader
 from durator.db.database import db_connection
 
+LOG = get_logger("login")
+
 
 class ReconChallenge:
     """Handle a client's reconnection challenge request (opcode 0x2)."""
@@ -30,26 +33,21 @@ class ReconChallenge:
         return self._process_reconnection()
 
     def _parse_packet(self, packet):
-        self._parse_packet_header(packet)
-        self._parse_packet_content(packet)
+        reader = PacketReader(packet)
+        self._parse_packet_header(reader)
+        self._parse_packet_content(reader)
 
-    def _parse_packet_header(self, packet):
-        end_offset = self.HEADER_BIN.size
-        header = packet[0:end_offset]
-        header_data = self.HEADER_BIN.unpack(header)
+    def _parse_packet_header(self, reader):
+        header_data = reader.read_struct(self.HEADER_BIN)
         self.unk_code = header_data[0]
         self.size = header_data[1]
 
-    def _parse_packet_content(self, packet):
-        offset = self.HEADER_BIN.size
-        end_offset = offset + self.CONTENT_BIN.size
-        content = packet[offset:end_offset]
-        content_data = self.CONTENT_BIN.unpack(content)
+    def _parse_packet_content(self, reader):
+        content_data = reader.read_struct(self.CONTENT_BIN)
 
         self.account_name_size = content_data[13]
 
-        account_name = packet[end_offset : end_offset + self.account_name_size]
-        self.account_name = account_name.decode("ascii")
+        self.account_name = reader.read_bytes(self.account_name_size).decode("ascii")
 
     def _process_reconnection(self):
         session = AccountSessionManager.get_session(self.account_name)
@@ -4,7 +4,9 @@ from durator.auth.constants import LoginOpCode, LoginResult
 from durator.auth.login_connection_state import LoginConnectionState
 from durator.common.account.managers import AccountSessionManager
 from durator.common.crypto.sha1 import sha1
-from durator.common.log import LOG
+from durator.common.log import get_logger
+
+LOG = get_logger("login")
 
 
 class ReconProof:
@@ -2,10 +2,15 @@
 
 Details on SRP are available here: https://www.ietf.org/rfc/rfc2945.txt
 WoW use it with fixed modulus and generator values.
+
+The big integer math is done by pure static functions, so it can be run in
+another process with an SrpExecutor (see the submit_* methods).
 """
 
 import os
+from concurrent.futures import Future
 
+from durator.auth import login_crypto
 from durator.common.crypto.sha1 import sha1, sha1_interleave
 
 
@@ -14,42 +19,93 @@ class Srp:
 
     Attributes:
         priv_ephemeral: big private integer
+        public_ephemeral: g^priv_ephemeral mod N if precomputed, else 0
         server_ephemeral: big public integer
         session_key: 40 bytes computed secretly by client and server
         client_proof: 20 bytes proof computed, should match client's proof
         server_proof: 20 bytes proof hash
     """
 
-    MODULUS = 0x894B645E89E1535BBDAD5B8B290650530801B18EBFBF5E8FAB3C82872A3E9BB7
-    GENERATOR = 7
-    MULTIPLIER = 3
-
-    def __init__(self):
-        self.priv_ephemeral = 0
-        self._generate_priv_ephemeral()
+    MODULUS = login_crypto.MODULUS
+    GENERATOR = login_crypto.GENERATOR
+    MULTIPLIER = login_crypto.MULTIPLIER
+    PRIV_EPHEMERAL_SIZE = 19
+
+    def __init__(self, ephemeral=None):
+        """Use the (priv_ephemeral, public_ephemeral) pair if provided, e.g.
+        from an SrpEphemeralPool, else generate a private ephemeral."""
+        if ephemeral is not None:
+            self.priv_ephemeral, self.public_ephemeral = ephemeral
+        else:
+            self.priv_ephemeral = 0
+            self._generate_priv_ephemeral()
+            self.public_ephemeral = 0
         self.server_ephemeral = 0
         self.session_key = b""
         self.client_proof = b""
         self.server_proof = b""
 
     def _generate_priv_ephemeral(self):
-        random_19_bytes = os.urandom(19)
-        big_random_int = int.from_bytes(random_19_bytes, "little")
-        priv_ephemeral = big_random_int % Srp.MODULUS
-        self.priv_ephemeral = priv_ephemeral
+        self.priv_ephemeral = Srp.generate_priv_ephemerals(1)[0]
+
+    @staticmethod
+    def generate_priv_ephemerals(num_ephemerals):
+        """Return a list of random private ephemerals."""
+        size = Srp.PRIV_EPHEMERAL_SIZE
+        random_bytes = os.urandom(size * num_ephemerals)
+        return [
+            int.from_bytes(random_bytes[offset : offset + size], "little") % Srp.MODULUS
+            for offset in range(0, len(random_bytes), size)
+        ]
 
     def generate_server_ephemeral(self, verifier):
-        big_integer = pow(Srp.GENERATOR, self.priv_ephemeral, Srp.MODULUS)
-        ephemeral = (Srp.MULTIPLIER * verifier + big_integer) % Srp.MODULUS
-        self.server_ephemeral = ephemeral
+        if self.public_ephemeral:
+            self.server_ephemeral = Srp._add_verifier(self.public_ephemeral, verifier)
+        else:
+            self.server_ephemeral = Srp.compute_server_ephemeral(self.priv_ephemeral, verifier)
+
+    def submit_server_ephemeral(self, executor, verifier):
+        """Compute the server ephemeral with that SrpExecutor. Return a Future
+        which is done once server_ephemeral is set. If the public ephemeral is
+        precomputed, it is done immediately without using the executor."""
+        if self.public_ephemeral:
+            self.generate_server_ephemeral(verifier)
+            future = Future()
+            future.set_result(self.server_ephemeral)
+            return future
+
+        def set_server_ephemeral(server_ephemeral):
+            self.server_ephemeral = server_ephemeral
+
+        return executor.submit(
+            Srp.compute_server_ephemeral, self.priv_ephemeral, verifier, on_result=set_server_ephemeral
+        )
+
+    @staticmethod
+    def compute_server_ephemeral(priv_ephemeral, verifier):
+        return Srp._add_verifier(Srp.compute_public_ephemeral(priv_ephemeral), verifier)
+
+    @staticmethod
+    def compute_public_ephemeral(priv_ephemeral):
+        """Return g^b mod N, the account-independent part of the server
+        ephemeral."""
+        return pow(Srp.GENERATOR, priv_ephemeral, Srp.MODULUS)
+
+    @staticmethod
+    def _add_verifier(public_ephemeral, verifier):
+        return (Srp.MULTIPLIER * verifier + public_ephemeral) % Srp.MODULUS
 
     def generate_session_key(self, client_eph, verifier):
         assert self.server_ephemeral
-        scramble = Srp._scramble_a_b(client_eph, self.server_ephemeral)
+        self.session_key = Srp.compute_session_key(self.priv_ephemeral, self.server_ephemeral, client_eph, verifier)
+
+    @staticmethod
+    def compute_session_key(priv_ephemeral, server_ephemeral, client_eph, verifier):
+        scramble = Srp._scramble_a_b(client_eph, server_ephemeral)
         pow_verifier = pow(verifier, scramble, Srp.MODULUS)
         pow_verifier *= client_eph
-        to_interleave = pow(pow_verifier, self.priv_ephemeral, Srp.MODULUS)
-        self.session_key = sha1_interleave(to_interleave)
+        to_interleave = pow(pow_verifier, priv_ephemeral, Srp.MODULUS)
+        return sha1_interleave(to_interleave)
 
     @staticmethod
     def _scramble_a_b(big_int_a, big_int_b):
@@ -62,28 +118,66 @@ class Srp:
     def generate_client_proof(self, client_ephemeral, account):
         assert self.server_ephemeral
         assert self.session_key
-        modulus_bytes = int.to_bytes(Srp.MODULUS, 32, "little").rstrip(b"\x00")
-        modulus_hash = sha1(modulus_bytes)
-        gen_bytes = int.to_bytes(Srp.GENERATOR, 32, "little").rstrip(b"\x00")
-        gen_hash = sha1(gen_bytes)
-        xor_hash = b""
-        for m_byte, g_byte in zip(modulus_hash, gen_hash):
-            xor_hash += int.to_bytes(m_byte ^ g_byte, 1, "little")
+        self.client_proof = Srp.compute_client_proof(
+            self.server_ephemeral, client_ephemeral, self.session_key, account.name, account.srp_salt_as_bytes
+        )
 
+    @staticmethod
+    def compute_client_proof(server_ephemeral, client_ephemeral, session_key, account_name, salt):
         client_eph = int.to_bytes(client_ephemeral, 32, "little")
-        server_eph = int.to_bytes(self.server_ephemeral, 32, "little")
-
-        to_hash = (
-            xor_hash + sha1(account.name.encode("ascii")) + account.srp_salt_as_bytes + client_eph + server_eph + self.session_key
+        server_eph = int.to_bytes(server_ephemeral, 32, "little")
+
+        to_hash = b"".join(
+            (
+                login_crypto.MODULUS_GENERATOR_HASH_XOR,
+                login_crypto.get_account_name_hash(account_name),
+                salt,
+                client_eph,
+                server_eph,
+                session_key,
+            )
         )
-        self.client_proof = sha1(to_hash)
+        return sha1(to_hash)
 
     def generate_server_proof(self, client_ephemeral):
         assert self.session_key
         assert self.client_proof
+        self.server_proof = Srp.compute_server_proof(client_ephemeral, self.client_proof, self.session_key)
+
+    @staticmethod
+    def compute_server_proof(client_ephemeral, client_proof, session_key):
         client_eph = int.to_bytes(client_ephemeral, 32, "little")
-        to_hash = client_eph + self.client_proof + self.session_key
-        self.server_proof = sha1(to_hash)
+        to_hash = client_eph + client_proof + session_key
+        return sha1(to_hash)
+
+    def submit_proofs(self, executor, client_ephemeral, account):
+        """Compute the session key, the client proof and the server proof with
+        that SrpExecutor, in a single job. Return a Future which is done once
+        these three attributes are set. The server proof should be sent only if
+        the client proof matches the one sent by the client."""
+        assert self.server_ephemeral
+
+        def set_proofs(proofs):
+            self.session_key, self.client_proof, self.server_proof = proofs
+
+        return executor.submit(
+            Srp.compute_proofs,
+            self.priv_ephemeral,
+            self.server_ephemeral,
+            client_ephemeral,
+            account.srp_verifier_as_int,
+            account.name,
+            account.srp_salt_as_bytes,
+            on_result=set_proofs,
+        )
+
+    @staticmethod
+    def compute_proofs(priv_ephemeral, server_ephemeral, client_ephemeral, verifier, account_name, salt):
+        """Return the session key, client proof and server proof."""
+        session_key = Srp.compute_session_key(priv_ephemeral, server_ephemeral, client_ephemeral, verifier)
+        client_proof = Srp.compute_client_proof(server_ephemeral, client_ephemeral, session_key, account_name, salt)
+        server_proof = Srp.compute_server_proof(client_ephemeral, client_proof, session_key)
+        return session_key, client_proof, server_proof
 
     @staticmethod
     def generate_account_srp_data(account, password):
@@ -0,0 +1,182 @@
+""" Pool of precomputed SRP server ephemerals.
+
+The server public ephemeral is 3v + g^b mod N, where only the verifier v
+depends on the account: the private ephemeral b and g^b can be computed ahead
+of time. The SrpEphemeralPool keeps a stock of (b, g^b) pairs filled by a
+background thread, so that answering a login challenge only costs a
+multiplication and an addition.
+"""
+
+import collections
+import threading
+import time
+
+from durator.auth.srp import Srp
+from durator.common.log import get_logger
+from durator.config import CONFIG
+
+LOG = get_logger("login")
+
+
+class FixedBasePow:
+    """Fixed-base windowed exponentiation: pow(base, exponent, modulus) with
+    a table of base^(digit * 2^(window * index)) precomputed for each window of
+    the exponent, so an exponentiation is only one modular multiplication per
+    window. Exponents must be less than 2^max_exponent_bits."""
+
+    def __init__(self, base, modulus, window_bits, max_exponent_bits):
+        self.modulus = modulus
+        self.window_bits = window_bits
+        self.mask = (1 << window_bits) - 1
+        self.table = []
+        num_windows = (max_exponent_bits + window_bits - 1) // window_bits
+        window_base = base
+        for _ in range(num_windows):
+            row = [1]
+            for _ in range(self.mask):
+                row.append(row[-1] * window_base % modulus)
+            self.table.append(row)
+            window_base = pow(window_base, 1 << window_bits, modulus)
+
+    def pow(self, exponent):
+        modulus = self.modulus
+        result = 1
+        for row in self.table:
+            digit = exponent & self.mask
+            if digit:
+                result = result * row[digit] % modulus
+            exponent >>= self.window_bits
+        return result
+
+
+class SrpEphemeralPool:
+    """Stock of (private ephemeral, g^b mod N) pairs, refilled in a background
+    thread when it goes below the low-water mark.
+
+    When the pool is empty, get returns None and the caller computes the
+    ephemeral itself (see Srp.__init__), so logins are never blocked by the
+    pool. A pool size of 0 disables it.
+
+    Attributes:
+    - size: maximum number of pairs in stock
+    - low_water: the refill thread starts working below this depth
+    - generator_pow: function computing g^b mod N, windowed if configured
+    - pairs: deque of precomputed pairs
+    - condition: wakes up the refill thread
+    - num_hits, num_misses: pairs taken from the pool or not, because it was dry
+    - num_generated, refill_time: pairs computed and total time spent on it
+    """
+
+    SIZE = int(CONFIG["login"].get("srp_ephemeral_pool_size", "256"))
+    WINDOW_BITS = int(CONFIG["login"].get("srp_fixed_base_window", "6"))
+
+    REFILL_BATCH_SIZE = 16
+
+    def __init__(self, size=None, window_bits=None):
+        self.size = self.SIZE if size is None else size
+        self.low_water = self.size // 2
+        window_bits = self.WINDOW_BITS if window_bits is None else window_bits
+        if window_bits > 0:
+            max_bits = Srp.PRIV_EPHEMERAL_SIZE * 8
+            fixed_base = FixedBasePow(Srp.GENERATOR, Srp.MODULUS, window_bits, max_bits)
+            self.generator_pow = fixed_base.pow
+        else:
+            self.generator_pow = Srp.compute_public_ephemeral
+
+        self.pairs = collections.deque()
+        self.condition = threading.Condition()
+        self.refill_thread = None
+        self.shutdown_flag = False
+        self.dry = False
+
+        self.num_hits = 0
+        self.num_misses = 0
+        self.num_generated = 0
+        self.refill_time = 0.0
+
+    def start(self):
+        """Start the refill thread, which fills the pool in the background."""
+        if self.size <= 0 or self.refill_thread is not None:
+            return
+        self.shutdown_flag = False
+        self.refill_thread = threading.Thread(target=self._refill_loop, name="srp-ephemeral-pool")
+        self.refill_thread.daemon = True
+        self.refill_thread.start()
+
+    def stop(self):
+        if self.refill_thread is None:
+            return
+        with self.condition:
+            self.shutdown_flag = True
+            self.condition.notify()
+        self.refill_thread.join()
+        self.refill_thread = None
+        LOG.debug("[srp] Ephemeral pool stopped: %s", self.get_stats())
+
+    def get(self):
+        """Return a (private ephemeral, g^b mod N) pair, or None if the pool
+        is empty or disabled."""
+        if self.size <= 0:
+            return None
+        with self.condition:
+            if self.pairs:
+                pair = self.pairs.popleft()
+                self.num_hits += 1
+            else:
+                pair = None
+                self.num_misses += 1
+                if not self.dry:
+                    LOG.warning("[srp] Ephemeral pool is dry, computing ephemerals on demand.")
+                    self.dry = True
+            if len(self.pairs) < self.low_water:
+                self.condition.notify()
+        return pair
+
+    def fill(self, num_pairs=None):
+        """Compute pairs in the calling thread until the pool is full or
+        num_pairs have been added."""
+        num_to_add = self.size - len(self.pairs)
+        if num_pairs is not None:
+            num_to_add = min(num_to_add, num_pairs)
+        if num_to_add <= 0:
+            return
+
+        start_time = time.perf_counter()
+        new_pairs = []
+        for priv_ephemeral in Srp.generate_priv_ephemerals(num_to_add):
+            new_pairs.append((priv_ephemeral, self.generator_pow(priv_ephemeral)))
+        elapsed = time.perf_counter() - start_time
+
+        with self.condition:
+            self.pairs.extend(new_pairs)
+            self.num_generated += len(new_pairs)
+            self.refill_time += elapsed
+            self.dry = False
+
+    def _refill_loop(self):
+        while True:
+            with self.condition:
+                while not self.shutdown_flag and len(self.pairs) >= self.low_water:
+                    self.condition.wait()
+                if self.shutdown_flag:
+                    break
+            # Compute by small batches to let logins take pairs meanwhile.
+            while not self.shutdown_flag and len(self.pairs) < self.size:
+                self.fill(self.REFILL_BATCH_SIZE)
+
+    def get_depth(self):
+        return len(self.pairs)
+
+    def get_stats(self):
+        """Return a dict with the pool depth, the hit and miss counters and
+        the refill rate in pairs per second."""
+        with self.condition:
+            refill_rate = self.num_generated / self.refill_time if self.refill_time else 0.0
+            return {
+                "depth": len(self.pairs),
+                "size": self.size,
+                "hits": self.num_hits,
+                "misses": self.num_misses,
+                "generated": self.num_generated,
+                "refill_rate": refill_rate,
+            }
@@ -0,0 +1,94 @@
+""" Run the SRP big integer math in worker processes.
+
+The modular exponentiations of SRP hold the GIL, so with the threaded login
+server all handshakes share a single core. The SrpExecutor sends them to a
+process pool instead; the connection threads only wait for the result, which
+releases the GIL. Each job costs some inter-process communication, so a login
+step is done in a single job (see Srp.submit_*).
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from durator.common.log import get_logger
+from durator.config import CONFIG
+
+LOG = get_logger("login")
+
+
+def _get_configured_num_processes():
+    value = CONFIG["login"].get("srp_processes", "0")
+    if value == "auto":
+        return os.cpu_count() or 1
+    return int(value)
+
+
+class SrpExecutor:
+    """Run SRP jobs in a process pool, or in the calling thread if the number
+    of processes is 0.
+
+    The pool is started lazily on the first job, so that creating an
+    SrpExecutor is cheap, e.g. in tools not using it.
+    """
+
+    NUM_PROCESSES = _get_configured_num_processes()
+
+    def __init__(self, num_processes=None):
+        self.num_processes = self.NUM_PROCESSES if num_processes is None else num_processes
+        self.pool = None
+        self.pool_lock = threading.Lock()
+
+    def start(self):
+        with self.pool_lock:
+            if self.num_processes > 0 and self.pool is None:
+                LOG.debug("Starting SRP process pool with %d processes.", self.num_processes)
+                self.pool = ProcessPoolExecutor(max_workers=self.num_processes)
+
+    def stop(self):
+        with self.pool_lock:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+
+    def submit(self, func, *args, on_result=None):
+        """Run func(*args) and return a Future of its result. The function
+        and its arguments must be picklable. If on_result is provided, it is
+        called with the result before the future is done, e.g. to store it."""
+        if self.num_processes <= 0:
+            return SrpExecutor._run_inline(func, args, on_result)
+
+        if self.pool is None:
+            self.start()
+        pool_future = self.pool.submit(func, *args)
+        if on_result is None:
+            return pool_future
+
+        future = Future()
+        future.set_running_or_notify_cancel()
+        pool_future.add_done_callback(lambda done_future: SrpExecutor._forward(done_future, future, on_result))
+        return future
+
+    @staticmethod
+    def _run_inline(func, args, on_result):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            result = func(*args)
+            if on_result is not None:
+                on_result(result)
+        except Exception as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+        return future
+
+    @staticmethod
+    def _forward(pool_future, future, on_result):
+        try:
+            result = pool_future.result()
+            on_result(result)
+        except Exception as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
@@ -1,8 +1,7 @@
 import binascii
-import zlib
 from enum import Enum
 
-from peewee import CharField, ForeignKeyField, IntegerField, Model, TextField
+from peewee import BlobField, CharField, ForeignKeyField, IntegerField, Model
 
 from durator.common.account.account import Account
 from durator.db.database import DB
@@ -28,27 +27,25 @@ NUM_ACCOUNT_DATA_TYPES = len(AccountDataType)
 
 
 class AccountData(Model):
+    """Account data blob of some type, uploaded by the client.
+
+    Attributes:
+        account: owner account
+        data_type: AccountDataType value
+        decompressed_size: size of the data once decompressed
+        zlib_content: zlib-compressed data, as sent and expected by clients
+        md5: MD5 of the decompressed data, stored as hex
+    """
 
     account = ForeignKeyField(Account)
     data_type = IntegerField()
     decompressed_size = IntegerField()
-    content = TextField()
+    zlib_content = BlobField()
     md5 = CharField(max_length=16 * 2)
 
     class Meta:
         database = DB
 
-    @property
-    def content_as_zlib_data(self):
-        return zlib.compress(self.content.encode("utf8"))
-
-    @content_as_zlib_data.setter
-    def content_as_zlib_data(self, value_bytes):
-        try:
-            self.content = zlib.decompress(value_bytes).decode("utf8")
-        except zlib.error:
-            self.content = ""
-
     @property
     def md5_as_bytes(self):
         return binascii.a2b_hex(self.md5.encode("ascii"))
@@ -1,11 +1,16 @@
+import threading
+import zlib
+
 from durator.auth.srp import Srp
 from durator.common.account.account import ACCOUNT_NAME_RE, Account, AccountStatus
 from durator.common.account.account_data import AccountData, AccountDataType
 from durator.common.account.account_session import AccountSession
 from durator.common.crypto.md5 import md5
-from durator.common.log import LOG
+from durator.common.log import get_logger
 from durator.db.database import db_connection
 
+LOG = get_logger("db")
+
 
 class AccountManager:
     """Collection of functions to manage the accounts in the database."""
@@ -41,46 +46,131 @@ class AccountManager:
         try:
             return Account.get(Account.name == account_name)
         except Account.DoesNotExist:
-            LOG.warning("No account with that name: " + account_name)
+            LOG.warning("No account with that name: %s", account_name)
             return None
 
 
+class _AccountDataCache:
+    """In-memory cache of AccountData lists (ordered by type), mapped by
+    account ID. Connection threads read the cached AccountData objects without
+    lock, so they are never modified: AccountDataManager.set_account_data
+    replaces them with new objects."""
+
+    def __init__(self):
+        self.account_data = {}
+        self.lock = threading.Lock()
+
+    def get(self, account):
+        """Return the cached AccountData list, or None if not cached."""
+        with self.lock:
+            return self.account_data.get(account.id)
+
+    def add(self, account, account_data_list):
+        with self.lock:
+            self.account_data[account.id] = account_data_list
+
+    def replace(self, account, account_data):
+        """Swap in that AccountData in place of the one of the same type, if
+        the account is cached. The list is copied, so that lists already
+        returned by get do not change."""
+        with self.lock:
+            account_data_list = self.account_data.get(account.id)
+            if account_data_list is not None:
+                account_data_list = list(account_data_list)
+                account_data_list[account_data.data_type] = account_data
+                self.account_data[account.id] = account_data_list
+
+    def remove(self, account):
+        with self.lock:
+            self.account_data.pop(account.id, None)
+
+
+_ACCOUNT_DATA_CACHE = _AccountDataCache()
+
+
 class AccountDataManager:
+    """Collection of functions to manage the account data.
+
+    The account data is kept as the zlib data sent by the client, so it can be
+    sent back without recompressing it. Once an account data has been loaded,
+    e.g. when a player enters the world, it stays cached in memory until
+    forget_account_data is called, so reading MD5s or data costs no query.
+    """
+
     @staticmethod
     @db_connection
     def create_account_data(account):
         for data_type in AccountDataType:
-            AccountData.create(account=account, data_type=data_type.value, decompressed_size=0, content="", md5="00" * 16)
+            AccountData.create(
+                account=account, data_type=data_type.value, decompressed_size=0, zlib_content=b"", md5="00" * 16
+            )
 
     @staticmethod
-    @db_connection
     def get_account_data(account, data_type):
-        """Return the AccountData for that account and data_type."""
-        return AccountData.get(AccountData.account == account, AccountData.data_type == data_type.value)
+        """Return the AccountData for that account and data_type, loading
+        all the account data of that account in cache if necessary."""
+        return AccountDataManager._get_all_account_data(account)[data_type.value]
+
+    @staticmethod
+    def get_cached_account_data(account, data_type):
+        """Return the AccountData for that account and data_type if it is
+        cached, else None. This never accesses the database."""
+        account_data_list = _ACCOUNT_DATA_CACHE.get(account)
+        if account_data_list is None:
+            return None
+        return account_data_list[data_type.value]
 
     @staticmethod
-    @db_connection
     def get_account_data_md5(account):
         """Return an ordered list of account data MD5s."""
-        account_data_md5s = (
-            AccountData.select(AccountData.md5).where(AccountData.account == account).order_by(AccountData.data_type)
-        )
-        md5s = [ad.md5_as_bytes for ad in account_data_md5s]
-        return md5s
+        account_data_list = AccountDataManager._get_all_account_data(account)
+        return [account_data.md5_as_bytes for account_data in account_data_list]
 
     @staticmethod
-    @db_connection
-    def set_account_data(account, data_type, compressed_data):
-        """Update values for that account and data_type with this data."""
-        account_data = AccountDataManager.get_account_data(account, data_type)
+    def _get_all_account_data(account):
+        account_data_list = _ACCOUNT_DATA_CACHE.get(account)
+        if account_data_list is None:
+            account_data_list = AccountDataManager._load_all_account_data(account)
+            _ACCOUNT_DATA_CACHE.add(account, account_data_list)
+        return account_data_list
 
-        account_data.content_as_zlib_data = compressed_data
-        account_data.decompressed_size = len(account_data.content)
+    @staticmethod
+    @db_connection
+    def _load_all_account_data(account):
+        query = AccountData.select().where(AccountData.account == account).order_by(AccountData.data_type)
+        return list(query)
 
-        content_bytes = account_data.content.encode("utf8", errors="replace")
-        account_data.md5_as_bytes = md5(content_bytes)
+    @staticmethod
+    @db_connection
+    def set_account_data(account, data_type, compressed_data):
+        """Update values for that account and data_type with this data. The
+        cache is updated as well if this account data is cached, but it is not
+        loaded otherwise."""
+        old_account_data = AccountDataManager.get_cached_account_data(account, data_type)
+        if old_account_data is None:
+            old_account_data = AccountData.get(AccountData.account == account, AccountData.data_type == data_type.value)
 
+        try:
+            content = zlib.decompress(compressed_data)
+        except zlib.error:
+            compressed_data, content = b"", b""
+
+        # Saved with the same ID, so this updates the row.
+        account_data = AccountData(
+            id=old_account_data.id,
+            account=account,
+            data_type=data_type.value,
+            decompressed_size=len(content),
+            zlib_content=compressed_data,
+        )
+        account_data.md5_as_bytes = md5(content)
         account_data.save()
+        _ACCOUNT_DATA_CACHE.replace(account, account_data)
+
+    @staticmethod
+    def forget_account_data(account):
+        """Remove the account data of that account from the cache."""
+        _ACCOUNT_DATA_CACHE.remove(account)
 
 
 class AccountSessionManager:
@@ -0,0 +1,239 @@
+""" Admin console of a running server, on a local TCP port.
+
+Like the DatabaseClient shell, it reads commands line by line, but from TCP
+clients, e.g. "nc 127.0.0.1 9112" for the world server. Each client has a
+thread of its own, so commands waiting for a profile to end do not disturb
+the server. Type "help" for the list of commands.
+"""
+
+import io
+import os
+import socketserver
+import threading
+import time
+
+from durator.common.log import get_logger
+from durator.common.metrics import METRICS
+from durator.common.networking.connection_automaton import HANDLER_SECONDS
+from durator.common.profiling import (
+    HANDLER_PROFILER,
+    StackSampler,
+    get_output_path,
+    get_thread_dump,
+    write_collapsed_stacks,
+)
+from durator.config import CONFIG, ROOT_DIR
+
+LOG = get_logger("net")
+
+
+class _ConsoleRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        console = self.server.console
+        LOG.info("Admin console: client connected from %s:%d", *self.client_address[:2])
+        self._write(f"DuratorEmu {console.name} server admin console. Type help for a list of commands.\n")
+        while True:
+            self._write("> ")
+            line = self.rfile.readline()
+            if not line:
+                break
+            user_words = line.decode("utf8", errors="replace").split()
+            if not user_words:
+                continue
+            output = io.StringIO()
+            keep_open = console.run_command(user_words, output)
+            self._write(output.getvalue())
+            if not keep_open:
+                break
+
+    def _write(self, text):
+        self.wfile.write(text.encode("utf8"))
+
+
+class AdminConsole:
+    """TCP shell to inspect and profile a server without restarting it.
+
+    Commands write their output to a text file object given by the client
+    handler.
+
+    Attributes:
+    - name: server name, "world" or "login"
+    - enabled: whether the console is started
+    - address: (hostname, port) it listens on
+    - profile_dir: directory where profiles and sampled stacks are written
+    - sampler: StackSampler of the sample command
+    """
+
+    ENABLED = CONFIG["admin"].getboolean("enabled", False)
+    HOSTNAME = CONFIG["admin"].get("hostname", "127.0.0.1")
+    PROFILE_DIR = CONFIG["admin"].get("profile_dir", "profiles")
+    MAX_DURATION = 600
+
+    def __init__(self, name, enabled=None, port=None, profile_dir=None):
+        self.name = name
+        self.enabled = self.ENABLED if enabled is None else enabled
+        if port is None:
+            port = int(CONFIG["admin"].get(name + "_port", "0"))
+        self.address = (self.HOSTNAME, port)
+        self.profile_dir = os.path.join(ROOT_DIR, self.PROFILE_DIR if profile_dir is None else profile_dir)
+        self.sampler = StackSampler()
+        self.tcp_server = None
+        self.thread = None
+        self.shell_commands = {
+            "help": {"help": "print this help", "func": self._shell_print_commands},
+            "quit": {"help": "close this console", "func": None},
+            "profile": {
+                "help": "profile the handlers with cProfile: start, stop or SECONDS",
+                "func": self._profile,
+            },
+            "sample": {
+                "help": "sample the stacks of all threads: start, stop or SECONDS",
+                "func": self._sample,
+            },
+            "threads": {"help": "dump the stacks of all threads", "func": self._dump_threads},
+            "top": {"help": "list the N handlers with the most cumulative time", "func": self._top_handlers},
+            "metrics": {"help": "print a summary of the metrics", "func": self._print_metrics},
+        }
+
+    def start(self):
+        """Start listening for console clients, if enabled."""
+        if not self.enabled:
+            return
+        self.tcp_server = socketserver.ThreadingTCPServer(self.address, _ConsoleRequestHandler)
+        self.tcp_server.daemon_threads = True
+        self.tcp_server.console = self
+        self.address = self.tcp_server.server_address[:2]
+        self.thread = threading.Thread(target=self.tcp_server.serve_forever, name=f"{self.name}-admin", daemon=True)
+        self.thread.start()
+        LOG.info("Admin console of %s server listening on %s:%d", self.name, *self.address)
+
+    def stop(self):
+        """Stop listening and end the running profiles, writing them."""
+        if self.tcp_server is None:
+            return
+        self.tcp_server.shutdown()
+        self.tcp_server.server_close()
+        self.tcp_server = None
+        self.thread.join()
+        self.thread = None
+        output = io.StringIO()
+        if HANDLER_PROFILER.active:
+            self._stop_profile(output)
+        if self.sampler.active:
+            self._stop_sample(output)
+        if output.getvalue():
+            LOG.info("Admin console: %s", output.getvalue().strip())
+
+    def run_command(self, user_words, output):
+        """Run the command of these words, return False if the client quits."""
+        command_name = self._shell_find_command(user_words[0], output)
+        if command_name is None:
+            return True
+        func = self.shell_commands[command_name]["func"]
+        if func is None:
+            return False
+        try:
+            func(user_words[1:], output)
+        except Exception as exc:
+            LOG.error("Admin console: command %s failed: %s", command_name, exc)
+            output.write(f"Command failed: {exc}\n")
+        return True
+
+    def _shell_find_command(self, command_name, output):
+        if command_name not in self.shell_commands:
+            possible_alias = [cmd for cmd in self.shell_commands if cmd.startswith(command_name)]
+            if len(possible_alias) < 1:
+                output.write("Unknown command.\n")
+                return None
+            elif len(possible_alias) > 1:
+                output.write("Ambiguous alias: {}\n".format(", ".join(possible_alias)))
+                return None
+            else:
+                command_name = possible_alias[0]
+        return command_name
+
+    def _shell_print_commands(self, args, output):
+        output.write("Commands available:\n")
+        for command_name in sorted(self.shell_commands):
+            command = self.shell_commands[command_name]
+            output.write("        {:<16}{}\n".format(command_name, command["help"]))
+
+    def _run_session(self, args, output, start, stop, active):
+        """Handle the start, stop and SECONDS arguments of a profiling
+        command; for SECONDS, wait in the client thread before stopping."""
+        action = args[0] if args else ""
+        if action == "stop":
+            if not active():
+                output.write("Not running.\n")
+                return
+            stop(output)
+            return
+        if action == "start":
+            duration = None
+        else:
+            try:
+                duration = float(action)
+            except ValueError:
+                output.write("Expected start, stop or a number of seconds.\n")
+                return
+            if not 0 < duration <= self.MAX_DURATION:
+                output.write(f"Duration must be between 0 and {self.MAX_DURATION} seconds.\n")
+                return
+        if not start():
+            output.write("Already running.\n")
+            return
+        if duration is None:
+            output.write("Started, use stop to end it.\n")
+            return
+        time.sleep(duration)
+        if active():
+            stop(output)
+
+    def _profile(self, args, output):
+        self._run_session(
+            args, output, HANDLER_PROFILER.start, self._stop_profile, lambda: HANDLER_PROFILER.active
+        )
+
+    def _stop_profile(self, output):
+        stats = HANDLER_PROFILER.stop()
+        if stats is None:
+            return
+        path = get_output_path(self.profile_dir, self.name, "prof")
+        stats.dump_stats(path)
+        output.write(f"Profile written to {path}\n")
+        stats.stream = output
+        stats.sort_stats("cumulative").print_stats(20)
+
+    def _sample(self, args, output):
+        self._run_session(args, output, self.sampler.start, self._stop_sample, lambda: self.sampler.active)
+
+    def _stop_sample(self, output):
+        counts = self.sampler.stop()
+        if counts is None:
+            return
+        path = get_output_path(self.profile_dir, self.name, "folded")
+        with open(path, "w", encoding="utf8") as folded_file:
+            write_collapsed_stacks(counts, folded_file)
+        output.write(f"{self.sampler.num_samples} samples of {len(counts)} stacks written to {path}\n")
+
+    def _dump_threads(self, args, output):
+        output.write(get_thread_dump())
+
+    def _top_handlers(self, args, output):
+        """List the handlers by cumulative time since the server started,
+        from the handler latency metrics."""
+        num_handlers = int(args[0]) if args else 10
+        handlers = []
+        for (opcode_name,), histogram in HANDLER_SECONDS.get_items():
+            _, count, total = histogram.get_snapshot()
+            if count:
+                handlers.append((total, count, opcode_name))
+        handlers.sort(reverse=True)
+        output.write("{:<32}{:>10}{:>12}{:>12}{:>12}\n".format("opcode", "calls", "total (s)", "mean (ms)", "p99 (ms)"))
+        for total, count, opcode_name in handlers[:num_handlers]:
+            p99 = HANDLER_SECONDS.labels(opcode_name).get_quantile(0.99) * 1000
+            output.write(f"{opcode_name:<32}{count:>10}{total:>12.3f}{total / count * 1000:>12.3f}{p99:>12.3f}\n")
+
+    def _print_metrics(self, args, output):
+        for name, value in METRICS.get_summary().items():
+            output.write(f"{name}: {value}\n")
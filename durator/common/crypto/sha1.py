@@ -17,18 +17,7 @@ def sha1_interleave(big_int):
     if len(big_array) % 2 == 1:
         big_array = big_array[1:]
 
-    part1 = b""
-    part2 = b""
-    for i in range(len(big_array)):
-        if i % 2 == 0:
-            part1 += big_array[i : i + 1]
-        else:
-            part2 += big_array[i : i + 1]
-
-    hash1 = sha1(part1)
-    hash2 = sha1(part2)
-    interleaved = b""
-    for i in range(20):
-        interleaved += hash1[i : i + 1] + hash2[i : i + 1]
-
-    return interleaved
+    interleaved = bytearray(40)
+    interleaved[0::2] = sha1(big_array[0::2])
+    interleaved[1::2] = sha1(big_array[1::2])
+    return bytes(interleaved)
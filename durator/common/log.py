@@ -1,7 +1,153 @@
+""" Logging of the servers.
+
+Modules log with the logger of their subsystem (see get_logger), children of
+the "durator" logger, with lazy %-style formatting, e.g.:
+
+    LOG.debug("NameQuery: GUID %X", guid)
+
+so that nothing is formatted when the level is disabled. setup_logging, called
+once when a server starts, configures the levels from the log section, and
+sends the records through a queue to a listener thread that formats and
+writes them: connection threads only pay for an enqueue. Repeated messages,
+e.g. the same warning for each packet of a misbehaving client, are limited by
+a RepeatFilter before they are enqueued.
+"""
+
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+from enum import Enum
+
+from durator.config import CONFIG, ROOT_DIR
+
+LOG = logging.getLogger("durator")
+LOG.setLevel(logging.DEBUG)
+
+SUBSYSTEMS = ("login", "world", "chat", "net", "db")
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+
+def get_logger(subsystem):
+    """Return the logger of that subsystem, one of SUBSYSTEMS."""
+    return LOG.getChild(subsystem)
+
+
+# Arguments of these types can't change before the listener formats them.
+_IMMUTABLE_TYPES = frozenset((str, int, float, bool, bytes, type(None)))
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler leaving the formatting of records to the listener thread
+    when their arguments are immutable. Other records, or those with an
+    exception, are formatted right away as they could change before the
+    listener gets to them."""
+
+    def prepare(self, record):
+        if record.exc_info is None and _are_immutable(record.args):
+            return record
+        return super().prepare(record)
+
+
+def _are_immutable(args):
+    if not args:
+        return True
+    if type(args) is not tuple:
+        return False
+    return all(type(arg) in _IMMUTABLE_TYPES or isinstance(arg, Enum) for arg in args)
+
+
+class RepeatFilter(logging.Filter):
+    """Let through at most max_records records of each message, identified by
+    its logger and format string, per period seconds. The number of records
+    suppressed is added to the first record of that message let through
+    afterwards.
+
+    Attributes:
+    - windows: dict mapping (logger name, format string) to a list [window
+        start time, records let through, records suppressed]
+    - num_suppressed: total number of records suppressed
+    """
+
+    MAX_MESSAGES = 1024
+
+    def __init__(self, max_records, period):
+        super().__init__()
+        self.max_records = max_records
+        self.period = period
+        self.windows = {}
+        self.num_suppressed = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.msg)
+        now = record.created
+        with self.lock:
+            window = self.windows.get(key)
+            if window is not None and now - window[0] < self.period:
+                if window[1] >= self.max_records:
+                    window[2] += 1
+                    self.num_suppressed += 1
+                    return False
+                window[1] += 1
+                return True
+            if len(self.windows) >= self.MAX_MESSAGES:
+                self.windows.clear()
+            self.windows[key] = [now, 1, 0]
+            suppressed = window[2] if window is not None else 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+def _get_level(name):
+    level = logging.getLevelName(name.strip().upper())
+    if not isinstance(level, int):
+        raise ValueError("unknown log level: " + name)
+    return level
+
+
+def disable_unused_record_info():
+    """Stop filling the caller location and process information of records,
+    which LOG_FORMAT does not use and are costly to get for each record (see
+    the Optimization section of the logging HOWTO)."""
+    logging._srcfile = None
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+
+def setup_logging():
+    """Configure the levels and the queue pipeline from the log section, and
+    return the started QueueListener, which is stopped at exit."""
+    config = CONFIG["log"]
+    disable_unused_record_info()
+    LOG.setLevel(_get_level(config.get("level", "info")))
+    for subsystem in SUBSYSTEMS:
+        level = config.get("level_" + subsystem)
+        get_logger(subsystem).setLevel(_get_level(level) if level else logging.NOTSET)
 
-logger = logging.getLogger("durator")
+    handlers = [logging.StreamHandler()]
+    if config.get("log_file"):
+        handlers.append(logging.FileHandler(os.path.join(ROOT_DIR, config["log_file"]), encoding="utf8"))
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
 
-logger.setLevel(logging.DEBUG)
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    repeat_limit = int(config.get("repeat_limit", "20"))
+    if repeat_limit:
+        queue_handler.addFilter(RepeatFilter(repeat_limit, float(config.get("repeat_period", "10"))))
+    for handler in LOG.handlers[:]:
+        LOG.removeHandler(handler)
+    LOG.addHandler(queue_handler)
+    LOG.propagate = False
 
-LOG = logger
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
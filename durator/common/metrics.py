@@ -0,0 +1,426 @@
+""" Metrics of the servers, exported in the Prometheus text format.
+
+Metrics are families registered in the METRICS registry by the modules using
+them, e.g.:
+
+    PACKETS = METRICS.counter("durator_packets_total", "Packets handled.", ("direction", "opcode"))
+
+Hot paths get the child of their label values once with labels and keep it.
+Counting a packet or observing a latency then only appends the value to the
+pending deque of the child, which is atomic and takes no lock; pending values
+are folded into the totals under a lock when the metric is read, or by the
+observing thread once FOLD_SIZE values are pending.
+Values that already exist elsewhere, like the number of connections in each
+state, are exposed by callback gauges evaluated when the metrics are collected.
+A MetricsExporter started by each server serves the registry on a local HTTP
+port and logs a summary of it periodically.
+"""
+
+import bisect
+import collections
+import math
+import threading
+from abc import ABCMeta, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from durator.common.log import get_logger
+from durator.config import CONFIG
+
+LOG = get_logger("net")
+
+# Upper bounds (seconds) of the default latency histogram buckets.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Number of pending values of a child folded at once by observing threads.
+FOLD_SIZE = 256
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_labels(labelnames, values, extra=""):
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class CounterChild:
+    """Counter of one set of label values.
+
+    Attributes:
+    - pending: deque of the increments not folded yet
+    - total: sum of the folded increments
+    """
+
+    __slots__ = ("lock", "pending", "total")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = collections.deque()
+        self.total = 0
+
+    def inc(self, amount=1):
+        pending = self.pending
+        pending.append(amount)
+        if len(pending) >= FOLD_SIZE:
+            self._fold()
+
+    def _fold(self):
+        with self.lock:
+            pending = self.pending
+            total = self.total
+            while True:
+                try:
+                    total += pending.popleft()
+                except IndexError:
+                    break
+            self.total = total
+
+    @property
+    def value(self):
+        self._fold()
+        return self.total
+
+
+class HistogramChild:
+    """Histogram of one set of label values.
+
+    Attributes:
+    - upper_bounds: sorted bucket upper bounds, the last bucket being +Inf
+    - pending: deque of the observations not folded yet
+    - bucket_counts: number of folded observations in each bucket, not
+        cumulative
+    - count, sum: number and sum of the folded observations
+    """
+
+    __slots__ = ("lock", "upper_bounds", "pending", "bucket_counts", "count", "sum")
+
+    def __init__(self, upper_bounds):
+        self.lock = threading.Lock()
+        self.upper_bounds = upper_bounds
+        self.pending = collections.deque()
+        self.bucket_counts = [0] * (len(upper_bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        pending = self.pending
+        pending.append(value)
+        if len(pending) >= FOLD_SIZE:
+            self._fold()
+
+    def _fold(self):
+        with self.lock:
+            pending = self.pending
+            upper_bounds = self.upper_bounds
+            bucket_counts = self.bucket_counts
+            while True:
+                try:
+                    value = pending.popleft()
+                except IndexError:
+                    break
+                bucket_counts[bisect.bisect_left(upper_bounds, value)] += 1
+                self.count += 1
+                self.sum += value
+
+    def get_snapshot(self):
+        """Return a consistent (bucket_counts, count, sum) tuple."""
+        self._fold()
+        with self.lock:
+            return list(self.bucket_counts), self.count, self.sum
+
+    def get_quantile(self, quantile):
+        """Return an estimate of that quantile (0 to 1): the upper bound of
+        the bucket holding it, or None if there are no observations."""
+        bucket_counts, count, _ = self.get_snapshot()
+        if not count:
+            return None
+        rank = quantile * count
+        cumulative = 0
+        for upper_bound, bucket_count in zip(self.upper_bounds, bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return upper_bound
+        return math.inf
+
+
+class _MetricFamily(metaclass=ABCMeta):
+    """Base class of the metrics, holding one child per set of label values."""
+
+    TYPE = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+
+    def labels(self, *values):
+        """Return the child of these label values, created on first use.
+        Values are strings, in the order of labelnames."""
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self.lock:
+                child = self.children.get(values)
+                if child is None:
+                    child = self.children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """Return a new child, for a new set of label values."""
+        pass
+
+    def get_items(self):
+        """Return a list of (label values, child) pairs."""
+        with self.lock:
+            return list(self.children.items())
+
+    def collect(self):
+        """Return the exposition lines of this metric."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        lines.extend(self._collect_samples())
+        return lines
+
+    @abstractmethod
+    def _collect_samples(self):
+        """Yield the sample lines of all children."""
+        pass
+
+    @abstractmethod
+    def get_summary(self):
+        """Return a short value aggregating all children, for the log."""
+        pass
+
+
+class Counter(_MetricFamily):
+    TYPE = "counter"
+
+    def _new_child(self):
+        return CounterChild()
+
+    def _collect_samples(self):
+        for values, child in self.get_items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+    def get_summary(self):
+        return sum(child.value for _, child in self.get_items())
+
+
+class Histogram(_MetricFamily):
+    TYPE = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return HistogramChild(self.upper_bounds)
+
+    def _collect_samples(self):
+        bounds = [_format_value(float(bound)) for bound in self.upper_bounds] + ["+Inf"]
+        for values, child in self.get_items():
+            bucket_counts, count, total = child.get_snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, values, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+    def get_summary(self):
+        count, total = 0, 0.0
+        for _, child in self.get_items():
+            _, child_count, child_sum = child.get_snapshot()
+            count += child_count
+            total += child_sum
+        return {"count": count, "mean": total / count if count else 0.0}
+
+
+class CallbackGauge(_MetricFamily):
+    """Gauge whose values are returned by callback when collected: a number if
+    there are no labels, else a dict mapping label values tuples to numbers."""
+
+    TYPE = "gauge"
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _new_child(self):
+        raise TypeError(f"{self.name} values are given by its callback")
+
+    def _get_values(self):
+        result = self.callback()
+        if not self.labelnames:
+            return {(): result}
+        return result
+
+    def _collect_samples(self):
+        for values, value in self._get_values().items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}"
+
+    def get_summary(self):
+        values = self._get_values()
+        if not self.labelnames:
+            return values[()]
+        return {"/".join(labels): value for labels, value in values.items()}
+
+
+class MetricsRegistry:
+    """Named metric families. Registering a counter or histogram again
+    returns the existing one; registering a gauge again replaces its callback,
+    as gauges are bound to a server object."""
+
+    def __init__(self):
+        self.families = {}
+        self.lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_register(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get_or_register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def gauge(self, name, documentation, callback, labelnames=()):
+        gauge = CallbackGauge(name, documentation, callback, labelnames)
+        with self.lock:
+            self.families[name] = gauge
+        return gauge
+
+    def _get_or_register(self, family_class, name, documentation, labelnames, **kwargs):
+        with self.lock:
+            family = self.families.get(name)
+            if family is None:
+                family = self.families[name] = family_class(name, documentation, labelnames, **kwargs)
+            elif type(family) is not family_class or family.labelnames != tuple(labelnames):
+                raise ValueError(f"metric {name} already registered with another type or labels")
+            return family
+
+    def unregister(self, name):
+        with self.lock:
+            self.families.pop(name, None)
+
+    def get_families(self):
+        with self.lock:
+            return sorted(self.families.values(), key=lambda family: family.name)
+
+    def get_text(self):
+        """Return all the metrics in the Prometheus text format."""
+        lines = []
+        for family in self.get_families():
+            try:
+                lines.extend(family.collect())
+            except Exception as exc:
+                LOG.error("Metrics: could not collect %s: %s", family.name, exc)
+        return "\n".join(lines) + "\n"
+
+    def get_summary(self):
+        """Return a dict mapping metric names to aggregated values."""
+        summary = {}
+        for family in self.get_families():
+            try:
+                summary[family.name] = family.get_summary()
+            except Exception as exc:
+                LOG.error("Metrics: could not summarize %s: %s", family.name, exc)
+        return summary
+
+
+METRICS = MetricsRegistry()
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.registry.get_text().encode("utf8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        LOG.debug("Metrics: %s %s", self.address_string(), format % args)
+
+
+class MetricsExporter:
+    """Serve a registry over HTTP and log its summary, for one server.
+
+    The endpoint listens on the local interface only by default; the port is
+    the name_port option of the metrics section, e.g. world_port.
+
+    Attributes:
+    - name: server name, "world" or "login"
+    - enabled: whether the endpoint and summary are started
+    - address: (hostname, port) of the endpoint
+    - summary_interval: seconds between log summaries, 0 to disable them
+    """
+
+    ENABLED = CONFIG["metrics"].getboolean("enabled", False)
+    HOSTNAME = CONFIG["metrics"].get("hostname", "127.0.0.1")
+    SUMMARY_INTERVAL = float(CONFIG["metrics"].get("summary_interval", "60"))
+
+    def __init__(self, name, registry=METRICS, enabled=None, port=None, summary_interval=None):
+        self.name = name
+        self.registry = registry
+        self.enabled = self.ENABLED if enabled is None else enabled
+        if port is None:
+            port = int(CONFIG["metrics"].get(name + "_port", "0"))
+        self.address = (self.HOSTNAME, port)
+        self.summary_interval = self.SUMMARY_INTERVAL if summary_interval is None else summary_interval
+        self.http_server = None
+        self.threads = []
+        self.stop_event = threading.Event()
+
+    def start(self):
+        """Start the HTTP endpoint and the summary thread, if enabled."""
+        if not self.enabled:
+            return
+        self.stop_event.clear()
+        self.http_server = ThreadingHTTPServer(self.address, _MetricsRequestHandler)
+        self.http_server.daemon_threads = True
+        self.http_server.registry = self.registry
+        self.address = self.http_server.server_address[:2]
+        self._start_thread(self.http_server.serve_forever, "http")
+        if self.summary_interval > 0:
+            self._start_thread(self._log_summaries, "summary")
+        LOG.info("Serving %s metrics on http://%s:%d/metrics", self.name, *self.address)
+
+    def _start_thread(self, target, suffix):
+        thread = threading.Thread(target=target, name=f"{self.name}-metrics-{suffix}", daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def stop(self):
+        if self.http_server is None:
+            return
+        self.stop_event.set()
+        self.http_server.shutdown()
+        self.http_server.server_close()
+        self.http_server = None
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def _log_summaries(self):
+        while not self.stop_event.wait(self.summary_interval):
+            LOG.info("Metrics of %s server: %s", self.name, self.registry.get_summary())
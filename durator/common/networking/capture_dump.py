@@ -0,0 +1,71 @@
+""" Render a packet capture file (see packet_capture) as hexdumps.
+
+    python3 -m durator.common.networking.capture_dump FILE [-o OPCODE] [-c ID] [-a ACCOUNT]
+
+The filters can be repeated; a packet is shown if it matches one of the values
+of each filter given.
+"""
+
+import argparse
+import datetime
+import sys
+
+from durator.auth.constants import LoginOpCode
+from durator.common.networking.packet_capture import DIRECTION_SENT, read_capture
+from durator.world.opcodes import OpCode
+from lib.utilities import get_data_dump
+
+OPCODE_ENUMS = {"world": OpCode, "login": LoginOpCode}
+
+
+def get_opcode_name(opcode_enum, opcode_value):
+    try:
+        return opcode_enum(opcode_value).name
+    except ValueError:
+        return f"unknown opcode {opcode_value:X}"
+
+
+def dump_capture(capture_file, output, opcodes=None, connection_ids=None, accounts=None):
+    """Write the records of capture_file matching the filters to the output
+    text file object. opcodes is a set of opcode names, accounts a set of
+    uppercase account names."""
+    name, records = read_capture(capture_file)
+    opcode_enum = OPCODE_ENUMS.get(name)
+    for record in records:
+        opcode_name = get_opcode_name(opcode_enum, record.opcode_value) if opcode_enum else str(record.opcode_value)
+        if opcodes and opcode_name not in opcodes:
+            continue
+        if connection_ids and record.connection_id not in connection_ids:
+            continue
+        if accounts and record.account_name.upper() not in accounts:
+            continue
+        timestamp = datetime.datetime.fromtimestamp(record.timestamp).isoformat(sep=" ", timespec="milliseconds")
+        arrow = ">>>" if record.direction == DIRECTION_SENT else "<<<"
+        account = " " + record.account_name if record.account_name else ""
+        output.write(f"{timestamp} #{record.connection_id}{account} {arrow} {opcode_name} ({len(record.data)} bytes)\n")
+        output.write(get_data_dump(record.data))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Render a packet capture file as hexdumps.")
+    argparser.add_argument("file", help="capture file")
+    argparser.add_argument("-o", "--opcode", action="append", default=[], help="opcode name, e.g. CMSG_PING")
+    argparser.add_argument("-c", "--connection", action="append", type=int, default=[], help="connection ID")
+    argparser.add_argument("-a", "--account", action="append", default=[], help="account name")
+    args = argparser.parse_args()
+
+    with open(args.file, "rb") as capture_file:
+        try:
+            dump_capture(
+                capture_file,
+                sys.stdout,
+                opcodes=set(args.opcode),
+                connection_ids=set(args.connection),
+                accounts={account.upper() for account in args.account},
+            )
+        except ValueError as exc:
+            sys.exit(f"{args.file}: {exc}")
+
+
+if __name__ == "__main__":
+    main()
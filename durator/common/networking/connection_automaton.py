@@ -1,13 +1,31 @@
+import queue
 import socket
+import time
 import traceback
 from abc import ABCMeta, abstractmethod
 
-from durator.common.log import LOG
+from durator.common.log import get_logger
+from durator.common.metrics import METRICS
+from durator.common.networking.rate_limit import RateLimiter, RatePolicy
+from durator.common.profiling import HANDLER_PROFILER
+
+LOG = get_logger("net")
+
+PACKETS = METRICS.counter("durator_packets_total", "Packets received and sent, by opcode.", ("direction", "opcode"))
+PACKET_BYTES = METRICS.counter(
+    "durator_packet_bytes_total",
+    "Size of the packets received and sent without the world packet header, by opcode.",
+    ("direction", "opcode"),
+)
+HANDLER_SECONDS = METRICS.histogram(
+    "durator_handler_seconds", "Time spent in the packet handlers, by opcode.", ("opcode",)
+)
 
 
 class ConnectionAutomaton(metaclass=ABCMeta):
     """This base class handles an active connection, handles incoming and
-    outgoing packets, change state in consequence. Some opcodes are considered
+    outgoing packets, change state in consequence. How packets are received
+    is left to subclasses, e.g. ThreadedConnectionAutomaton. Some opcodes are considered
     legal only if the automaton is in a determined state, to ensure protocol
     integrity.
 
@@ -15,10 +33,26 @@ class ConnectionAutomaton(metaclass=ABCMeta):
     * UNMANAGED_OPS is a list of opcodes that do not require a special state.
     * UNMANAGED_STATES is a list of states that do not check the legality of
         incoming opcodes. Useful only for states with tons of possible opcodes.
-    * The OP_HANDLERS dict takes opcodes and a handler class.
+    * The OP_HANDLERS dict takes opcodes and a handler: either a class with a
+        static handle(connection, packet_data) function, or a class
+        instantiated with (connection, packet_data) for each packet, whose
+        process method is then called.
     * INIT_STATE is the entry state of the automaton
     * END_STATES is a list of states that means this automaton can stop.
     * MAIN_ERROR_STATE is a general end state when something went wrong.
+    * RATE_LIMITED_OPS maps opcodes to an opcode class name, and RATE_LIMITS
+        maps these names to a RateLimit applied to each connection.
+
+    Handlers return a (next_state, response) tuple. Those that need to wait for
+    something slow, like the database, can instead use defer with a Future;
+    the callback is then called from the connection thread and its own
+    (next_state, response) tuple is processed the same way.
+
+    From these attributes, each subclass precomputes lists indexed by opcode
+    value, the handler callable and rate limit class of each opcode, and a
+    bitset of the legal opcode values for each state, so that dispatching a
+    packet does not hash enums or scan lists. The metric children of each
+    opcode (see OpcodeMetrics) are kept in a table too, filled on first use.
     """
 
     LEGAL_OPS = {}
@@ -31,56 +65,83 @@ class ConnectionAutomaton(metaclass=ABCMeta):
     END_STATES = []
     MAIN_ERROR_STATE = None
 
-    def __init__(self, connection):
-        self.socket = connection
-        self.state = self.INIT_STATE
+    RATE_LIMITED_OPS = {}
+    RATE_LIMITS = {}
 
-    def handle_connection(self):
-        """Call this method to let the automaton handle the connection."""
-        self._actions_before_main_loop()
+    DISPATCH_TABLE = []
+    RATE_LIMIT_TABLE = []
+    LEGAL_MASKS = {}
+    DEFAULT_LEGAL_MASK = 0
+    OPCODE_ENUM = None
+    OPCODE_METRICS_TABLE = []
 
-        while self.state not in self.END_STATES:
-            self._actions_at_loop_begin()
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._build_dispatch_tables()
 
-            packet, has_timeout = self._try_recv_packet()
-            if has_timeout:
-                continue
-            if packet is None:
-                break
-            self._try_handle_packet(packet)
+    @classmethod
+    def _build_dispatch_tables(cls):
+        opcodes = set(cls.OP_HANDLERS) | set(cls.UNMANAGED_OPS) | set(cls.RATE_LIMITED_OPS)
+        for legal_ops in cls.LEGAL_OPS.values():
+            opcodes.update(legal_ops)
+        if not opcodes:
+            return
+        # Cover every member of the opcode enum, so any parsed opcode is a valid index.
+        opcode_enum = type(next(iter(opcodes)))
+        table_size = max(opcode.value for opcode in opcode_enum) + 1
 
-            self._actions_at_loop_end()
+        default_handler = get_handler_callable(cls.DEFAULT_HANDLER) if cls.DEFAULT_HANDLER else None
+        cls.DISPATCH_TABLE = [default_handler] * table_size
+        for opcode, handler in cls.OP_HANDLERS.items():
+            cls.DISPATCH_TABLE[opcode.value] = get_handler_callable(handler)
 
-        self._actions_after_main_loop()
+        cls.RATE_LIMIT_TABLE = [None] * table_size
+        for opcode, op_class in cls.RATE_LIMITED_OPS.items():
+            cls.RATE_LIMIT_TABLE[opcode.value] = op_class
 
-    def _try_recv_packet(self):
-        packet, has_timeout = None, False
+        cls.OPCODE_ENUM = opcode_enum
+        cls.OPCODE_METRICS_TABLE = [None] * table_size
 
-        try:
-            packet = self._recv_packet()
-            if packet is None:
-                LOG.debug("Client closed the connection.")
-        except socket.timeout:
-            has_timeout = True
+        cls.DEFAULT_LEGAL_MASK = get_opcodes_mask(cls.UNMANAGED_OPS)
+        cls.LEGAL_MASKS = {
+            state: cls.DEFAULT_LEGAL_MASK | get_opcodes_mask(legal_ops) for state, legal_ops in cls.LEGAL_OPS.items()
+        }
+        for state in cls.UNMANAGED_STATES:
+            cls.LEGAL_MASKS[state] = -1  # All bits set.
 
-        return packet, has_timeout
+    def __init__(self, connection):
+        self.socket = connection
+        self._state = self.INIT_STATE
+        self._legal_mask = self.LEGAL_MASKS.get(self._state, self.DEFAULT_LEGAL_MASK)
+        self.deferred_results = queue.Queue()
+        self.rate_limiter = RateLimiter(self.RATE_LIMITS) if self.RATE_LIMITS else None
 
-    @abstractmethod
-    def _recv_packet(self):
-        """Receive a message from the socket and return the packet or None.
-        It can be a bytes object, some class or whatever, as long as the other
-        parts of the class take the typ into account. Possible socket timeouts
-        can be raised as they will be captured by the main connection loop."""
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, new_state):
+        old_state = self._state
+        self._state = new_state
+        self._legal_mask = self.LEGAL_MASKS.get(new_state, self.DEFAULT_LEGAL_MASK)
+        if new_state is not old_state:
+            self._on_state_change(old_state, new_state)
+
+    def _on_state_change(self, old_state, new_state):
+        """Override this to track state changes, e.g. to index connections."""
         pass
 
     def _try_handle_packet(self, packet):
         try:
             self._handle_packet(packet)
         except Exception as exc:
-            LOG.error("{}: uncaught exception in packet handler:".format(type(self).__name__))
-            LOG.error(str(exc))
-            traceback.print_tb(exc.__traceback__)
-            self.state = self.MAIN_ERROR_STATE
+            self._handle_uncaught_exception("packet handler", exc)
+
+    def _handle_uncaught_exception(self, where, exc):
+        LOG.error("%s: uncaught exception in %s: %s", type(self).__name__, where, exc)
+        traceback.print_tb(exc.__traceback__)
+        self.state = self.MAIN_ERROR_STATE
 
     def _handle_packet(self, packet):
         """Find and call a handler for that packet.
@@ -98,12 +159,34 @@ class ConnectionAutomaton(metaclass=ABCMeta):
         if opcode is None:
             return
 
-        if self.state not in self.UNMANAGED_STATES and opcode not in self.UNMANAGED_OPS and not self.opcode_is_legal(opcode):
-            LOG.debug("{}: received illegal opcode {} in state {}".format(type(self).__name__, opcode.name, self.state.name))
+        # Enum.value is a property, _value_ is the plain attribute behind it.
+        opcode_value = opcode._value_
+        if not (self._legal_mask >> opcode_value) & 1:
+            LOG.debug("%s: received illegal opcode %s in state %s", type(self).__name__, opcode.name, self.state.name)
             return
 
-        handler_class = self.OP_HANDLERS.get(opcode, self.DEFAULT_HANDLER)
-        self._call_handler(handler_class, packet_data)
+        if self.rate_limiter is not None:
+            op_class = self.RATE_LIMIT_TABLE[opcode_value]
+            if op_class is not None and not self._check_rate_limit(op_class):
+                return
+
+        self._call_handler(opcode_value, packet_data)
+
+    def _check_rate_limit(self, op_class):
+        """Apply the rate limit of that opcode class. Return True if the
+        packet can be handled."""
+        limited = self.rate_limiter.check(op_class)
+        if limited is None:
+            return True
+
+        policy, delay = limited
+        if policy is RatePolicy.DELAY:
+            time.sleep(delay)
+            return True
+        if policy is RatePolicy.DISCONNECT:
+            LOG.warning("%s: %s rate limit exceeded, disconnecting.", type(self).__name__, op_class)
+            self.state = self.MAIN_ERROR_STATE
+        return False
 
     @abstractmethod
     def _parse_packet(self, packet):
@@ -111,20 +194,77 @@ class ConnectionAutomaton(metaclass=ABCMeta):
         the _recv_packet method."""
         pass
 
-    def _call_handler(self, handler_class, packet_data):
-        """Call the handler and possibly send a response packet and update
-        the connection state."""
-        handler = handler_class(self, packet_data)
-        next_state, response = handler.process()
+    def _call_handler(self, opcode_value, packet_data):
+        """Call the handler callable of that opcode (see get_handler_callable),
+        record its latency, and possibly send a response packet and update the
+        connection state. Handlers run under the HANDLER_PROFILER while it is
+        active."""
+        opcode_metrics = self.OPCODE_METRICS_TABLE[opcode_value] or self.get_opcode_metrics(opcode_value)
+        handler = self.DISPATCH_TABLE[opcode_value]
+        start_time = time.perf_counter()
+        if HANDLER_PROFILER.active:
+            result = HANDLER_PROFILER.run(handler, self, packet_data)
+        else:
+            result = handler(self, packet_data)
+        opcode_metrics.handler_seconds.observe(time.perf_counter() - start_time)
+        self._process_handler_result(*result)
 
+    @classmethod
+    def get_opcode_metrics(cls, opcode_value):
+        """Return the OpcodeMetrics of that opcode value. Values outside of
+        the opcode enum, or None, share the "unknown" metrics."""
+        table = cls.OPCODE_METRICS_TABLE
+        if opcode_value is None or not 0 <= opcode_value < len(table):
+            return UNKNOWN_OPCODE_METRICS
+        opcode_metrics = table[opcode_value]
+        if opcode_metrics is None:
+            try:
+                opcode_name = cls.OPCODE_ENUM(opcode_value).name
+            except ValueError:
+                opcode_name = "unknown"
+            opcode_metrics = table[opcode_value] = OpcodeMetrics(opcode_name)
+        return opcode_metrics
+
+    def _count_packet(self, direction, opcode_value, size):
+        """Count a packet of size bytes, direction being DIRECTION_RECEIVED or
+        DIRECTION_SENT of the packet_capture module."""
+        opcode_metrics = self.get_opcode_metrics(opcode_value)
+        opcode_metrics.packets[direction].inc()
+        opcode_metrics.bytes[direction].inc(size)
+
+    def _process_handler_result(self, next_state, response):
         if response:
             self.send_packet(response)
         if next_state is not None:
             self.state = next_state
 
+    def defer(self, future, callback):
+        """Call callback(future) from the connection thread once that
+        concurrent.futures.Future is done. The callback must return a
+        (next_state, response) tuple, like a handler's process method."""
+        future.add_done_callback(lambda done_future: self.deferred_results.put((callback, done_future)))
+
+    def _try_handle_deferred_results(self):
+        try:
+            self._handle_deferred_results()
+        except Exception as exc:
+            self._handle_uncaught_exception("deferred result handler", exc)
+
+    def _handle_deferred_results(self):
+        """Process the results of all the futures done so far."""
+        while True:
+            try:
+                callback, future = self.deferred_results.get(block=False)
+            except queue.Empty:
+                return
+            if HANDLER_PROFILER.active:
+                self._process_handler_result(*HANDLER_PROFILER.run(callback, future))
+            else:
+                self._process_handler_result(*callback(future))
+
     def opcode_is_legal(self, opcode):
         """Check if that opcode is legal for the current connection state."""
-        return opcode in self.LEGAL_OPS[self.state]
+        return bool((self._legal_mask >> opcode.value) & 1)
 
     @abstractmethod
     def send_packet(self, data):
@@ -147,3 +287,90 @@ class ConnectionAutomaton(metaclass=ABCMeta):
     def _actions_after_main_loop(self):
         """Perform possible required actions after looping over packets."""
         pass
+
+
+class ThreadedConnectionAutomaton(ConnectionAutomaton):
+    """ConnectionAutomaton running in a thread of its own, which receives
+    packets from its socket with blocking calls in handle_connection."""
+
+    def handle_connection(self):
+        """Call this method to let the automaton handle the connection."""
+        self._actions_before_main_loop()
+
+        while self.state not in self.END_STATES:
+            self._actions_at_loop_begin()
+            if self.state in self.END_STATES:
+                break
+            self._try_handle_deferred_results()
+
+            packet, has_timeout = self._try_recv_packet()
+            if has_timeout:
+                continue
+            if packet is None:
+                break
+            self._try_handle_packet(packet)
+
+            self._actions_at_loop_end()
+
+        self._actions_after_main_loop()
+
+    def _try_recv_packet(self):
+        packet, has_timeout = None, False
+
+        try:
+            packet = self._recv_packet()
+            if packet is None:
+                LOG.debug("Client closed the connection.")
+        except socket.timeout:
+            has_timeout = True
+
+        return packet, has_timeout
+
+    @abstractmethod
+    def _recv_packet(self):
+        """Receive a message from the socket and return the packet or None.
+        It can be a bytes object, some class or whatever, as long as the other
+        parts of the class take the typ into account. Possible socket timeouts
+        can be raised as they will be captured by the main connection loop."""
+        pass
+
+
+class OpcodeMetrics:
+    """Metric children of one opcode.
+
+    Attributes:
+    - handler_seconds: histogram of the handler latency
+    - packets, bytes: counters of packets and bytes, indexed by direction
+    """
+
+    __slots__ = ("handler_seconds", "packets", "bytes")
+
+    def __init__(self, opcode_name):
+        self.handler_seconds = HANDLER_SECONDS.labels(opcode_name)
+        self.packets = (PACKETS.labels("received", opcode_name), PACKETS.labels("sent", opcode_name))
+        self.bytes = (PACKET_BYTES.labels("received", opcode_name), PACKET_BYTES.labels("sent", opcode_name))
+
+
+UNKNOWN_OPCODE_METRICS = OpcodeMetrics("unknown")
+
+
+def get_handler_callable(handler):
+    """Return a handler(connection, packet_data) callable for that handler
+    class: its static handle function if it has one, else a function creating
+    a handler object and calling its process method."""
+    handle = getattr(handler, "handle", None)
+    if handle is not None:
+        return handle
+
+    def handle_with_object(connection, packet_data):
+        return handler(connection, packet_data).process()
+
+    return handle_with_object
+
+
+def get_opcodes_mask(opcodes):
+    """Return an int with the bits of these opcodes values set."""
+    mask = 0
+    for opcode in opcodes:
+        mask |= 1 << opcode.value
+    return mask
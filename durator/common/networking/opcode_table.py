@@ -0,0 +1,74 @@
+""" Fast decoding of opcode values.
+
+Creating an Enum member from its value (e.g. OpCode(0x1DC)) goes through the
+Enum metaclass and raises ValueError for unknown values, which is slow for
+something done on every packet. An OpcodeTable is a list indexed by opcode
+value instead.
+
+Unknown opcodes are counted, and a sample of their values is logged at most
+once per LOG_INTERVAL, so that a client sending garbage can't flood the logs.
+"""
+
+import collections
+import threading
+import time
+
+from durator.common.log import get_logger
+
+LOG = get_logger("net")
+
+
+class OpcodeTable:
+    """Lookup list of the members of an opcode Enum, by value.
+
+    Attributes:
+    - opcodes: list of Enum members indexed by value, None for unknown values
+    - num_unknown: total number of unknown values decoded
+    - unknown_samples: Counter of the unknown values decoded since last log,
+        holding at most MAX_SAMPLES different values
+    """
+
+    LOG_INTERVAL = 10.0
+    MAX_SAMPLES = 16
+
+    def __init__(self, opcode_enum, name=None):
+        self.name = name or opcode_enum.__name__
+        self.opcodes = [None] * (max(opcode.value for opcode in opcode_enum) + 1)
+        for opcode in opcode_enum:
+            self.opcodes[opcode.value] = opcode
+
+        self.lock = threading.Lock()
+        self.num_unknown = 0
+        self.num_unknown_since_log = 0
+        self.unknown_samples = collections.Counter()
+        self.last_log_time = 0.0
+
+    def get(self, value):
+        """Return the opcode with that value, or None if it is unknown."""
+        if value < len(self.opcodes):
+            opcode = self.opcodes[value]
+            if opcode is not None:
+                return opcode
+        self._count_unknown(value)
+        return None
+
+    def _count_unknown(self, value):
+        with self.lock:
+            self.num_unknown += 1
+            self.num_unknown_since_log += 1
+            if value in self.unknown_samples or len(self.unknown_samples) < self.MAX_SAMPLES:
+                self.unknown_samples[value] += 1
+
+            now = time.monotonic()
+            if now - self.last_log_time < self.LOG_INTERVAL:
+                return
+            samples = ", ".join(f"{value:X} ({count})" for value, count in self.unknown_samples.most_common())
+            num_unknown = self.num_unknown_since_log
+            self.last_log_time = now
+            self.num_unknown_since_log = 0
+            self.unknown_samples.clear()
+        LOG.warning("%d unknown %s opcode(s) received: %s", num_unknown, self.name, samples)
+
+    def get_stats(self):
+        with self.lock:
+            return {"unknown": self.num_unknown}
@@ -0,0 +1,193 @@
+""" Capture of the packets sent and received by a server.
+
+Connection threads only append a (time, direction, connection, opcode,
+account, data) record to a bounded deque, which is atomic and takes no lock;
+when the writer lags behind, the oldest records are dropped instead of
+blocking the connections. A background thread drains the deque every
+FLUSH_INTERVAL and appends the records to a binary capture file.
+
+Capture files start with FILE_HEADER_BIN (magic, version, protocol name)
+followed by records: RECORD_BIN then the account name and the packet data.
+They are rendered offline by the capture_dump module, e.g.:
+
+    python3 -m durator.common.networking.capture_dump captures/world-XXX.cap
+"""
+
+import collections
+import itertools
+import os
+import threading
+import time
+from struct import Struct
+
+from durator.common.log import get_logger
+from durator.config import CONFIG, ROOT_DIR
+
+LOG = get_logger("net")
+
+DIRECTION_RECEIVED = 0
+DIRECTION_SENT = 1
+
+# Opcode value of the packets whose opcode is unknown.
+UNKNOWN_OPCODE = 0xFFFFFFFF
+
+MAGIC = b"DCAP"
+VERSION = 1
+# char[4] magic, uint16 version, char[16] protocol name
+FILE_HEADER_BIN = Struct("<4sH16s")
+# double time, uint8 direction, uint32 connection ID, uint32 opcode,
+# uint8 account name size, uint32 data size
+RECORD_BIN = Struct("<dBIIBI")
+
+
+def _get_names_set(names):
+    return {name.strip().upper() for name in names.split(",") if name.strip()}
+
+
+class PacketCapture:
+    """Packet capture of one server. Connections call capture only if enabled
+    is True, so a disabled capture costs an attribute check per packet.
+
+    Attributes:
+    - name: protocol name, "world" or "login", written in the file header
+    - enabled: whether packets are captured
+    - path: capture file path, in directory and named after the start time
+    - opcodes: set of the opcode values captured, empty to capture all
+    - accounts: set of the account names (uppercase) captured, empty to
+        capture all; packets received before the account is known are ignored
+    - records: deque of the records not written yet, of size buffer_size
+    - num_captured, num_written: records captured, and written to the file
+    """
+
+    ENABLED = CONFIG["general"].getboolean("capture", False)
+    DIRECTORY = CONFIG["general"].get("capture_dir", "captures")
+    BUFFER_SIZE = int(CONFIG["general"].get("capture_buffer_size", "65536"))
+    OPCODES = CONFIG["general"].get("capture_opcodes", "")
+    ACCOUNTS = CONFIG["general"].get("capture_accounts", "")
+
+    FLUSH_INTERVAL = 0.2
+
+    def __init__(self, name, opcode_enum, enabled=None, directory=None, opcodes=None, accounts=None, buffer_size=None):
+        self.name = name
+        self.enabled = self.ENABLED if enabled is None else enabled
+        directory = os.path.join(ROOT_DIR, self.DIRECTORY if directory is None else directory)
+        self.path = os.path.join(directory, "{}-{}.cap".format(name, time.strftime("%Y%m%d-%H%M%S")))
+
+        opcode_names = _get_names_set(self.OPCODES if opcodes is None else opcodes)
+        self.opcodes = {opcode.value for opcode in opcode_enum if opcode.name in opcode_names}
+        if len(self.opcodes) != len(opcode_names):
+            LOG.warning("PacketCapture: unknown %s opcodes in filter: %s", name, opcode_names)
+        self.accounts = _get_names_set(self.ACCOUNTS if accounts is None else accounts)
+
+        self.records = collections.deque(maxlen=self.BUFFER_SIZE if buffer_size is None else buffer_size)
+        self._connection_ids = itertools.count(1)
+        self._sequence = itertools.count(1)
+        self.num_captured = 0
+        self.num_written = 0
+        self.file = None
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def new_connection_id(self):
+        """Return an ID for a new connection, unique for this capture."""
+        return next(self._connection_ids)
+
+    def capture(self, direction, connection_id, opcode_value, data, account_name=None):
+        """Record a packet, if it passes the filters. data is copied if it is
+        mutable; opcode_value is None for unknown opcodes."""
+        if self.opcodes and opcode_value not in self.opcodes:
+            return
+        if self.accounts and (account_name is None or account_name.upper() not in self.accounts):
+            return
+        if opcode_value is None:
+            opcode_value = UNKNOWN_OPCODE
+        self.records.append((time.time(), direction, connection_id, opcode_value, account_name or "", bytes(data)))
+        self.num_captured = next(self._sequence)
+
+    def get_stats(self):
+        num_captured = self.num_captured
+        num_written = self.num_written
+        num_dropped = num_captured - num_written - len(self.records)
+        return {"captured": num_captured, "written": num_written, "dropped": max(num_dropped, 0)}
+
+    def start(self):
+        """Open the capture file and start the writer thread, if enabled."""
+        if not self.enabled:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.path, "wb")
+        self.file.write(FILE_HEADER_BIN.pack(MAGIC, VERSION, self.name.encode("ascii")))
+        self.thread = threading.Thread(target=self._write_records, name=f"{self.name}-capture", daemon=True)
+        self.thread.start()
+        LOG.info("Capturing %s packets to %s", self.name, self.path)
+
+    def stop(self):
+        """Stop capturing, write the remaining records and close the file."""
+        if self.thread is None:
+            return
+        self.enabled = False
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self._flush()
+        self.file.close()
+        LOG.info("PacketCapture: %s capture stopped: %s", self.name, self.get_stats())
+
+    def _write_records(self):
+        while not self.stop_event.wait(self.FLUSH_INTERVAL):
+            self._flush()
+
+    def _flush(self):
+        records = self.records
+        chunks = []
+        while True:
+            try:
+                timestamp, direction, connection_id, opcode_value, account_name, data = records.popleft()
+            except IndexError:
+                break
+            account_bytes = account_name.encode("utf8")[:255]
+            header = RECORD_BIN.pack(timestamp, direction, connection_id, opcode_value, len(account_bytes), len(data))
+            chunks += (header, account_bytes, data)
+            self.num_written += 1
+        if chunks:
+            self.file.write(b"".join(chunks))
+            self.file.flush()
+
+
+class CaptureRecord:
+    """A packet read from a capture file."""
+
+    def __init__(self, timestamp, direction, connection_id, opcode_value, account_name, data):
+        self.timestamp = timestamp
+        self.direction = direction
+        self.connection_id = connection_id
+        self.opcode_value = opcode_value
+        self.account_name = account_name
+        self.data = data
+
+
+def read_capture(capture_file):
+    """Read a capture from that binary file object, return its protocol name
+    and an iterator over its CaptureRecords. Raise ValueError if it is not a
+    capture file."""
+    header = capture_file.read(FILE_HEADER_BIN.size)
+    if len(header) < FILE_HEADER_BIN.size:
+        raise ValueError("truncated capture file header")
+    magic, version, name = FILE_HEADER_BIN.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a capture file, or unsupported version")
+    return name.rstrip(b"\x00").decode("ascii"), _read_records(capture_file)
+
+
+def _read_records(capture_file):
+    while True:
+        header = capture_file.read(RECORD_BIN.size)
+        if len(header) < RECORD_BIN.size:
+            # A truncated last record means the server was killed while writing it.
+            return
+        timestamp, direction, connection_id, opcode_value, account_size, data_size = RECORD_BIN.unpack(header)
+        account_name = capture_file.read(account_size).decode("utf8", errors="replace")
+        data = capture_file.read(data_size)
+        if len(data) < data_size:
+            return
+        yield CaptureRecord(timestamp, direction, connection_id, opcode_value, account_name, data)
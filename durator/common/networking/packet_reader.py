@@ -0,0 +1,76 @@
+""" Sequential reader of received packet data.
+
+A PacketReader keeps an offset in the packet instead of wrapping it in a
+BytesIO: structures are unpacked in place with Struct.unpack_from, strings are
+found with a single bytes.find of their terminator, and slices are taken from a
+memoryview so nothing is copied before decoding.
+
+Every read is bounds-checked and raises PacketReadError if the packet is too
+short or a string is not terminated, so a malformed packet never produces
+partial values.
+"""
+
+
+class PacketReadError(ValueError):
+    """Packet data does not match the structure read."""
+
+
+class PacketReader:
+    """Read values from packet data, starting at offset.
+
+    Attributes:
+    - data: packet data, bytes or bytearray
+    - view: memoryview of data
+    - offset: position of the next read
+    """
+
+    def __init__(self, data, offset=0):
+        self.data = data
+        self.view = memoryview(data)
+        self.offset = offset
+
+    @property
+    def remaining(self):
+        """Number of bytes left after the offset."""
+        return len(self.view) - self.offset
+
+    def _check_size(self, size, what):
+        if size > len(self.view) - self.offset:
+            raise PacketReadError(
+                f"can't read {what} ({size} bytes) at offset {self.offset}, packet is {len(self.view)} bytes"
+            )
+
+    def read_struct(self, struct):
+        """Unpack struct at the offset and return the values tuple."""
+        self._check_size(struct.size, "struct " + struct.format)
+        values = struct.unpack_from(self.view, self.offset)
+        self.offset += struct.size
+        return values
+
+    def read_cstring(self, encoding="utf8"):
+        """Read a null-terminated string and return it decoded, the terminator
+        being consumed but excluded."""
+        end = self.data.find(b"\x00", self.offset)
+        if end < 0:
+            raise PacketReadError(f"unterminated string at offset {self.offset}")
+        string = str(self.view[self.offset : end], encoding)
+        self.offset = end + 1
+        return string
+
+    def read_bytes(self, size):
+        """Read size bytes and return them as a bytes object."""
+        self._check_size(size, "bytes")
+        data = self.view[self.offset : self.offset + size].tobytes()
+        self.offset += size
+        return data
+
+    def read_remaining(self):
+        """Read all the bytes left and return them as a bytes object."""
+        data = self.view[self.offset :].tobytes()
+        self.offset = len(self.view)
+        return data
+
+    def skip(self, size):
+        """Move the offset size bytes forward."""
+        self._check_size(size, "skipped bytes")
+        self.offset += size
@@ -0,0 +1,200 @@
+""" Declarative description of packet structures.
+
+A PacketSchema lists the parts of a packet: fixed-size fields (struct format
+characters), null-terminated strings, raw bytes, optional sections included
+depending on the values, and repeated sub-schemas. The schema is compiled once
+in a list of steps, consecutive fixed fields being merged in a single cached
+Struct; packing computes the total size, allocates one buffer and writes each
+part in place with Struct.pack_into, instead of concatenating bytes.
+
+Values are given as a dict mapping field names to values. Example:
+
+    NAME_QUERY_RESPONSE = PacketSchema(
+        Fixed("Q", "guid"),
+        CString("name"),
+        Fixed("3I", "race", "gender", "class_id"),
+    )
+    data = NAME_QUERY_RESPONSE.pack({"guid": 1, "name": "Shgck", ...})
+"""
+
+import functools
+from enum import Enum
+from operator import itemgetter
+from struct import Struct
+
+
+class Fixed:
+    """Fixed-size fields: a struct format without byte order, and one name
+    per value in that format."""
+
+    def __init__(self, fmt, *names):
+        self.fmt = fmt
+        self.names = names
+
+
+class CString:
+    """A str value, encoded and null-terminated."""
+
+    def __init__(self, name, encoding="utf8"):
+        self.name = name
+        self.encoding = encoding
+
+
+class Bytes:
+    """A bytes value, written as is."""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Optional:
+    """Parts included only if condition(values) is true."""
+
+    def __init__(self, condition, *parts):
+        self.condition = condition
+        self.parts = parts
+
+
+class Repeat:
+    """A list of values dicts, each packed with that sub-schema."""
+
+    def __init__(self, name, schema):
+        self.name = name
+        self.schema = schema
+
+
+class _StepKind(Enum):
+    """Kinds of compiled steps."""
+
+    STRUCT = 0
+    CSTRING = 1
+    BYTES = 2
+    OPTIONAL = 3
+    REPEAT = 4
+    REPEAT_FIXED = 5
+
+
+# Members as module globals: attribute lookups on an Enum class are slow for
+# the packing loop.
+_STRUCT = _StepKind.STRUCT
+_CSTRING = _StepKind.CSTRING
+_BYTES = _StepKind.BYTES
+_OPTIONAL = _StepKind.OPTIONAL
+_REPEAT = _StepKind.REPEAT
+_REPEAT_FIXED = _StepKind.REPEAT_FIXED
+
+
+class PacketSchema:
+    """Compiled packet structure, see module doc.
+
+    Attributes:
+    - byte_order: struct byte order character, little-endian by default
+    - steps: list of (kind, arg1, arg2) tuples produced by the compilation
+    """
+
+    def __init__(self, *parts, byte_order="<"):
+        self.byte_order = byte_order
+        self.steps = self._compile(parts)
+
+    def _compile(self, parts):
+        steps = []
+        fixed_fmt = ""
+        fixed_names = []
+
+        def flush_fixed():
+            if fixed_fmt:
+                steps.append((_STRUCT, Struct(self.byte_order + fixed_fmt), _get_values_getter(fixed_names)))
+
+        for part in parts:
+            if isinstance(part, Fixed):
+                fixed_fmt += part.fmt
+                fixed_names.extend(part.names)
+                continue
+            flush_fixed()
+            fixed_fmt, fixed_names = "", []
+            if isinstance(part, CString):
+                steps.append((_CSTRING, part.name, part.encoding))
+            elif isinstance(part, Bytes):
+                steps.append((_BYTES, part.name, None))
+            elif isinstance(part, Optional):
+                steps.append((_OPTIONAL, part.condition, self._compile(part.parts)))
+            elif isinstance(part, Repeat):
+                steps.append(self._compile_repeat(part))
+            else:
+                raise TypeError("unknown schema part: " + repr(part))
+        flush_fixed()
+        return steps
+
+    def _compile_repeat(self, part):
+        """A list of fixed-size entries is packed with a single Struct, one
+        per number of entries, instead of one write per entry."""
+        sub_steps = part.schema.steps
+        if len(sub_steps) != 1 or sub_steps[0][0] is not _STRUCT:
+            return (_REPEAT, part.name, sub_steps)
+        _, struct, getter = sub_steps[0]
+        byte_order, entry_fmt = struct.format[0], struct.format[1:]
+
+        @functools.lru_cache(maxsize=64)
+        def get_struct(count):
+            return Struct(byte_order + entry_fmt * count)
+
+        return (_REPEAT_FIXED, part.name, (get_struct, getter))
+
+    def pack(self, values):
+        """Return the packet bytes for that values dict."""
+        writes = []
+        size = _collect(self.steps, values, writes)
+        buffer = bytearray(size)
+        offset = 0
+        for struct, payload, payload_size in writes:
+            if struct is None:
+                buffer[offset : offset + len(payload)] = payload
+            else:
+                struct.pack_into(buffer, offset, *payload)
+            offset += payload_size
+        return bytes(buffer)
+
+
+def _get_values_getter(names):
+    """Return a function returning the tuple of values of these names."""
+    if not names:
+        return lambda values: ()
+    if len(names) == 1:
+        name = names[0]
+        return lambda values: (values[name],)
+    return itemgetter(*names)
+
+
+def _collect(steps, values, writes):
+    """Append to writes the (struct, payload, size) tuples to write for these
+    values, struct being None for raw bytes, and return their total size."""
+    size = 0
+    for kind, arg1, arg2 in steps:
+        if kind is _STRUCT:
+            writes.append((arg1, arg2(values), arg1.size))
+            size += arg1.size
+        elif kind is _CSTRING:
+            encoded = values[arg1].encode(arg2)
+            # The buffer is zero-filled, so the terminator is already there.
+            writes.append((None, encoded, len(encoded) + 1))
+            size += len(encoded) + 1
+        elif kind is _BYTES:
+            payload = values[arg1]
+            writes.append((None, payload, len(payload)))
+            size += len(payload)
+        elif kind is _OPTIONAL:
+            if arg1(values):
+                size += _collect(arg2, values, writes)
+        elif kind is _REPEAT_FIXED:
+            items = values[arg1]
+            get_struct, getter = arg2
+            struct = get_struct(len(items))
+            payload = []
+            for item_values in items:
+                payload.extend(getter(item_values))
+            writes.append((struct, payload, struct.size))
+            size += struct.size
+        else:
+            for item_values in values[arg1]:
+                size += _collect(arg2, item_values, writes)
+    return size
@@ -0,0 +1,92 @@
+""" Per-connection rate limiting of incoming opcodes.
+
+Opcodes are grouped in classes (e.g. movement, chat), each with a token bucket
+refilled at a given rate up to a burst size. When a client sends a packet of
+a class with an empty bucket, the policy of that class applies: the packet is
+dropped, delayed until a token is available, or the client is disconnected.
+"""
+
+import time
+from enum import Enum
+
+
+class RatePolicy(Enum):
+
+    DROP = "drop"
+    DELAY = "delay"
+    DISCONNECT = "disconnect"
+
+
+class RateLimit:
+    """Token bucket settings of an opcode class: rate in tokens per second,
+    burst the bucket size, and the RatePolicy when the bucket is empty."""
+
+    def __init__(self, rate, burst, policy):
+        self.rate = rate
+        self.burst = burst
+        self.policy = policy
+
+    @staticmethod
+    def from_string(value):
+        """Parse a "rate burst policy" string, e.g. "20 40 delay"."""
+        rate, burst, policy = value.split()
+        return RateLimit(float(rate), float(burst), RatePolicy(policy))
+
+
+class TokenBucket:
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_time = time.monotonic()
+
+    def take(self):
+        """Take a token and return 0.0, or return the delay in seconds before
+        a token is available, without taking it."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_time) * self.rate)
+        self.last_time = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token buckets of a connection, one per opcode class, with counters of
+    the packets allowed, dropped, delayed or that caused a disconnection."""
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.buckets = {name: TokenBucket(limit.rate, limit.burst) for name, limit in limits.items()}
+        self.counters = {name: {"allowed": 0, "dropped": 0, "delayed": 0, "disconnected": 0} for name in limits}
+
+    def check(self, op_class):
+        """Take a token for that opcode class. Return None if the packet can
+        be handled right away, else a (policy, delay) tuple."""
+        delay = self.buckets[op_class].take()
+        counters = self.counters[op_class]
+        if not delay:
+            counters["allowed"] += 1
+            return None
+
+        policy = self.limits[op_class].policy
+        if policy is RatePolicy.DELAY:
+            # The token is taken in advance, it will be available after delay.
+            self.buckets[op_class].tokens -= 1.0
+            counters["delayed"] += 1
+        elif policy is RatePolicy.DROP:
+            counters["dropped"] += 1
+        else:
+            counters["disconnected"] += 1
+        return policy, delay
+
+    def get_stats(self):
+        """Return the counters of the classes that were limited at least
+        once."""
+        return {
+            name: dict(counters)
+            for name, counters in self.counters.items()
+            if counters["dropped"] or counters["delayed"] or counters["disconnected"]
+        }
@@ -0,0 +1,215 @@
+""" Profiling of running servers, driven by the admin console.
+
+Two profilers can be started and stopped at any time:
+
+- the HANDLER_PROFILER runs the packet handlers of all connections under
+  cProfile. Up to Python 3.11, cProfile only profiles the thread enabling it,
+  so while a session is active each connection thread runs its handlers under
+  a Profile of its own, and the profiles of all threads are merged when it
+  stops. From Python 3.12, cProfile is built on sys.monitoring, which allows
+  one profiler per interpreter but sees all threads: a single Profile is
+  enabled for the whole session, and records everything the threads run, not
+  only the handlers. When no session is active, it costs an attribute check
+  per handler call.
+- a StackSampler thread records the stacks of all threads every interval
+  seconds with sys._current_frames, which costs nothing to the other threads
+  between samples. Samples are written in the collapsed-stack format read by
+  flamegraph.pl or speedscope: one "root;caller;callee count" line per stack.
+"""
+
+import collections
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import traceback
+
+from durator.config import CONFIG
+
+# Whether cProfile allows a single Profile per interpreter (see above).
+SHARED_PROFILE = sys.version_info >= (3, 12)
+
+
+def get_output_path(directory, name, extension):
+    """Return a new path in directory, created if needed, named after the
+    current time."""
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, "{}-{}.{}".format(name, time.strftime("%Y%m%d-%H%M%S"), extension))
+
+
+class HandlerProfiler:
+    """cProfile sessions over the packet handlers of all connection threads.
+
+    Attributes:
+    - shared_profile: whether one Profile is enabled for all threads
+    - active: whether a session is running
+    - session: number of the current or last session
+    - profiles: list of the Profile objects of this session, the shared one or
+        those of the threads
+    - local: thread-local (session, Profile) of the calling thread
+    """
+
+    def __init__(self, shared_profile=None):
+        self.shared_profile = SHARED_PROFILE if shared_profile is None else shared_profile
+        self.active = False
+        self.session = 0
+        self.profiles = []
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start a session, return False if one is already running, or if
+        another profiler prevents enabling the shared Profile."""
+        with self.lock:
+            if self.active:
+                return False
+            profiles = []
+            if self.shared_profile:
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError:
+                    return False
+                profiles.append(profile)
+            self.session += 1
+            self.profiles = profiles
+            self.active = True
+            return True
+
+    def stop(self):
+        """Stop the session and return the merged pstats.Stats, or None if
+        no session was running."""
+        with self.lock:
+            if not self.active:
+                return None
+            self.active = False
+            profiles, self.profiles = self.profiles, []
+            if self.shared_profile:
+                profiles[0].disable()
+        stats = pstats.Stats()
+        for profile in profiles:
+            # A Profile that could not be enabled has nothing to add.
+            if profile.getstats():
+                stats.add(profile)
+        return stats
+
+    def run(self, func, *args):
+        """Call func(*args) under the Profile of the calling thread. With a
+        shared Profile, func is already profiled and is simply called."""
+        if self.shared_profile:
+            return func(*args)
+        local = self.local
+        if getattr(local, "session", None) != self.session:
+            local.session = self.session
+            local.profile = cProfile.Profile()
+            with self.lock:
+                self.profiles.append(local.profile)
+        try:
+            local.profile.enable()
+        except ValueError:
+            # Another profiler is active: the handler must run anyway.
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            local.profile.disable()
+
+
+HANDLER_PROFILER = HandlerProfiler()
+
+
+class StackSampler:
+    """Sample the stacks of all threads from a thread of its own.
+
+    Stacks are rooted at their thread name, with digits replaced by "N" so
+    that threads running the same function (e.g. connections) are merged.
+
+    Attributes:
+    - interval: seconds between samples
+    - counts: Counter mapping collapsed stacks to their number of samples
+    - num_samples: number of samples taken
+    """
+
+    INTERVAL = float(CONFIG["admin"].get("sample_interval", "0.01"))
+
+    def __init__(self, interval=None):
+        self.interval = self.INTERVAL if interval is None else interval
+        self.counts = collections.Counter()
+        self.num_samples = 0
+        self.thread = None
+        self.stop_event = threading.Event()
+        self._frame_labels = {}
+
+    @property
+    def active(self):
+        return self.thread is not None
+
+    def start(self):
+        """Start sampling, return False if it is already running."""
+        if self.thread is not None:
+            return False
+        self.counts = collections.Counter()
+        self.num_samples = 0
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._sample_until_stopped, name="stack-sampler", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """Stop sampling and return the counts, or None if not running."""
+        if self.thread is None:
+            return None
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        return self.counts
+
+    def _sample_until_stopped(self):
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """Record the current stack of every other thread."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own_ident = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(self._get_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(re.sub(r"\d+", "N", names.get(ident, "unknown")))
+            labels.reverse()
+            self.counts[";".join(labels)] += 1
+        self.num_samples += 1
+
+    def _get_frame_label(self, code):
+        label = self._frame_labels.get(code)
+        if label is None:
+            file_name = os.path.basename(code.co_filename)
+            label = self._frame_labels[code] = f"{code.co_name} ({file_name}:{code.co_firstlineno})"
+        return label
+
+
+def write_collapsed_stacks(counts, output):
+    """Write the stack counts of a StackSampler to that text file object."""
+    for stack, count in sorted(counts.items()):
+        output.write(f"{stack} {count}\n")
+
+
+def get_thread_dump():
+    """Return the current stack of all threads, as text."""
+    threads = {thread.ident: thread for thread in threading.enumerate()}
+    lines = []
+    for ident, frame in sys._current_frames().items():
+        thread = threads.get(ident)
+        name = thread.name if thread else "unknown"
+        daemon = " daemon" if thread and thread.daemon else ""
+        lines.append(f'Thread "{name}" ({ident}{daemon}):\n')
+        lines.extend(traceback.format_stack(frame))
+        lines.append("\n")
+    return "".join(lines)
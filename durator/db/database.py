@@ -1,15 +1,46 @@
 import threading
+import time
+from os.path import isabs, join
 
-from peewee import MySQLDatabase, OperationalError
+from peewee import DatabaseProxy, MySQLDatabase, OperationalError, SqliteDatabase
 
-from durator.common.log import LOG
-from durator.config import CONFIG, DEBUG
+from durator.common.log import get_logger
+from durator.common.metrics import METRICS
+from durator.config import CONFIG, DEBUG, ROOT_DIR
 
+LOG = get_logger("db")
+
+QUERY_SECONDS = METRICS.histogram(
+    "durator_db_query_seconds", "Time spent in the db_connection functions, by function.", ("function",)
+)
+
+_DB_BACKEND = CONFIG["db"].get("db_backend", "mysql")
 _DB_NAME = CONFIG["db"]["db_name"]
 _DB_USER = CONFIG["db"]["db_user"]
 _DB_PASS = CONFIG["db"]["db_pass"]
+_DB_SQLITE_PATH = CONFIG["db"].get("db_sqlite_path", "durator.sqlite3")
+
+SQLITE_MEMORY = ":memory:"
+
+# Models are bound to this proxy; the actual database is chosen at runtime by
+# setup_database, so the same models can live in MySQL or SQLite.
+DB = DatabaseProxy()
+
 
-DB = MySQLDatabase(_DB_NAME, user=_DB_USER, password=_DB_PASS)
+def _create_database(backend, sqlite_path):
+    """Return a new Peewee database object for that backend."""
+    if backend == "mysql":
+        return MySQLDatabase(_DB_NAME, user=_DB_USER, password=_DB_PASS)
+    elif backend == "sqlite":
+        if sqlite_path == SQLITE_MEMORY:
+            # An in-memory database only lives as long as its connection, so
+            # all threads must share the same one.
+            return SqliteDatabase(SQLITE_MEMORY, thread_safe=False, check_same_thread=False)
+        if not isabs(sqlite_path):
+            sqlite_path = join(ROOT_DIR, sqlite_path)
+        return SqliteDatabase(sqlite_path, pragmas={"journal_mode": "wal", "foreign_keys": 1})
+    else:
+        raise ValueError(f"Unknown database backend '{backend}'")
 
 
 class _DbConnector:
@@ -24,10 +55,14 @@ class _DbConnector:
     must NOT be acquired for the db requests but only for the connection
     counter. This is MySQL, we should be able to send threaded stuff without
     issues, we just need to keep the gates.
+
+    If keep_open is True, the connection is never closed; this is required for
+    in-memory SQLite databases which are lost when their connection closes.
     """
 
     def __init__(self, database):
         self.database = database
+        self.keep_open = False
         self.num_connections = 0
         self.num_connections_lock = threading.Lock()
 
@@ -38,7 +73,7 @@ class _DbConnector:
             self.num_connections += 1
             if self.num_connections == 1:
                 try:
-                    self.database.connect()
+                    self.database.connect(reuse_if_open=True)
                     if DEBUG:
                         LOG.debug("[db] Database connected")
                 except OperationalError as exc:
@@ -51,7 +86,7 @@ class _DbConnector:
         """Close the database connection, return True on success."""
         with self.num_connections_lock:
             self.num_connections -= 1
-            if self.num_connections == 0:
+            if self.num_connections == 0 and not self.keep_open:
                 try:
                     self.database.close()
                     if DEBUG:
@@ -63,16 +98,50 @@ class _DbConnector:
 
     @staticmethod
     def log_error(operation, exception):
-        LOG.error(f"A problem occured during operation '{operation}'")
-        LOG.error("Is the MySQL server started?")
-        LOG.error("Is the Durator user created? (see database creds)")
-        LOG.error("Does it have full access to the durator database?")
-        LOG.error(str(exception))
+        LOG.error("A problem occured during operation '%s': %s", operation, exception)
+        if isinstance(DB.obj, MySQLDatabase):
+            LOG.error("Is the MySQL server started?")
+            LOG.error("Is the Durator user created? (see database creds)")
+            LOG.error("Does it have full access to the durator database?")
 
 
 _DB_CONNECTOR = _DbConnector(DB)
 
 
+def setup_database(backend=None, sqlite_path=None):
+    """Bind the models to a database backend, "mysql" or "sqlite".
+
+    Missing arguments are taken from the config. This is called once when the
+    module is imported, but tools like the benchmarks can call it again to use
+    another database, e.g. an in-memory SQLite one. Return the new database.
+    """
+    backend = backend or _DB_BACKEND
+    sqlite_path = sqlite_path or _DB_SQLITE_PATH
+    if DB.obj is not None and not DB.is_closed():
+        DB.close()
+
+    database = _create_database(backend, sqlite_path)
+    DB.initialize(database)
+    _DB_CONNECTOR.keep_open = backend == "sqlite" and sqlite_path == SQLITE_MEMORY
+    return database
+
+
+setup_database()
+
+
+def atomic():
+    """Return a transaction context manager on the database.
+
+    On SQLite, the transaction takes the write lock as it begins: a deferred
+    transaction that reads then writes fails at once with "database is
+    locked" when another connection writes, instead of waiting for the busy
+    timeout.
+    """
+    if isinstance(DB.obj, SqliteDatabase):
+        return DB.atomic("IMMEDIATE")
+    return DB.atomic()
+
+
 def db_connection(func):
     """Decorator that connects to the db with correct credentials and properly
     closes the connection after return.
@@ -80,17 +149,22 @@ def db_connection(func):
     If a connection couldn't be made, it returns None and does not call the
     decorated function. However, if a connection couldn't be closed, we still go
     on and return the function return value and assume it isn't that bad.
+
+    The time spent in the function is recorded in the QUERY_SECONDS histogram.
     """
+    query_seconds = QUERY_SECONDS.labels(func.__qualname__)
 
     def db_connection_decorator(*args, **kwargs):
         if not _DB_CONNECTOR.connect():
             return None
 
         return_value = None
+        start_time = time.perf_counter()
         try:
             return_value = func(*args, **kwargs)
         finally:
             _DB_CONNECTOR.close()
+            query_seconds.observe(time.perf_counter() - start_time)
         return return_value
 
     return db_connection_decorator
@@ -0,0 +1,143 @@
+""" Dedicated worker threads for database jobs.
+
+Network threads should not wait for the database: they submit jobs to the
+DbExecutor and get a concurrent.futures.Future, which can be awaited from an
+asyncio loop with asyncio.wrap_future, or given to ConnectionAutomaton.defer to
+get the result back in the connection thread.
+"""
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from durator.common.log import get_logger
+from durator.common.metrics import METRICS
+from durator.config import CONFIG
+
+LOG = get_logger("db")
+
+JOB_WAIT_SECONDS = METRICS.histogram(
+    "durator_db_job_wait_seconds", "Time spent by database jobs waiting for a worker."
+).labels()
+
+
+class DbExecutor:
+    """Bounded pool of worker threads running database jobs.
+
+    Each worker has its own bounded queue. Jobs submitted with the same key
+    (e.g. a connection) always go to the same worker, so they are run in the
+    order they were submitted; jobs without key are distributed round-robin.
+    When a queue is full, submit blocks until a slot is free, which gives some
+    back-pressure instead of an unbounded memory usage.
+
+    Attributes:
+    - num_workers, max_queue_size: pool dimensions
+    - stats_lock: lock protecting the statistics values below
+    - num_submitted, num_done, num_failed: job counters
+    - total_wait_time, max_wait_time: time spent by jobs in queue (seconds)
+    - total_run_time: time spent running jobs (seconds)
+    """
+
+    NUM_WORKERS = int(CONFIG["db"].get("db_workers", "4"))
+    MAX_QUEUE_SIZE = int(CONFIG["db"].get("db_queue_size", "256"))
+
+    _STOP = None
+
+    def __init__(self, num_workers=None, max_queue_size=None):
+        self.num_workers = num_workers or self.NUM_WORKERS
+        self.max_queue_size = max_queue_size or self.MAX_QUEUE_SIZE
+        self.queues = [queue.Queue(self.max_queue_size) for _ in range(self.num_workers)]
+        self.workers = []
+        self.round_robin = itertools.count()
+
+        self.stats_lock = threading.Lock()
+        self.num_submitted = 0
+        self.num_done = 0
+        self.num_failed = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.total_run_time = 0.0
+
+    def start(self):
+        """Start the worker threads."""
+        for index, job_queue in enumerate(self.queues):
+            worker = threading.Thread(target=self._work, args=(job_queue,), name=f"db-worker-{index}")
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        """Let the workers finish the queued jobs and wait for them to stop."""
+        for job_queue in self.queues:
+            job_queue.put(self._STOP)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        LOG.debug("[db] Executor stopped: %s", self.get_stats())
+
+    def submit(self, func, *args, key=None, **kwargs):
+        """Queue func(*args, **kwargs) and return a Future of its result."""
+        future = Future()
+        if key is None:
+            index = next(self.round_robin) % self.num_workers
+        else:
+            index = hash(key) % self.num_workers
+        with self.stats_lock:
+            self.num_submitted += 1
+        self.queues[index].put((future, func, args, kwargs, time.perf_counter()))
+        return future
+
+    def _work(self, job_queue):
+        while True:
+            job = job_queue.get()
+            if job is self._STOP:
+                break
+            self._run_job(*job)
+
+    def _run_job(self, future, func, args, kwargs, submit_time):
+        if not future.set_running_or_notify_cancel():
+            return
+
+        start_time = time.perf_counter()
+        failed = False
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            LOG.error("[db] Job %s failed: %s", func.__qualname__, exc)
+            failed = True
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+        end_time = time.perf_counter()
+
+        self._record_job(start_time - submit_time, end_time - start_time, failed)
+
+    def _record_job(self, wait_time, run_time, failed):
+        JOB_WAIT_SECONDS.observe(wait_time)
+        with self.stats_lock:
+            self.num_done += 1
+            if failed:
+                self.num_failed += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+            self.total_run_time += run_time
+
+    def get_queue_depth(self):
+        """Return the number of jobs waiting for a worker."""
+        return sum(job_queue.qsize() for job_queue in self.queues)
+
+    def get_stats(self):
+        """Return a dict with the queue depth and the job timing statistics."""
+        with self.stats_lock:
+            num_done = self.num_done or 1
+            return {
+                "queue_depth": self.get_queue_depth(),
+                "submitted": self.num_submitted,
+                "done": self.num_done,
+                "failed": self.num_failed,
+                "mean_wait_time": self.total_wait_time / num_done,
+                "max_wait_time": self.max_wait_time,
+                "mean_run_time": self.total_run_time / num_done,
+            }
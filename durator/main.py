@@ -2,15 +2,17 @@
 
 import argparse
 
+from durator.auth.async_login_server import AsyncLoginServer
 from durator.auth.login_server import LoginServer
-from durator.common.log import LOG
+from durator.common.log import LOG, setup_logging
 from durator.db.database_client import DatabaseClient
 from durator.world.world_server import WorldServer
 
-MODULES = {"login": LoginServer, "world": WorldServer, "db": DatabaseClient}
+MODULES = {"login": LoginServer, "login_async": AsyncLoginServer, "world": WorldServer, "db": DatabaseClient}
 
 
 def main():
+    setup_logging()
     LOG.info("DuratorEmu - WoW 1.1.2.4125 Sandbox Server - Shgck 2016")
 
     argparser = argparse.ArgumentParser()
@@ -0,0 +1,153 @@
+""" Admission control of the world server.
+
+Past its capacity, the world server does not let more clients in: they wait
+in a queue (AUTH_WAIT_QUEUE) and are admitted in order as slots free up. The
+capacity is a number of admitted sessions (max_players) and/or a maximum lag
+of the admission tick, which is late when the server threads compete for the
+CPU (max_tick_lag); when it is exceeded, nobody new is admitted until the lag
+goes down.
+"""
+
+import collections
+import threading
+import time
+from concurrent.futures import Future
+
+from durator.common.log import get_logger
+from durator.config import CONFIG
+from durator.world.handlers.auth_session import AuthSessionHandler
+from durator.world.realm import RealmPopulation
+
+LOG = get_logger("world")
+
+
+class AdmissionControl:
+    """Admit authenticated sessions in the world server, or queue them.
+
+    Attributes:
+    - admitted: set of admitted connections
+    - waiting: deque of (connection, future) waiting for a slot; the future
+        is set when the connection is admitted
+    - tick_lag: smoothed lag of the admission tick, in seconds
+    - num_admitted, num_queued: counters of sessions admitted and queued
+    """
+
+    MAX_PLAYERS = int(CONFIG["world"].get("max_players", "0"))
+    MAX_TICK_LAG = float(CONFIG["world"].get("max_tick_lag", "0")) / 1000
+    TICK_INTERVAL = 1.0
+    LAG_SMOOTHING = 0.3
+
+    def __init__(self, server, max_players=None, max_tick_lag=None):
+        self.server = server
+        self.max_players = self.MAX_PLAYERS if max_players is None else max_players
+        self.max_tick_lag = self.MAX_TICK_LAG if max_tick_lag is None else max_tick_lag
+
+        self.lock = threading.Lock()
+        self.admitted = set()
+        self.waiting = collections.deque()
+        self.tick_lag = 0.0
+        self.num_admitted = 0
+        self.num_queued = 0
+
+    def run(self):
+        """Tick every TICK_INTERVAL to measure the lag, admit waiting sessions
+        and publish the population; this has to run in another thread."""
+        while True:
+            start = time.perf_counter()
+            if self.server.shutdown_flag.wait(self.TICK_INTERVAL):
+                break
+            self.record_tick_lag(time.perf_counter() - start - self.TICK_INTERVAL)
+            with self.lock:
+                self._admit_waiting()
+            self.publish_population()
+
+    def record_tick_lag(self, lag):
+        self.tick_lag += self.LAG_SMOOTHING * (max(lag, 0.0) - self.tick_lag)
+
+    def request_admission(self, connection):
+        """Admit that connection if there is room, else queue it. Return a
+        (future, position) tuple: position is 0 if the connection is admitted
+        right away, else its position in queue (from 1) and the future is set
+        once it is admitted."""
+        with self.lock:
+            if not self.waiting and self._has_room():
+                self.admitted.add(connection)
+                self.num_admitted += 1
+                return None, 0
+
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self.waiting.append((connection, future))
+            self.num_queued += 1
+            position = len(self.waiting)
+        LOG.info("World server full, session queued at position %d.", position)
+        self.publish_population()
+        return future, position
+
+    def release(self, connection):
+        """Free the slot or the queue position of a closed connection."""
+        with self.lock:
+            if connection in self.admitted:
+                self.admitted.remove(connection)
+                self._admit_waiting()
+            else:
+                for index, (waiting_connection, _) in enumerate(self.waiting):
+                    if waiting_connection is connection:
+                        del self.waiting[index]
+                        self._send_queue_positions(index)
+                        break
+        self.publish_population()
+
+    def _has_room(self):
+        if self.max_players and len(self.admitted) >= self.max_players:
+            return False
+        if self.max_tick_lag and self.tick_lag > self.max_tick_lag:
+            return False
+        return True
+
+    def _admit_waiting(self):
+        """Admit as many waiting connections as possible; the lock must be
+        held."""
+        num_admitted = 0
+        while self.waiting and self._has_room():
+            connection, future = self.waiting.popleft()
+            self.admitted.add(connection)
+            self.num_admitted += 1
+            future.set_result(True)
+            num_admitted += 1
+        if num_admitted:
+            self._send_queue_positions(0)
+
+    def _send_queue_positions(self, start_index):
+        """Notify the waiting connections from start_index of their new
+        position; the lock must be held."""
+        for index in range(start_index, len(self.waiting)):
+            connection = self.waiting[index][0]
+            connection.outgoing_queue.put(AuthSessionHandler.get_wait_queue_packet(index + 1))
+
+    def get_population(self):
+        """Return the realm population from the server load."""
+        with self.lock:
+            if self.waiting or not self._has_room():
+                return RealmPopulation.FULL
+            if not self.max_players:
+                return RealmPopulation.LOW
+            ratio = len(self.admitted) / self.max_players
+        if ratio >= 0.75:
+            return RealmPopulation.HIGH
+        if ratio >= 0.5:
+            return RealmPopulation.AVERAGE
+        return RealmPopulation.LOW
+
+    def publish_population(self):
+        self.server.update_realm_state(population=self.get_population())
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "admitted": len(self.admitted),
+                "waiting": len(self.waiting),
+                "total_admitted": self.num_admitted,
+                "total_queued": self.num_queued,
+                "tick_lag": self.tick_lag,
+            }
@@ -0,0 +1,96 @@
+""" Index of the world connections, to find broadcast targets quickly.
+
+Broadcasts target either every connection, the connections in a given state
+or the players with given GUIDs. Instead of walking the whole connection list
+for each of them, connections are indexed by state and by player GUID. The
+index is kept up to date by WorldConnection: connections are added when
+accepted, their state changes and player GUID are reported, and they are
+removed when closed. Lookups return snapshots, so broadcasts do not hold the
+index lock while they queue packets.
+"""
+
+import threading
+
+
+class ConnectionIndex:
+    """Thread-safe index of WorldConnections by state and by player GUID.
+
+    Attributes:
+    - connections: set of all connections
+    - by_state: dict mapping a state to the set of connections in it
+    - by_guid: dict mapping a player GUID to its connection
+    - guids: dict mapping a connection to its player GUID
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = set()
+        self.by_state = {}
+        self.by_guid = {}
+        self.guids = {}
+
+    def add(self, connection):
+        with self.lock:
+            self.connections.add(connection)
+            self.by_state.setdefault(connection.state, set()).add(connection)
+
+    def remove(self, connection):
+        with self.lock:
+            if connection not in self.connections:
+                return
+            self.connections.remove(connection)
+            self.by_state[connection.state].discard(connection)
+            guid = self.guids.pop(connection, None)
+            if guid is not None and self.by_guid.get(guid) is connection:
+                del self.by_guid[guid]
+
+    def update_state(self, connection, old_state, new_state):
+        with self.lock:
+            if connection not in self.connections:
+                return
+            self.by_state[old_state].discard(connection)
+            self.by_state.setdefault(new_state, set()).add(connection)
+
+    def set_player_guid(self, connection, guid):
+        with self.lock:
+            self.by_guid[guid] = connection
+            self.guids[connection] = guid
+
+    def unset_player_guid(self, connection):
+        with self.lock:
+            guid = self.guids.pop(connection, None)
+            if guid is not None and self.by_guid.get(guid) is connection:
+                del self.by_guid[guid]
+
+    def get_connection(self, guid):
+        """Return the connection of the player with that GUID, or None."""
+        with self.lock:
+            return self.by_guid.get(guid)
+
+    def get_targets(self, state=None, guids=None):
+        """Return a list of the connections in that state, and/or of the
+        players in that GUID list."""
+        with self.lock:
+            if guids is None:
+                if state is None:
+                    return list(self.connections)
+                return list(self.by_state.get(state, ()))
+
+            targets = []
+            for guid in guids:
+                connection = self.by_guid.get(guid)
+                if connection is not None and (state is None or connection.state == state):
+                    targets.append(connection)
+            return targets
+
+    def count(self, state=None):
+        """Return the number of connections, in that state if provided."""
+        with self.lock:
+            if state is None:
+                return len(self.connections)
+            return len(self.by_state.get(state, ()))
+
+    def get_state_counts(self):
+        """Return a dict mapping each state to its number of connections."""
+        with self.lock:
+            return {state: len(connections) for state, connections in self.by_state.items()}
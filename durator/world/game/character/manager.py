@@ -2,8 +2,8 @@ import random
 
 from peewee import PeeweeException
 
-from durator.common.log import LOG
-from durator.db.database import DB, db_connection
+from durator.common.log import get_logger
+from durator.db.database import atomic, db_connection
 from durator.world.game.character.character_data import CharacterData, CharacterFeatures, CharacterPosition, CharacterStats
 from durator.world.game.character.constants import CharacterGender
 from durator.world.game.character.defaults import NEW_CHAR_DEFAULTS, RACE_AND_CLASS_DEFAULTS
@@ -11,6 +11,8 @@ from durator.world.game.skill.defaults import SKILL_MAX_LEVELS
 from durator.world.game.skill.skill import Skill
 from durator.world.game.spell.spell import Spell
 
+LOG = get_logger("world")
+
 
 class CharacterManager:
     """Transfer player character data between the database and the server."""
@@ -74,7 +76,7 @@ class _CharacterCreator:
         _CharacterCreator._add_default_skills(char_data, consts)
         _CharacterCreator._add_default_spells(char_data, consts)
 
-        LOG.debug("Character " + char_data.name + " created.")
+        LOG.debug("Character %s created.", char_data.name)
         return 0
 
     @staticmethod
@@ -87,12 +89,11 @@ class _CharacterCreator:
     @db_connection
     def _try_create_char(char_values, consts):
         char_data = None
-        with DB.atomic() as transaction:
+        with atomic() as transaction:
             try:
                 char_data = _CharacterCreator._create_char(char_values, consts)
             except PeeweeException as exc:
-                LOG.error("An error occured while creating character:")
-                LOG.error(str(exc))
+                LOG.error("An error occured while creating character: %s", exc)
                 transaction.rollback()
                 return None
         return char_data
@@ -250,8 +251,7 @@ class _CharacterCreator:
                     max_stat_level=max_values[1],
                 )
             except PeeweeException as exc:
-                LOG.error("Couldn't add skill {} for char {}".format(skill_id.name, char_data.guid))
-                LOG.error(str(exc))
+                LOG.error("Couldn't add skill %s for char %d: %s", skill_id.name, char_data.guid, exc)
 
     @staticmethod
     @db_connection
@@ -261,8 +261,7 @@ class _CharacterCreator:
             try:
                 Spell.create(character=char_data, ident=spell_id.value)
             except PeeweeException as exc:
-                LOG.error("Couldn't add spell {} for char {}".format(spell_id.name, char_data.guid))
-                LOG.error(str(exc))
+                LOG.error("Couldn't add spell %s for char %d: %s", spell_id.name, char_data.guid, exc)
 
 
 class _CharacterDestructor:
@@ -271,12 +270,11 @@ class _CharacterDestructor:
     def delete_char(guid):
         """Try to delete character and all associated data from the database.
         Return 0 on success, 1 on error."""
-        with DB.atomic() as transaction:
+        with atomic() as transaction:
             try:
                 _CharacterDestructor._delete_char(guid)
             except PeeweeException as exc:
-                LOG.error("An error occured while deleting character:")
-                LOG.error(str(exc))
+                LOG.error("An error occured while deleting character: %s", exc)
                 transaction.rollback()
                 return 1
         return 0
@@ -298,7 +296,7 @@ class _CharacterDestructor:
         stats.delete_instance()
         position.delete_instance()
 
-        LOG.debug("Character " + str(guid) + " deleted.")
+        LOG.debug("Character %d deleted.", guid)
         return 0
 
     @staticmethod
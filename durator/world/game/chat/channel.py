@@ -17,17 +17,17 @@ class Channel:
         self.name = name
         self.password = password
         self.internal_id = internal_id
-        self.members = []
+        self.members = set()
         self.members_lock = threading.Lock()
 
     @members_lock
     def add_member(self, guid):
-        if guid not in self.members:
-            self.members.append(guid)
+        self.members.add(guid)
 
     @members_lock
     def get_members(self):
-        return list(self.members)
+        """Return a set copy of the members GUIDs."""
+        return set(self.members)
 
     @members_lock
     def is_member(self, guid):
@@ -35,5 +35,8 @@ class Channel:
 
     @members_lock
     def remove_member(self, guid):
-        if guid in self.members:
-            self.members.remove(guid)
+        self.members.discard(guid)
+
+    @members_lock
+    def get_num_members(self):
+        return len(self.members)
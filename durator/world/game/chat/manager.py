@@ -1,19 +1,37 @@
 """ Simple chat manager.
 
-Does not handle localisation or anything. There will be basic channel support,
-maybe, but in the meantime the common channel is global to the server.
+Does not handle localisation or anything. There is basic channel support;
+says, yells and emotes are sent to the players in range of the sender.
+
+Players are throttled: each has a token bucket per channel (and per local
+message type), and messages sent with an empty bucket are suppressed.
 """
 
 import threading
 
-from durator.common.log import LOG
+from durator.common.log import get_logger
+from durator.common.networking.rate_limit import TokenBucket
+from durator.config import CONFIG
 from durator.world.game.chat.channel import Channel
 from durator.world.game.chat.message import ChatMessageType, ServerChatMessage
 from durator.world.game.chat.notification import Notification, NotificationType
+from durator.world.outgoing_queue import PacketPriority
 from durator.world.world_connection_state import WorldConnectionState
 
+LOG = get_logger("chat")
+
+# Result code of receive_message for a suppressed message.
+MESSAGE_THROTTLED = 5
+
 INTERNAL_NAME_PREFIX_MAP = {"General - ": 1, "Trade - ": 2, "LocalDefense - ": 3}
 
+# Distance from the sender within which local messages are received.
+LOCAL_MESSAGE_RANGES = {
+    ChatMessageType.SAY: float(CONFIG["world"].get("chat_range_say", "25")),
+    ChatMessageType.YELL: float(CONFIG["world"].get("chat_range_yell", "300")),
+    ChatMessageType.EMOTE: float(CONFIG["world"].get("chat_range_emote", "25")),
+}
+
 
 def channels_lock(func):
     def channels_lock_decorator(self, *args, **kwargs):
@@ -24,10 +42,29 @@ def channels_lock(func):
 
 
 class ChatManager:
+    """Manage channels and chat messages.
+
+    Attributes:
+    - channels: dict mapping channel names to Channel objects
+    - player_channels: dict mapping a player GUID to the set of names of the
+        channels they joined, to leave them all on logout
+    - throttle_buckets: dict mapping a player GUID to a dict of TokenBuckets,
+        one per channel name or local message type
+    - num_throttled: dict counting suppressed messages per channel name or
+        local message type
+    """
+
+    THROTTLE_RATE = float(CONFIG["world"].get("chat_throttle_rate", "1"))
+    THROTTLE_BURST = float(CONFIG["world"].get("chat_throttle_burst", "5"))
+
     def __init__(self, server):
         self.server = server
         self.channels = {}
+        self.player_channels = {}
         self.channels_lock = threading.Lock()
+        self.throttle_buckets = {}
+        self.num_throttled = {}
+        self.throttle_lock = threading.Lock()
 
     # ------------------------------
     # Add new channels
@@ -35,7 +72,12 @@ class ChatManager:
 
     @channels_lock
     def _add_channel(self, channel):
+        """Add channel unless one with that name exists; return whether it
+        has been added."""
+        if channel.name in self.channels:
+            return False
         self.channels[channel.name] = channel
+        return True
 
     def create_channel(self, name, password=""):
         """Try to create a channel.
@@ -44,13 +86,9 @@ class ChatManager:
         - 0 on success
         - 1 if a channel with that name already exists
         """
-        if name not in self.get_channels_names():
-            internal_id = ChatManager._get_internal_channel_id(name)
-            channel = Channel(name, password, internal_id)
-            self._add_channel(channel)
-            return 0
-        else:
-            return 1
+        internal_id = ChatManager._get_internal_channel_id(name)
+        channel = Channel(name, password, internal_id)
+        return 0 if self._add_channel(channel) else 1
 
     @staticmethod
     def _get_internal_channel_id(name):
@@ -71,6 +109,26 @@ class ChatManager:
     def get_channels_names(self):
         return list(self.channels.keys())
 
+    @channels_lock
+    def get_player_channels_names(self, guid):
+        return list(self.player_channels.get(guid, ()))
+
+    @channels_lock
+    def _add_player_channel(self, guid, chan_name):
+        self.player_channels.setdefault(guid, set()).add(chan_name)
+
+    @channels_lock
+    def _remove_player_channel(self, guid, chan_name):
+        chans_names = self.player_channels.get(guid)
+        if chans_names is not None:
+            chans_names.discard(chan_name)
+            if not chans_names:
+                del self.player_channels[guid]
+
+    @channels_lock
+    def _pop_player_channels(self, guid):
+        return self.player_channels.pop(guid, set())
+
     # ------------------------------
     # Join, leave, modify channels
     # ------------------------------
@@ -82,17 +140,19 @@ class ChatManager:
         - 0 on success
         - 1 if the password is wrong
         """
-        if chan_name not in self.get_channels_names():
+        channel = self.get_channel(chan_name)
+        if channel is None:
             self.create_channel(chan_name, password)
+            # This call assumes that after create_channel, the chan always exists.
+            channel = self.get_channel(chan_name)
 
-        # This call assumes that after create_channel, the chan always exists.
-        channel = self.get_channel(chan_name)
         if password == channel.password:
             with player.lock:
                 player_guid = player.guid
                 player_name = player.name
-            LOG.info("{} joins channel '{}'.".format(player_name, channel.name))
+            LOG.debug("%s joins channel '%s'.", player_name, channel.name)
             channel.add_member(player_guid)
+            self._add_player_channel(player_guid, channel.name)
             self._notify_join(channel, player_guid)
             return 0
         else:
@@ -106,8 +166,10 @@ class ChatManager:
         notification.join_leave_guid = joiner_guid
         notify_packet = notification.to_packet()
 
-        members.remove(joiner_guid)
-        self.server.broadcast(notify_packet, state=WorldConnectionState.IN_WORLD, guids=members)
+        members.discard(joiner_guid)
+        self.server.broadcast(
+            notify_packet, state=WorldConnectionState.IN_WORLD, guids=members, priority=PacketPriority.CHAT
+        )
 
     def leave_channel(self, player, chan_name):
         """Try to leave channel.
@@ -117,22 +179,36 @@ class ChatManager:
         - 1 if player wasn't on that channel to begin with
         - 2 if the channel doesn't even exist
         """
-        if chan_name not in self.get_channels_names():
-            return 2
         channel = self.get_channel(chan_name)
+        if channel is None:
+            return 2
 
         with player.lock:
             player_guid = player.guid
             player_name = player.name
 
-        if player_guid not in channel.get_members():
+        if not channel.is_member(player_guid):
             return 1
 
-        LOG.info(f"{player_name} leaves channel '{channel.name}'.")
+        LOG.debug("%s leaves channel '%s'.", player_name, channel.name)
         channel.remove_member(player_guid)
+        self._remove_player_channel(player_guid, channel.name)
         self._notify_leave(channel, player_guid)
         return 0
 
+    def leave_all_channels(self, player_guid):
+        """Remove that player from all the channels they joined, e.g. when
+        they leave the world; channels left empty are removed."""
+        with self.throttle_lock:
+            self.throttle_buckets.pop(player_guid, None)
+        for chan_name in self._pop_player_channels(player_guid):
+            channel = self.get_channel(chan_name)
+            if channel is None:
+                continue
+            channel.remove_member(player_guid)
+            self._notify_leave(channel, player_guid)
+            self._remove_channel_if_empty(chan_name)
+
     def _notify_leave(self, channel, leaver_guid):
         """Send to all members of this channel that a player left."""
         members = channel.get_members()
@@ -140,7 +216,9 @@ class ChatManager:
         notification.join_leave_guid = leaver_guid
         notify_packet = notification.to_packet()
 
-        self.server.broadcast(notify_packet, state=WorldConnectionState.IN_WORLD, guids=members)
+        self.server.broadcast(
+            notify_packet, state=WorldConnectionState.IN_WORLD, guids=members, priority=PacketPriority.CHAT
+        )
 
     def receive_message(self, sender, message):
         """Register a received chat message for that sender (GUID).
@@ -151,52 +229,80 @@ class ChatManager:
         - 2 if channel name is invalid
         - 3 on unhandled message type
         - 4 if muted (not implemented)
+        - MESSAGE_THROTTLED (5) if throttled
         """
         if message.message_type is ChatMessageType.CHANNEL:
             channel = self.get_channel(message.channel_name)
-            if channel is not None:
-                return self._send_channel_message(channel, sender, message)
-            else:
+            if channel is None:
                 return 2
-        elif (
-            message.message_type is ChatMessageType.SAY
-            or message.message_type is ChatMessageType.YELL
-            or message.message_type is ChatMessageType.EMOTE
-        ):
-            return self._send_global_chat_message(sender, message)
+            if not channel.is_member(sender):
+                return 1
+            if not self._take_throttle_token(sender, channel.name):
+                return MESSAGE_THROTTLED
+            return self._send_channel_message(channel, sender, message)
+        elif message.message_type in LOCAL_MESSAGE_RANGES:
+            if not self._take_throttle_token(sender, message.message_type.name):
+                return MESSAGE_THROTTLED
+            return self._send_local_chat_message(sender, message)
         else:
             return 3
 
+    def _take_throttle_token(self, sender, key):
+        """Return True if that sender can send a message to key (channel name
+        or local message type), else count it as throttled."""
+        with self.throttle_lock:
+            buckets = self.throttle_buckets.setdefault(sender, {})
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = TokenBucket(self.THROTTLE_RATE, self.THROTTLE_BURST)
+            # take returns the delay before a token is available, 0.0 if one was taken.
+            if bucket.take() == 0.0:
+                return True
+            self.num_throttled[key] = self.num_throttled.get(key, 0) + 1
+            return False
+
+    def get_throttle_stats(self):
+        """Return a dict with the number of suppressed messages, in total and
+        per channel name or local message type."""
+        with self.throttle_lock:
+            return {"throttled": sum(self.num_throttled.values()), "per_key": dict(self.num_throttled)}
+
     def _send_channel_message(self, channel, sender, message):
         members = channel.get_members()
-        if sender not in members:
-            return 1
-
         server_message = ServerChatMessage()
         server_message.load_client_message(message)
         server_message.sender_guid = sender
         message_packet = server_message.to_packet()
 
-        self.server.broadcast(message_packet, state=WorldConnectionState.IN_WORLD, guids=members)
+        self.server.broadcast(
+            message_packet, state=WorldConnectionState.IN_WORLD, guids=members, priority=PacketPriority.CHAT
+        )
         return 0
 
-    def _send_global_chat_message(self, sender, message):
+    def _send_local_chat_message(self, sender, message):
+        """Send the message to the sender and the players in range of it, the
+        range depending on the message type."""
+        sender_player = self.server.object_manager.get_player(sender)
+        if sender_player is None:
+            return 0
+        dist_range = LOCAL_MESSAGE_RANGES[message.message_type]
+        guids = self.server.object_manager.players_in_range_of(sender_player, dist_range)
+        guids.append(sender)
+
         server_message = ServerChatMessage()
         server_message.load_client_message(message)
         server_message.sender_guid = sender
         message_packet = server_message.to_packet()
 
-        self.server.broadcast(message_packet, state=WorldConnectionState.IN_WORLD)
+        self.server.broadcast(
+            message_packet, state=WorldConnectionState.IN_WORLD, guids=guids, priority=PacketPriority.CHAT
+        )
         return 0
 
     # ------------------------------
     # Remove channels
     # ------------------------------
 
-    @channels_lock
-    def _remove_channel(self, name):
-        del self.channels[name]
-
     def clean(self, chan_name=None):
         """Remove all empty channels, or chan_name if provided."""
         if chan_name is not None:
@@ -206,9 +312,8 @@ class ChatManager:
             for chan_name in channels_names:
                 self._remove_channel_if_empty(chan_name)
 
+    @channels_lock
     def _remove_channel_if_empty(self, name):
-        channel = self.get_channel(name)
-        if channel is None:
-            return
-        if not channel.get_members():
-            self._remove_channel(name)
+        channel = self.channels.get(name)
+        if channel is not None and not channel.get_num_members():
+            del self.channels[name]
@@ -1,13 +1,13 @@
 """ {C,S}MSG_MESSAGECHAT structures """
 
-import io
 from enum import Enum
 from struct import Struct
 
+from durator.common.networking.packet_reader import PacketReader
+from durator.common.networking.packet_schema import Bytes, CString, Fixed, Optional, PacketSchema
 from durator.world.game.chat.language import Language
 from durator.world.opcodes import OpCode
 from durator.world.world_packet import WorldPacket
-from lib.utilities import read_cstring, read_struct
 
 
 class ChatMessageType(Enum):
@@ -73,18 +73,16 @@ class ClientChatMessage:
     @staticmethod
     def from_client(data):
         message = ClientChatMessage()
-        data_io = io.BytesIO(data)
+        reader = PacketReader(data)
 
-        header_data = read_struct(data_io, ClientChatMessage.HEADER_BIN)
+        header_data = reader.read_struct(ClientChatMessage.HEADER_BIN)
         message.message_type = ChatMessageType(header_data[0])
         message.language = Language(header_data[1])
 
         if message.message_type == ChatMessageType.CHANNEL:
-            channel_name = read_cstring(data_io)
-            message.channel_name = channel_name.decode("utf8")
+            message.channel_name = reader.read_cstring()
 
-        content = read_cstring(data_io)
-        message.content = content.decode("utf8")
+        message.content = reader.read_cstring()
 
         return message
 
@@ -102,8 +100,13 @@ class ServerChatMessage:
     # - string    message (size above)
     # - uint8     tag
 
-    HEADER_BIN = Struct("<BI")
-    MIDDLE_PART_BIN = Struct("<QI")
+    SCHEMA = PacketSchema(
+        Fixed("BI", "message_type", "language"),
+        Optional(lambda values: values["message_type"] == ChatMessageType.CHANNEL.value, CString("channel_name")),
+        Fixed("QI", "sender_guid", "content_size"),
+        Bytes("content"),
+        Fixed("xB", "tag"),  # Pad byte: the message null terminator.
+    )
 
     def __init__(self):
         self.message_type = None
@@ -122,20 +125,19 @@ class ServerChatMessage:
         self.content = client_message.content
 
     def to_bytes(self):
-        data = b""
-        data += self.HEADER_BIN.pack(self.message_type.value, self.language.value)
-
-        if self.message_type == ChatMessageType.CHANNEL:
-            data += self.channel_name.encode("utf8") + b"\x00"
-
-        content_bytes = self.content.encode("utf8") + b"\x00"
-        self.content_size = len(content_bytes)
-
-        data += self.MIDDLE_PART_BIN.pack(self.sender_guid, self.content_size)
-        data += content_bytes
-        data += int.to_bytes(self.tag.value, 1, "little")
-
-        return data
+        content_bytes = self.content.encode("utf8")
+        self.content_size = len(content_bytes) + 1
+        return self.SCHEMA.pack(
+            {
+                "message_type": self.message_type.value,
+                "language": self.language.value,
+                "channel_name": self.channel_name,
+                "sender_guid": self.sender_guid,
+                "content_size": self.content_size,
+                "content": content_bytes,
+                "tag": self.tag.value,
+            }
+        )
 
     def to_packet(self):
         return WorldPacket(OpCode.SMSG_MESSAGECHAT, self.to_bytes())
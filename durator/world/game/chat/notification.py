@@ -2,6 +2,7 @@
 
 from enum import Enum
 
+from durator.common.networking.packet_schema import CString, Fixed, Optional, PacketSchema
 from durator.world.opcodes import OpCode
 from durator.world.world_packet import WorldPacket
 
@@ -40,10 +41,35 @@ class NotificationType(Enum):
     # NOT_MODERATED         = 0x1C
     # PLAYER_INVITED        = 0x1D
     # PLAYER_INVITE_BANNED  = 0x1E
-    # THROTTLED             = 0x1F
+    THROTTLED = 0x1F
+
+
+JOIN_LEAVE_TYPES = (NotificationType.JOINED.value, NotificationType.LEFT.value)
+YOU_JOIN_LEAVE_TYPES = (NotificationType.YOU_JOINED.value, NotificationType.YOU_LEFT.value)
 
 
 class Notification:
+
+    # - uint8     type
+    # - string    channel name
+    #     if type is JOINED or LEFT
+    #     - uint64    player GUID
+    #     if type is YOU_JOINED or YOU_LEFT
+    #     - uint32    channel ID
+    #         if channel ID is 0
+    #         - uint8     unk (non internal channels have an additional str)
+
+    SCHEMA = PacketSchema(
+        Fixed("B", "notif_type"),
+        CString("channel_name"),
+        Optional(lambda values: values["notif_type"] in JOIN_LEAVE_TYPES, Fixed("Q", "join_leave_guid")),
+        Optional(
+            lambda values: values["notif_type"] in YOU_JOIN_LEAVE_TYPES,
+            Fixed("I", "channel_id"),
+            Optional(lambda values: values["channel_id"] == 0, Fixed("x")),
+        ),
+    )
+
     def __init__(self, notif_type, channel=None):
         self.notif_type = notif_type
         self.channel = channel
@@ -53,20 +79,14 @@ class Notification:
         self.join_leave_guid = 0
 
     def to_bytes(self):
-        data = b""
-        data += int.to_bytes(self.notif_type.value, 1, "little")
-        data += self.channel_name.encode("utf8") + b"\x00"
-
-        if self.notif_type == NotificationType.JOINED or self.notif_type == NotificationType.LEFT:
-            data += int.to_bytes(self.join_leave_guid, 8, "little")
-
-        elif self.notif_type == NotificationType.YOU_JOINED or self.notif_type == NotificationType.YOU_LEFT:
-            chan_id = self.channel_id
-            data += int.to_bytes(chan_id, 4, "little")
-            if chan_id == 0:
-                data += b"\x00"  # Non internal channels have an additional str
-
-        return data
+        return self.SCHEMA.pack(
+            {
+                "notif_type": self.notif_type.value,
+                "channel_name": self.channel_name,
+                "join_leave_guid": self.join_leave_guid,
+                "channel_id": self.channel_id,
+            }
+        )
 
     def to_packet(self):
         return WorldPacket(OpCode.SMSG_CHANNEL_NOTIFY, self.to_bytes())
@@ -1,9 +1,9 @@
-import io
 from enum import Enum
 from struct import Struct
 
+from durator.common.networking.packet_reader import PacketReader
+from durator.common.networking.packet_schema import Fixed, Optional, PacketSchema
 from durator.world.game.position import Position
-from lib.utilities import read_struct
 
 
 class MovementFlags(Enum):
@@ -61,6 +61,24 @@ class Movement:
     SWIMMING_BIN = Struct("<f")
     SPLINE_ELEVATION_BIN = Struct("<f")
 
+    SCHEMA = PacketSchema(
+        Fixed("2I", "flags", "time"),
+        Fixed("4f", "x", "y", "z", "o"),
+        Optional(
+            lambda values: values["flags"] & MovementFlags.ON_TRANSPORT.value,
+            Fixed("Q4f", "transport_guid", "transport_x", "transport_y", "transport_z", "transport_o"),
+        ),
+        Optional(lambda values: values["flags"] & MovementFlags.IS_SWIMMING.value, Fixed("f", "swim_pitch")),
+        Optional(
+            lambda values: values["flags"] & MovementFlags.IS_FALLING.value,
+            Fixed("I4f", "jump_time", "jump_velocity", "jump_sin", "jump_cos", "jump_xy_speed"),
+        ),
+        Optional(
+            lambda values: values["flags"] & MovementFlags.SPLINE_ELEVATION.value,
+            Fixed("f", "spline_elevation_unk"),
+        ),
+    )
+
     def __init__(self):
         self.flags = 0
         self.time = 0
@@ -74,49 +92,61 @@ class Movement:
     @staticmethod
     def from_bytes(data):
         movement = Movement()
-        data_io = io.BytesIO(data)
+        reader = PacketReader(data)
 
-        header_data = read_struct(data_io, Movement.HEADER_BIN)
+        header_data = reader.read_struct(Movement.HEADER_BIN)
         movement.flags, movement.time = header_data
-        movement.position = Position.from_io(data_io)
+        movement.position = Position.from_reader(reader)
 
         if movement.flags & MovementFlags.ON_TRANSPORT.value:
-            transport_data = read_struct(data_io, Movement.TRANSPORT_HEADER_BIN)
+            transport_data = reader.read_struct(Movement.TRANSPORT_HEADER_BIN)
             movement.transport_guid = transport_data[0]
-            movement.transport_position = Position.from_io(data_io)
+            movement.transport_position = Position.from_reader(reader)
 
         if movement.flags & MovementFlags.IS_SWIMMING.value:
-            swimming_data = read_struct(data_io, Movement.SWIMMING_BIN)
+            swimming_data = reader.read_struct(Movement.SWIMMING_BIN)
             movement.swim_pitch = swimming_data[0]
 
         if movement.flags & MovementFlags.IS_FALLING.value:
-            movement.jump_data = JumpData.from_io(data_io)
+            movement.jump_data = JumpData.from_reader(reader)
 
         if movement.flags & MovementFlags.SPLINE_ELEVATION.value:
-            elevation_data = read_struct(data_io, Movement.SPLINE_ELEVATION_BIN)
+            elevation_data = reader.read_struct(Movement.SPLINE_ELEVATION_BIN)
             movement.spline_elevation_unk = elevation_data[0]
 
         return movement
 
     def to_bytes(self):
-        data = b""
-        data += self.HEADER_BIN.pack(self.flags, self.time)
-        data += self.position.to_bytes()
+        position = self.position
+        values = {
+            "flags": self.flags,
+            "time": self.time,
+            "x": position.x,
+            "y": position.y,
+            "z": position.z,
+            "o": position.o,
+        }
 
         if self.flags & MovementFlags.ON_TRANSPORT.value:
-            data += self.TRANSPORT_HEADER_BIN.pack(self.transport_guid)
-            data += self.transport_position.to_bytes()
+            transport_position = self.transport_position
+            values["transport_guid"] = self.transport_guid
+            values["transport_x"] = transport_position.x
+            values["transport_y"] = transport_position.y
+            values["transport_z"] = transport_position.z
+            values["transport_o"] = transport_position.o
 
-        if self.flags & MovementFlags.IS_SWIMMING.value:
-            data += self.SWIMMING_BIN.pack(self.swim_pitch)
+        values["swim_pitch"] = self.swim_pitch
 
         if self.flags & MovementFlags.IS_FALLING.value:
-            data += self.jump_data.to_bytes()
-
-        if self.flags & MovementFlags.SPLINE_ELEVATION.value:
-            data += self.SPLINE_ELEVATION_BIN.pack(self.spline_elevation_unk)
+            jump_data = self.jump_data
+            values["jump_time"] = jump_data.time
+            values["jump_velocity"] = jump_data.velocity
+            values["jump_sin"] = jump_data.sin
+            values["jump_cos"] = jump_data.cos
+            values["jump_xy_speed"] = jump_data.xy_speed
 
-        return data
+        values["spline_elevation_unk"] = self.spline_elevation_unk
+        return self.SCHEMA.pack(values)
 
 
 class JumpData:
@@ -131,9 +161,9 @@ class JumpData:
         self.xy_speed = 0.0
 
     @staticmethod
-    def from_io(bytes_io):
+    def from_reader(reader):
         jump = JumpData()
-        data = read_struct(bytes_io, JumpData.BIN)
+        data = reader.read_struct(JumpData.BIN)
         jump.time, jump.velocity, jump.sin, jump.cos, jump.xy_speed = data
         return jump
 
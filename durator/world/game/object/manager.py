@@ -3,17 +3,21 @@ from abc import ABCMeta
 
 from peewee import PeeweeException
 
-from durator.common.log import LOG
+from durator.common.log import get_logger
 from durator.config import CONFIG
-from durator.db.database import DB, db_connection
+from durator.db.database import atomic, db_connection
 from durator.world.game.character.manager import CharacterManager
 from durator.world.game.object.object_fields import ObjectField, PlayerField, UnitField
 from durator.world.game.object.type.base_object import OBJECT_TYPE_TO_FLAGS, ObjectType
 from durator.world.game.object.type.player import Player
 from durator.world.game.player_spawn_packet import PlayerSpawnPacket
+from durator.world.game.spatial_grid import SpatialGrid
 from durator.world.game.update_object_packet import UpdateObjectPacket, UpdateType
+from durator.world.outgoing_queue import PacketPriority
 from durator.world.world_connection_state import WorldConnectionState
 
+LOG = get_logger("world")
+
 
 def lock(func):
     def lock_decorator(self, *args, **kwargs):
@@ -61,10 +65,14 @@ class ObjectManager(BaseObjectManager):
     # Add diverse objects to the world
     # ----------------------------------------
 
-    def add_player(self, char_data):
+    def load_player(self, char_data):
         """Create (and return) a Player object from the data stored in the
-        database, and add it to the managed object list."""
-        return self.player_manager.create_player(char_data)
+        database. It is not added to the world yet, see add_player."""
+        return self.player_manager.load_player(char_data)
+
+    def add_player(self, player):
+        """Add a Player object to the managed object list."""
+        self.player_manager.add_player(player)
 
     @staticmethod
     def add_object_coords(base_object, position_data):
@@ -99,6 +107,8 @@ class ObjectManager(BaseObjectManager):
         return self.player_manager.get_guids()
 
     def players_in_range_of(self, player, dist_range):
+        """Return a list of the GUIDs of the players on the same map as that
+        player and within dist_range, excluding that player."""
         return self.player_manager.players_in_range_of(player, dist_range)
 
     # ----------------------------------------
@@ -112,6 +122,7 @@ class ObjectManager(BaseObjectManager):
     def update_movement(self, ref_player):
         """Send ref_player update movement packets to near players."""
         ref_guid = ref_player.guid
+        self.player_manager.update_position(ref_player)
         dist_range = float(CONFIG["world"]["update_range"])
         players_guids = self.players_in_range_of(ref_player, dist_range)
 
@@ -126,7 +137,13 @@ class ObjectManager(BaseObjectManager):
         self.server.broadcast(create_packet, state=WorldConnectionState.IN_WORLD, guids=update_create_guids)
 
         # Else (already tracking ref_player), send a movement update.
-        self.server.broadcast(movement_packet, state=WorldConnectionState.IN_WORLD, guids=update_movement_guids)
+        self.server.broadcast(
+            movement_packet,
+            state=WorldConnectionState.IN_WORLD,
+            guids=update_movement_guids,
+            priority=PacketPriority.MOVEMENT,
+            coalesce_key=ref_guid,
+        )
 
     def _tracking_and_untracking_players(self, ref_guid, players_guids, update=False):
         """Return lists of players (from the GUID list) that are tracking or
@@ -334,16 +351,19 @@ class _PlayerManager(BaseObjectManager):
     """The player manager handles all player in world, but must be accessed
     from the more general object manager for now."""
 
+    CELL_SIZE = float(CONFIG["world"].get("spatial_cell_size", "100"))
+
     def __init__(self, server):
         super().__init__(server)
+        self.grid = SpatialGrid(self.CELL_SIZE)
 
     # ----------------------------------------
     # Add players to world
     # ----------------------------------------
 
     @db_connection
-    def create_player(self, char_data):
-        """Create a new Player object in world."""
+    def load_player(self, char_data):
+        """Create a new Player object from the database, not in world yet."""
         player = Player()
         player.name = char_data.name
 
@@ -357,9 +377,19 @@ class _PlayerManager(BaseObjectManager):
         _PlayerManager.add_player_fields(player, char_data)
         player.import_skills(char_data)
         player.import_spells(char_data)
+        return player
 
+    def add_player(self, player):
+        """Add a loaded Player object in world."""
         self._add_object(player)
-        return player
+        self.update_position(player)
+
+    def update_position(self, player):
+        """Update the player position in the spatial grid."""
+        with player.lock:
+            map_id = player.map_id
+            position = player.position
+        self.grid.update(player.guid, map_id, position.x, position.y, position.z)
 
     @staticmethod
     @db_connection
@@ -407,19 +437,15 @@ class _PlayerManager(BaseObjectManager):
     def get_guids(self):
         return self._get_guids()
 
-    @lock
     def players_in_range_of(self, ref_player, dist_range):
         """Return a list of Players' GUIDs in that ref_player's range."""
         with ref_player.lock:
+            map_id = ref_player.map_id
             ref_position = ref_player.position
 
-        guids_in_range = []
-        for player_guid in self.objects:
-            player = self.get_player(player_guid)
-            if ref_position.distance_from(player.position) < dist_range:
-                if ref_player.guid != player_guid:
-                    guids_in_range.append(player_guid)
-        return guids_in_range
+        ref_guid = ref_player.guid
+        guids_in_range = self.grid.query(map_id, ref_position.x, ref_position.y, ref_position.z, dist_range)
+        return [guid for guid in guids_in_range if guid != ref_guid]
 
     # ----------------------------------------
     # Remove players from world
@@ -433,13 +459,14 @@ class _PlayerManager(BaseObjectManager):
             return
 
         self._remove_object(guid)
+        self.grid.remove(guid)
         self.save_player(player)
 
     @db_connection
     def save_player(self, player):
         char_data = CharacterManager.get_char_data(player.guid)
 
-        with DB.atomic() as transaction:
+        with atomic() as transaction:
             try:
                 ObjectManager.save_object_coords(player, char_data.position)
                 ObjectManager.save_object_fields(player, char_data)
@@ -447,8 +474,7 @@ class _PlayerManager(BaseObjectManager):
                 _PlayerManager.save_player_fields(player, char_data)
                 char_data.save()
             except PeeweeException as exc:
-                LOG.error("An error occured while creating character:")
-                LOG.error(str(exc))
+                LOG.error("An error occured while creating character: %s", exc)
                 transaction.rollback()
                 return None
 
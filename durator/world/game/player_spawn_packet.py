@@ -1,8 +1,10 @@
-from durator.common.log import LOG
+from durator.common.log import get_logger
 from durator.world.game.object.object_fields import ObjectField, PlayerField, UnitField
 from durator.world.game.object.type.player import Player
 from durator.world.game.update_object_packet import UpdateObjectPacket, UpdateType
 
+LOG = get_logger("world")
+
 # These values are enough to let the client make the player show in world.
 # There may be a lot of superfluous values but well...
 PLAYER_SPAWN_FIELDS = [
@@ -91,8 +93,7 @@ class PlayerSpawnPacket(UpdateObjectPacket):
         for required_field in PLAYER_SPAWN_FIELDS:
             value = player.get(required_field)
             if value is None:
-                LOG.error("A required field for player spawning is not set.")
-                LOG.error(str(required_field))
+                LOG.error("A required field for player spawning is not set: %s", required_field)
                 continue
             self.add_field(required_field, value)
 
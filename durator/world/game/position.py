@@ -1,8 +1,6 @@
 import math
 from struct import Struct
 
-from lib.utilities import read_struct
-
 
 class Position:
 
@@ -15,9 +13,9 @@ class Position:
         self.o = o
 
     @staticmethod
-    def from_io(bytes_io):
+    def from_reader(reader):
         position = Position()
-        position_data = read_struct(bytes_io, Position.BIN)
+        position_data = reader.read_struct(Position.BIN)
         position.x = position_data[0]
         position.y = position_data[1]
         position.z = position_data[2]
@@ -0,0 +1,79 @@
+""" Spatial index of objects in world.
+
+Objects are stored in square cells of a grid, one grid per map, so finding the
+objects around a point only looks at the cells overlapping the search radius
+instead of every object in world. The grid stores a copy of the coordinates:
+it has to be told when an object moves.
+"""
+
+import math
+import threading
+
+
+class SpatialGrid:
+    """Thread-safe grid of GUIDs.
+
+    Attributes:
+    - cell_size: side of a cell, in yards; a good size is around the most
+        common query radius
+    - cells: dict mapping (map_id, cell_x, cell_y) to a set of GUIDs
+    - entries: dict mapping a GUID to its (map_id, x, y, z, cell key)
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def _get_cell_key(self, map_id, x, y):
+        return map_id, math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def update(self, guid, map_id, x, y, z):
+        """Insert or move the object with that GUID."""
+        cell_key = self._get_cell_key(map_id, x, y)
+        with self.lock:
+            entry = self.entries.get(guid)
+            if entry is not None and entry[4] != cell_key:
+                self._discard_from_cell(guid, entry[4])
+            if entry is None or entry[4] != cell_key:
+                self.cells.setdefault(cell_key, set()).add(guid)
+            self.entries[guid] = (map_id, x, y, z, cell_key)
+
+    def remove(self, guid):
+        with self.lock:
+            entry = self.entries.pop(guid, None)
+            if entry is not None:
+                self._discard_from_cell(guid, entry[4])
+
+    def _discard_from_cell(self, guid, cell_key):
+        cell = self.cells[cell_key]
+        cell.discard(guid)
+        if not cell:
+            del self.cells[cell_key]
+
+    def query(self, map_id, x, y, z, radius):
+        """Return a list of the GUIDs within radius (Euclidean distance) of
+        that point on that map."""
+        min_cell_x = math.floor((x - radius) / self.cell_size)
+        max_cell_x = math.floor((x + radius) / self.cell_size)
+        min_cell_y = math.floor((y - radius) / self.cell_size)
+        max_cell_y = math.floor((y + radius) / self.cell_size)
+        squared_radius = radius * radius
+
+        guids = []
+        with self.lock:
+            for cell_x in range(min_cell_x, max_cell_x + 1):
+                for cell_y in range(min_cell_y, max_cell_y + 1):
+                    cell = self.cells.get((map_id, cell_x, cell_y))
+                    if cell is None:
+                        continue
+                    for guid in cell:
+                        _, other_x, other_y, other_z, _ = self.entries[guid]
+                        squared_dist = (other_x - x) ** 2 + (other_y - y) ** 2 + (other_z - z) ** 2
+                        if squared_dist < squared_radius:
+                            guids.append(guid)
+        return guids
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,6 +1,6 @@
 import time
-from struct import Struct
 
+from durator.common.networking.packet_schema import Fixed, PacketSchema, Repeat
 from durator.world.game.spell.constants import SPELL_VALUES, SpellId
 from durator.world.opcodes import OpCode
 from durator.world.world_packet import WorldPacket
@@ -9,20 +9,30 @@ from durator.world.world_packet import WorldPacket
 class InitialSpellsPacket(WorldPacket):
     """Packet in charge to send spell data at login."""
 
-    # uint8     unk
-    # uint16    num_spells
-    HEADER_BIN = Struct("<BH")
-
     # uint16    spell_id
     # uint16    unk
-    SPELL_BIN = Struct("<2H")
+    SPELL_SCHEMA = PacketSchema(Fixed("2H", "spell_id", "unk"))
 
     # uint16    spell_id
     # uint16    item_id
     # uint16    spell_category
     # uint32    cooldown
     # uint32    cooldown_category
-    COOLDOWN_BIN = Struct("<3H2I")
+    COOLDOWN_SCHEMA = PacketSchema(
+        Fixed("3H2I", "spell_id", "item_id", "spell_category", "cooldown", "cooldown_category")
+    )
+
+    # uint8     unk
+    # uint16    num_spells
+    # spells
+    # uint16    num_cooldowns
+    # cooldowns
+    SCHEMA = PacketSchema(
+        Fixed("BH", "unk", "num_spells"),
+        Repeat("spells", SPELL_SCHEMA),
+        Fixed("H", "num_cooldowns"),
+        Repeat("cooldowns", COOLDOWN_SCHEMA),
+    )
 
     def __init__(self, player):
         super().__init__(OpCode.SMSG_INITIAL_SPELLS)
@@ -31,22 +41,28 @@ class InitialSpellsPacket(WorldPacket):
 
     def _prepare_packet(self):
         """Compute the bytes of the WorldPacket."""
-        data = b""
-
         with self.player.lock:
-            num_spells = len(self.player.spells)
-            data += self.HEADER_BIN.pack(0, num_spells)
-
-            count = 1
-            for spell in self.player.spells:
-                data += self.SPELL_BIN.pack(spell.ident, count)
-                count += 1
-
-            data += int.to_bytes(num_spells, 2, "little")
+            spells = [
+                {"spell_id": spell.ident, "unk": count} for count, spell in enumerate(self.player.spells, start=1)
+            ]
             now = int(time.time())
-            for spell in self.player.spells:
-                values = SPELL_VALUES[SpellId(spell.ident)]
-                category = values[0]
-                data += self.COOLDOWN_BIN.pack(spell.ident, category, 0, now, 0)
+            cooldowns = [
+                {
+                    "spell_id": spell.ident,
+                    "item_id": SPELL_VALUES[SpellId(spell.ident)][0],  # category
+                    "spell_category": 0,
+                    "cooldown": now,
+                    "cooldown_category": 0,
+                }
+                for spell in self.player.spells
+            ]
 
-        self.data = data
+        self.data = self.SCHEMA.pack(
+            {
+                "unk": 0,
+                "num_spells": len(spells),
+                "spells": spells,
+                "num_cooldowns": len(cooldowns),
+                "cooldowns": cooldowns,
+            }
+        )
@@ -4,7 +4,7 @@ import math
 from enum import Enum
 from struct import Struct
 
-from durator.common.log import LOG
+from durator.common.log import get_logger
 from durator.world.game.object.object_fields import ObjectField
 from durator.world.game.object.object_fields_type import FIELD_TYPE_MAP, FieldType
 from durator.world.game.object.type.base_object import ObjectTypeFlags
@@ -12,6 +12,8 @@ from durator.world.game.object.type.unit import DEFAULT_SPEEDS
 from durator.world.opcodes import OpCode
 from durator.world.world_packet import WorldPacket
 
+LOG = get_logger("world")
+
 
 class UpdateType(Enum):
     """Determine the UpdateObject packet format."""
@@ -148,7 +150,7 @@ class UpdateBlocksBuilder:
         try:
             field_type = FIELD_TYPE_MAP[field]
         except KeyError:
-            LOG.error("No type associated with " + str(field))
+            LOG.error("No type associated with %s", field)
             LOG.error("Object not updated.")
             return
         field_struct = self.FIELD_BIN_MAP[field_type]
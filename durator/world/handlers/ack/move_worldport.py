@@ -1,6 +1,8 @@
-from durator.common.log import LOG
+from durator.common.log import get_logger
 from durator.world.opcodes import OpCode
 
+LOG = get_logger("world")
+
 
 class MoveWorldportAckHandler:
     def __init__(self, connection, _):
@@ -8,9 +10,9 @@ class MoveWorldportAckHandler:
 
     def process(self):
         if "worldport_ack_pending" in self.conn.shared_data:
-            LOG.debug("Received expected " + str(OpCode.MSG_MOVE_WORLDPORT_ACK))
+            LOG.debug("Received expected %s", OpCode.MSG_MOVE_WORLDPORT_ACK)
             del self.conn.shared_data["worldport_ack_pending"]
             return None, None
         else:
-            LOG.error("Received unexpected " + str(OpCode.MSG_MOVE_WORLDPORT_ACK))
+            LOG.error("Received unexpected %s", OpCode.MSG_MOVE_WORLDPORT_ACK)
             return self.conn.MAIN_ERROR_STATE, None
@@ -1,17 +1,18 @@
-import io
 from enum import Enum
 from struct import Struct
 
 from durator.common.account.managers import AccountSessionManager
 from durator.common.crypto.session_cipher import SessionCipher
 from durator.common.crypto.sha1 import sha1
-from durator.common.log import LOG
+from durator.common.log import get_logger
+from durator.common.networking.packet_reader import PacketReader
 from durator.config import CONFIG
 from durator.db.database import db_connection
 from durator.world.opcodes import OpCode
 from durator.world.world_connection_state import WorldConnectionState
 from durator.world.world_packet import WorldPacket
-from lib.utilities import read_cstring, read_struct
+
+LOG = get_logger("world")
 
 
 class AuthSessionResponseCode(Enum):
@@ -48,6 +49,7 @@ class AuthSessionHandler:
     PACKET_PART2_BIN = Struct("<I20s")
     RESPONSE_SUCC_BIN = Struct("<BIBI")
     RESPONSE_FAIL_BIN = Struct("<B")
+    RESPONSE_WAIT_QUEUE_BIN = Struct("<BI")
 
     def __init__(self, connection, packet):
         self.conn = connection
@@ -75,7 +77,7 @@ class AuthSessionHandler:
         self._setup_encryption()
 
         if self.build != int(CONFIG["general"]["build"]):
-            LOG.warning("Wrong build tried to auth to world server: {}".format(str(self.build)))
+            LOG.warning("Wrong build tried to auth to world server: %s", self.build)
             error_code = AuthSessionResponseCode.AUTH_VERSION_MISMATCH
             response = self._get_failure_packet(error_code)
             return self.conn.MAIN_ERROR_STATE, response
@@ -88,21 +90,30 @@ class AuthSessionHandler:
             return self.conn.MAIN_ERROR_STATE, response
 
         # Once the session cipher is up and the client is fully checked,
-        # accept the authentication and move on.
+        # accept the authentication and move on, unless the server is full.
+        future, position = self.conn.server.admission.request_admission(self.conn)
+        if position:
+            self.conn.defer(future, self._admit)
+            response = AuthSessionHandler.get_wait_queue_packet(position)
+            return WorldConnectionState.AUTH_WAIT_QUEUE, response
+
         LOG.debug("World server auth OK.")
         response = self._get_success_packet()
         return WorldConnectionState.AUTH_OK, response
 
+    def _admit(self, _):
+        LOG.debug("World server auth OK after waiting in queue.")
+        return WorldConnectionState.AUTH_OK, self._get_success_packet()
+
     def _parse_packet(self, packet):
-        packet_io = io.BytesIO(packet)
-        part1_data = read_struct(packet_io, self.PACKET_PART1_BIN)
+        reader = PacketReader(packet)
+        part1_data = reader.read_struct(self.PACKET_PART1_BIN)
         self.build = part1_data[0]
         self.unk = part1_data[1]
 
-        account_name_bytes = read_cstring(packet_io)
-        self.account_name = account_name_bytes.decode("ascii")
+        self.account_name = reader.read_cstring("ascii")
 
-        part2_data = read_struct(packet_io, self.PACKET_PART2_BIN)
+        part2_data = reader.read_struct(self.PACKET_PART2_BIN)
         self.client_seed = part2_data[0]
         self.client_hash = part2_data[1]
 
@@ -139,6 +150,11 @@ class AuthSessionHandler:
         )
         return WorldPacket(OpCode.SMSG_AUTH_RESPONSE, data)
 
+    @staticmethod
+    def get_wait_queue_packet(position):
+        data = AuthSessionHandler.RESPONSE_WAIT_QUEUE_BIN.pack(AuthSessionResponseCode.AUTH_WAIT_QUEUE.value, position)
+        return WorldPacket(OpCode.SMSG_AUTH_RESPONSE, data)
+
     def _get_failure_packet(self, error_code):
         data = self.RESPONSE_FAIL_BIN.pack(error_code.value)
         return WorldPacket(OpCode.SMSG_AUTH_RESPONSE, data)
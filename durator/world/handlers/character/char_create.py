@@ -1,13 +1,14 @@
-import io
 from enum import Enum
 from struct import Struct
 
-from durator.common.log import LOG
+from durator.common.log import get_logger
+from durator.common.networking.packet_reader import PacketReader
 from durator.world.game.character.constants import CharacterClass, CharacterGender, CharacterRace
 from durator.world.game.character.manager import CharacterManager
 from durator.world.opcodes import OpCode
 from durator.world.world_packet import WorldPacket
-from lib.utilities import read_cstring, read_struct
+
+LOG = get_logger("world")
 
 
 class CharCreateResponseCode(Enum):
@@ -53,16 +54,19 @@ class CharCreateHandler:
                 "facial_hair": self.char_features[4],
             },
         }
-        manager_code = CharacterManager.create_char(char_values)
+        db_executor = self.conn.server.db_executor
+        future = db_executor.submit(CharacterManager.create_char, char_values, key=self.conn)
+        self.conn.defer(future, self._get_deferred_response)
+        return None, None
 
-        packet = self._get_response_packet(manager_code)
+    def _get_deferred_response(self, future):
+        packet = self._get_response_packet(future.result())
         return None, packet
 
     def _parse_packet(self, packet):
-        packet_io = io.BytesIO(packet)
-        char_name_bytes = read_cstring(packet_io)
-        self.char_name = char_name_bytes.decode("utf8")
-        char_data = read_struct(packet_io, self.PACKET_CHAR_BIN)
+        reader = PacketReader(packet)
+        self.char_name = reader.read_cstring()
+        char_data = reader.read_struct(self.PACKET_CHAR_BIN)
 
         self.char_race = CharacterRace(char_data[0])
         self.char_class = CharacterClass(char_data[1])
@@ -77,7 +81,7 @@ class CharCreateHandler:
             2: CharCreateResponseCode.NAME_IN_USE,
             3: CharCreateResponseCode.ERROR,
         }.get(manager_code, 1)
-        LOG.debug("Character creation status: " + str(response_code.name))
+        LOG.debug("Character creation status: %s", response_code.name)
 
         response_data = self.RESPONSE_BIN.pack(response_code.value)
         return WorldPacket(OpCode.SMSG_CHAR_CREATE, response_data)
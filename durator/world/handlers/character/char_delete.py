@@ -1,11 +1,13 @@
 from enum import Enum
 from struct import Struct
 
-from durator.common.log import LOG
+from durator.common.log import get_logger
 from durator.world.game.character.manager import CharacterManager
 from durator.world.opcodes import OpCode
 from durator.world.world_packet import WorldPacket
 
+LOG = get_logger("world")
+
 
 class CharDeleteResponseCode(Enum):
 
@@ -24,13 +26,18 @@ class CharDeleteHandler:
 
     def process(self):
         guid = self.PACKET_BIN.unpack(self.packet)[0]
-        manager_code = CharacterManager.delete_char(guid)
-        packet = self._get_response_packet(manager_code)
+        db_executor = self.conn.server.db_executor
+        future = db_executor.submit(CharacterManager.delete_char, guid, key=self.conn)
+        self.conn.defer(future, self._get_deferred_response)
+        return None, None
+
+    def _get_deferred_response(self, future):
+        packet = self._get_response_packet(future.result())
         return None, packet
 
     def _get_response_packet(self, manager_code):
         response_code = {0: CharDeleteResponseCode.SUCCESS, 1: CharDeleteResponseCode.FAILED}.get(manager_code, 1)
-        LOG.debug("Character deletion status: " + str(response_code.name))
+        LOG.debug("Character deletion status: %s", response_code.name)
 
         response_data = self.RESPONSE_BIN.pack(response_code.value)
         return WorldPacket(OpCode.SMSG_CHAR_DELETE, response_data)
@@ -1,5 +1,4 @@
-from struct import Struct
-
+from durator.common.networking.packet_schema import CString, Fixed, PacketSchema, Repeat
 from durator.db.database import db_connection
 from durator.world.game.character.constants import CharacterEquipSlot
 from durator.world.opcodes import OpCode
@@ -8,74 +7,84 @@ from durator.world.world_packet import WorldPacket
 
 class CharEnumHandler:
 
+    # uint32 display, uint8 inventory type
+    CHAR_EQUIPMENT_SCHEMA = PacketSchema(Fixed("IB", "display_id", "inventory_type"))
+
     # ulong GUID, string name, uint8 race/class/gender,
     # uint8 skin/face/hairstyle/haircolor/facialhair, uint8 level,
     # uint32 zone, uint32 map, float x/y/z, uint32 guild, uint32 charflags?,
-    # uint8 firstlogin, uint32 petdisplay/petlevel/petfamily
-    CHAR_FMT = "<Q{name_len}s3B5BB2I3f2IB3I"
-    CHAR_EQUIPMENT_BIN = Struct("<IB")
+    # uint8 firstlogin, uint32 petdisplay/petlevel/petfamily,
+    # equipment entries
+    CHAR_SCHEMA = PacketSchema(
+        Fixed("Q", "guid"),
+        CString("name"),
+        Fixed("3B", "race", "class_id", "gender"),
+        Fixed("5B", "skin", "face", "hair_style", "hair_color", "facial_hair"),
+        Fixed("B", "level"),
+        Fixed("2I", "zone_id", "map_id"),
+        Fixed("3f", "pos_x", "pos_y", "pos_z"),
+        Fixed("2IB3I", "guild", "char_flags", "first_login", "pet_display", "pet_level", "pet_family"),
+        Repeat("equipment", CHAR_EQUIPMENT_SCHEMA),
+    )
 
-    RESPONSE_HEADER_BIN = Struct("<B")
+    # uint8 number of characters, characters
+    RESPONSE_SCHEMA = PacketSchema(Fixed("B", "num_chars"), Repeat("characters", CHAR_SCHEMA))
+
+    # One empty entry per not-bag item, and the first 16-slot bag.
+    EMPTY_EQUIPMENT = [{"display_id": 0, "inventory_type": 0}] * (
+        CharacterEquipSlot.TABARD.value - CharacterEquipSlot.HEAD.value + 2
+    )
 
     def __init__(self, connection, packet):
         self.conn = connection
         self.packet = packet
 
-    @db_connection
     def process(self):
-        num_chars = 0
-        characters_data = []
-        for character in self.conn.account.chars:
-            character_data = self._get_character_data(character)
-            characters_data.append(character_data)
-            num_chars += 1
-        characters_data = b"".join(characters_data)
+        db_executor = self.conn.server.db_executor
+        future = db_executor.submit(self._get_characters_packet, key=self.conn)
+        self.conn.defer(future, self._get_deferred_response)
+        return None, None
 
-        packet = self._get_packet(num_chars, characters_data)
-        return None, packet
+    def _get_deferred_response(self, future):
+        return None, future.result()
 
-    def _get_character_data(self, character):
-        """Return the character data needed for this character. It includes a
+    @db_connection
+    def _get_characters_packet(self):
+        """Load the account characters and return the response packet. It is
+        run by the DB executor."""
+        characters = [self._get_character_values(character) for character in self.conn.account.chars]
+        return self._get_packet(characters)
+
+    def _get_character_values(self, character):
+        """Return the values of CHAR_SCHEMA for this character. It includes a
         lot of general information, one equipment entry per not-bag item, and
         add the first 16-slot bag after that, because why not."""
-        name_bytes = character.name.encode("utf8") + b"\x00"
-        char_struct_fmt = self.CHAR_FMT.format(name_len=len(name_bytes))
-        char_struct = Struct(char_struct_fmt)
-        char_data = char_struct.pack(
-            character.guid,
-            name_bytes,
-            character.race,
-            character.class_id,
-            character.gender,
-            character.features.skin,
-            character.features.face,
-            character.features.hair_style,
-            character.features.hair_color,
-            character.features.facial_hair,
-            character.stats.level,
-            character.position.zone_id,
-            character.position.map_id,
-            character.position.pos_x,
-            character.position.pos_y,
-            character.position.pos_z,
-            0,  # guild
-            0,  # char flags?
-            0,  # first login
-            0,  # pet display
-            0,  # pet level
-            0,  # pet family
-        )
-
-        char_equipments = []
-        for _ in range(CharacterEquipSlot.HEAD.value, CharacterEquipSlot.TABARD.value + 1):
-            equipment_data = self.CHAR_EQUIPMENT_BIN.pack(0, 0)
-            char_equipments.append(equipment_data)
-        first_bag_data = self.CHAR_EQUIPMENT_BIN.pack(0, 0)
-        char_equipments.append(first_bag_data)
-        char_equipment_data = b"".join(char_equipments)
-
-        return char_data + char_equipment_data
+        return {
+            "guid": character.guid,
+            "name": character.name,
+            "race": character.race,
+            "class_id": character.class_id,
+            "gender": character.gender,
+            "skin": character.features.skin,
+            "face": character.features.face,
+            "hair_style": character.features.hair_style,
+            "hair_color": character.features.hair_color,
+            "facial_hair": character.features.facial_hair,
+            "level": character.stats.level,
+            "zone_id": character.position.zone_id,
+            "map_id": character.position.map_id,
+            "pos_x": character.position.pos_x,
+            "pos_y": character.position.pos_y,
+            "pos_z": character.position.pos_z,
+            "guild": 0,
+            "char_flags": 0,
+            "first_login": 0,
+            "pet_display": 0,
+            "pet_level": 0,
+            "pet_family": 0,
+            "equipment": self.EMPTY_EQUIPMENT,
+        }
 
-    def _get_packet(self, num_chars, data):
-        response_data = self.RESPONSE_HEADER_BIN.pack(num_chars) + data
+    def _get_packet(self, characters):
+        response_data = self.RESPONSE_SCHEMA.pack({"num_chars": len(characters), "characters": characters})
         return WorldPacket(OpCode.SMSG_CHAR_ENUM, response_data)
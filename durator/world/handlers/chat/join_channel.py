@@ -1,8 +1,7 @@
-import io
 from struct import Struct
 
+from durator.common.networking.packet_reader import PacketReader
 from durator.world.game.chat.notification import Notification, NotificationType
-from lib.utilities import read_cstring
 
 
 class JoinChannelHandler:
@@ -24,12 +23,9 @@ class JoinChannelHandler:
         return None, response_packet
 
     def _parse_packet(self, packet):
-        packet_io = io.BytesIO(packet)
-        channel_name_bytes = read_cstring(packet_io)
-        password_bytes = read_cstring(packet_io)
-
-        self.channel_name = channel_name_bytes.decode("utf8")
-        self.password = password_bytes.decode("utf8")
+        reader = PacketReader(packet)
+        self.channel_name = reader.read_cstring()
+        self.password = reader.read_cstring()
 
     def _try_join_channel(self):
         join_result_code = self.conn.server.chat_manager.join_channel(self.conn.player, self.channel_name, self.password)
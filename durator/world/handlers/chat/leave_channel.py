@@ -1,3 +1,4 @@
+from durator.common.networking.packet_reader import PacketReader
 from durator.world.game.chat.notification import Notification, NotificationType
 
 
@@ -16,7 +17,7 @@ class LeaveChannelHandler:
         return None, response_packet
 
     def _parse_packet(self, packet):
-        self.channel_name = packet[:-1].decode("utf8")
+        self.channel_name = PacketReader(packet).read_cstring()
 
     def _try_leave_channel(self):
         leave_result_code = self.conn.server.chat_manager.leave_channel(self.conn.player, self.channel_name)
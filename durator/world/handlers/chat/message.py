@@ -1,6 +1,8 @@
 from struct import Struct
 
-from durator.world.game.chat.message import ChatMessageType, ClientChatMessage
+from durator.world.game.chat.language import Language
+from durator.world.game.chat.manager import MESSAGE_THROTTLED
+from durator.world.game.chat.message import ChatMessageType, ClientChatMessage, ServerChatMessage
 from durator.world.game.chat.notification import Notification, NotificationType
 
 
@@ -8,6 +10,7 @@ class MessageHandler:
     """Handle basic CMSG_MESSAGECHAT packets."""
 
     PACKET_PART1_BIN = Struct("<2I")
+    THROTTLED_TEXT = "You are sending messages too fast."
 
     def __init__(self, connection, packet):
         self.conn = connection
@@ -25,6 +28,8 @@ class MessageHandler:
         if self.message.message_type == ChatMessageType.CHANNEL:
             response_packet = self._get_channel_response_packet(result_code)
             return None, response_packet
+        elif result_code == MESSAGE_THROTTLED:
+            return None, self._get_throttled_packet()
         else:
             return None, None
 
@@ -38,6 +43,7 @@ class MessageHandler:
             2: NotificationType.INVALID_NAME,
             3: None,
             4: NotificationType.MUTED,
+            MESSAGE_THROTTLED: NotificationType.THROTTLED,
         }[result_code]
 
         if notif_type is None:
@@ -48,3 +54,12 @@ class MessageHandler:
 
         notification = Notification(notif_type, channel)
         return notification.to_packet()
+
+    def _get_throttled_packet(self):
+        """Channel notifications need a channel, so a suppressed local
+        message is reported with a system message instead."""
+        server_message = ServerChatMessage()
+        server_message.message_type = ChatMessageType.SYSTEM
+        server_message.language = Language.UNIVERSAL
+        server_message.content = self.THROTTLED_TEXT
+        return server_message.to_packet()
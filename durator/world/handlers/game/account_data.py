@@ -1,9 +1,12 @@
-""" Handler for CMSG_UPDATE_ACCOUNT_DATA (CMSG_REQUEST_ACCOUNT_DATA later?) """
+""" Handlers for CMSG_UPDATE_ACCOUNT_DATA and CMSG_REQUEST_ACCOUNT_DATA. """
 
 from struct import Struct
 
 from durator.common.account.account_data import AccountDataType
 from durator.common.account.managers import AccountDataManager
+from durator.common.networking.packet_reader import PacketReader
+from durator.world.opcodes import OpCode
+from durator.world.world_packet import WorldPacket
 
 
 class UpdateAccountDataHandler:
@@ -24,13 +27,53 @@ class UpdateAccountDataHandler:
         return None, None
 
     def _parse_packet(self, packet):
-        header_size = self.HEADER_BIN.size
-        header, content = packet[:header_size], packet[header_size:]
-        data_type_value, decomp_size = self.HEADER_BIN.unpack(header)
+        reader = PacketReader(packet)
+        data_type_value, decomp_size = reader.read_struct(self.HEADER_BIN)
 
         self.data_type = AccountDataType(data_type_value)
         self.decompressed_size = decomp_size
-        self.zlib_data = content
+        self.zlib_data = reader.read_remaining()
 
     def _update_account_data(self):
-        AccountDataManager.set_account_data(self.conn.account, self.data_type, self.zlib_data)
+        """Save the data from the DB executor, nothing is sent back."""
+        db_executor = self.conn.server.db_executor
+        db_executor.submit(
+            AccountDataManager.set_account_data, self.conn.account, self.data_type, self.zlib_data, key=self.conn
+        )
+
+
+class RequestAccountDataHandler:
+    """Send back the zlib data stored for the requested account data type. It
+    is usually served from the account data cache, loaded at player login."""
+
+    PACKET_BIN = Struct("<I")
+    RESPONSE_HEADER_BIN = Struct("<2I")
+
+    def __init__(self, connection, packet):
+        self.conn = connection
+        self.packet = packet
+
+        self.data_type = None
+
+    def process(self):
+        self.data_type = AccountDataType(self.PACKET_BIN.unpack(self.packet)[0])
+
+        account_data = AccountDataManager.get_cached_account_data(self.conn.account, self.data_type)
+        if account_data is not None:
+            return None, self._get_response_packet(account_data)
+
+        db_executor = self.conn.server.db_executor
+        future = db_executor.submit(
+            AccountDataManager.get_account_data, self.conn.account, self.data_type, key=self.conn
+        )
+        self.conn.defer(future, self._get_deferred_response)
+        return None, None
+
+    def _get_deferred_response(self, future):
+        return None, self._get_response_packet(future.result())
+
+    def _get_response_packet(self, account_data):
+        response_data = (
+            self.RESPONSE_HEADER_BIN.pack(self.data_type.value, account_data.decompressed_size) + account_data.zlib_content
+        )
+        return WorldPacket(OpCode.SMSG_UPDATE_ACCOUNT_DATA, response_data)
@@ -1,7 +1,7 @@
 from struct import Struct
 
 from durator.common.account.managers import AccountDataManager
-from durator.common.log import LOG
+from durator.common.log import get_logger
 from durator.db.database import db_connection
 from durator.world.game.character.character_data import CharacterData
 from durator.world.game.player_spawn_packet import PlayerSpawnPacket
@@ -10,6 +10,8 @@ from durator.world.opcodes import OpCode
 from durator.world.world_connection_state import WorldConnectionState
 from durator.world.world_packet import WorldPacket
 
+LOG = get_logger("world")
+
 
 class PlayerLoginHandler:
     """Handle the player entering in world."""
@@ -35,15 +37,36 @@ class PlayerLoginHandler:
         self.conn = connection
         self.packet = packet
 
+        self.guid = 0
+        self.account_data_md5s = []
+
     def process(self):
-        guid = self.PACKET_BIN.unpack(self.packet)[0]
-        character_data = self._get_checked_character(guid)
+        self.guid = self.PACKET_BIN.unpack(self.packet)[0]
+        db_executor = self.conn.server.db_executor
+        future = db_executor.submit(self._load_player, key=self.conn)
+        self.conn.defer(future, self._enter_world)
+        return None, None
+
+    def _load_player(self):
+        """Load from the database the player object and the account data
+        MD5s, or return None if the character can't be used. It is run by the
+        DB executor."""
+        character_data = self._get_checked_character(self.guid)
         if character_data is None:
-            LOG.warning("Account {} tried to illegally use character {}".format(self.conn.account.name, guid))
+            return None
+        player = self.conn.server.object_manager.load_player(character_data)
+        account_data_md5s = AccountDataManager.get_account_data_md5(self.conn.account)
+        return player, account_data_md5s
+
+    def _enter_world(self, future):
+        loaded_data = future.result()
+        if loaded_data is None:
+            LOG.warning("Account %s tried to illegally use character %d", self.conn.account.name, self.guid)
             return self.conn.MAIN_ERROR_STATE, None
 
-        # Now that we have the character data, spawn a new player object.
-        self.conn.set_player(character_data)
+        # Now that we have the player data, spawn the player object in world.
+        player, self.account_data_md5s = loaded_data
+        self.conn.set_player(player)
 
         # Finally, send the packets necessary to let the client get in world.
         # Only the tutorial flags and update object packets are really necessary
@@ -85,8 +108,7 @@ class PlayerLoginHandler:
 
     def _get_account_data_md5_packet(self):
         """Send this dummy packet to trigger account data sync."""
-        md5s = AccountDataManager.get_account_data_md5(self.conn.account)
-        md5s_data = b"".join(md5s)
+        md5s_data = b"".join(self.account_data_md5s)
         return WorldPacket(OpCode.SMSG_ACCOUNT_DATA_MD5, md5s_data)
 
     def _get_tutorial_flags_packet(self):
@@ -1,9 +1,12 @@
 from struct import Struct
 
-from durator.common.log import LOG
+from durator.common.log import get_logger
+from durator.common.networking.packet_schema import CString, Fixed, PacketSchema
 from durator.world.opcodes import OpCode
 from durator.world.world_packet import WorldPacket
 
+LOG = get_logger("world")
+
 
 class NameQueryHandler:
     """Send name associated to a GUID to the client."""
@@ -15,7 +18,11 @@ class NameQueryHandler:
     # uint32 race
     # uint32 gender
     # uint32 class
-    RESPONSE_FMT = "<Q{name_len}s3I"
+    RESPONSE_SCHEMA = PacketSchema(
+        Fixed("Q", "guid"),
+        CString("name"),
+        Fixed("3I", "race", "gender", "class_id"),
+    )
 
     def __init__(self, connection, packet):
         self.conn = connection
@@ -25,12 +32,12 @@ class NameQueryHandler:
 
     def process(self):
         self._parse_packet(self.packet)
-        LOG.debug(f"NameQuery: GUID {self.guid:X}")
+        LOG.debug("NameQuery: GUID %X", self.guid)
 
         object_manager = self.conn.server.object_manager
         unit = object_manager.get_player(self.guid)
         if unit is None:
-            LOG.warning("NameQueryHandler: couldn't find player {:X}".format(self.guid))
+            LOG.warning("NameQueryHandler: couldn't find player %X", self.guid)
             return None, None
 
         response = self._get_response_packet(unit)
@@ -40,8 +47,13 @@ class NameQueryHandler:
         self.guid = self.PACKET_BIN.unpack(packet)[0]
 
     def _get_response_packet(self, unit):
-        name_bytes = unit.name.encode("utf8") + b"\x00"
-        name_len = len(name_bytes)
-        response_struct = Struct(self.RESPONSE_FMT.format(name_len=name_len))
-        response_data = response_struct.pack(self.guid, name_bytes, unit.get_race(), unit.get_gender(), unit.get_class())
+        response_data = self.RESPONSE_SCHEMA.pack(
+            {
+                "guid": self.guid,
+                "name": unit.name,
+                "race": unit.get_race(),
+                "gender": unit.get_gender(),
+                "class_id": unit.get_class(),
+            }
+        )
         return WorldPacket(OpCode.SMSG_NAME_QUERY_RESPONSE, response_data)
@@ -10,14 +10,9 @@ class TimeQueryHandler:
 
     RESPONSE_BIN = Struct("<I")
 
-    def __init__(self, connection, packet):
-        self.conn = connection
-        self.packet = packet
-
-        self.guid = -1
-
-    def process(self):
+    @staticmethod
+    def handle(connection, packet):
         seconds = int(time.time())
-        response_data = self.RESPONSE_BIN.pack(seconds)
+        response_data = TimeQueryHandler.RESPONSE_BIN.pack(seconds)
         response = WorldPacket(OpCode.SMSG_QUERY_TIME_RESPONSE, response_data)
         return None, response
@@ -1,9 +1,6 @@
 class NopHandler:
     """Acknowledge but ignore that packet."""
 
-    def __init__(self, connection, packet):
-        self.conn = connection
-        self.packet = packet
-
-    def process(self):
+    @staticmethod
+    def handle(connection, packet):
         return None, None
@@ -9,10 +9,7 @@ class PingHandler:
 
     PACKET_BIN = Struct("<I")
 
-    def __init__(self, connection, packet):
-        self.conn = connection
-        self.packet = packet
-
-    def process(self):
-        pong_packet = WorldPacket(OpCode.SMSG_PONG, self.packet)
+    @staticmethod
+    def handle(connection, packet):
+        pong_packet = WorldPacket(OpCode.SMSG_PONG, packet)
         return None, pong_packet
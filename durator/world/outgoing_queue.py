@@ -0,0 +1,137 @@
+""" Bounded outgoing packet queue of a world connection.
+
+Packets for a client are queued by other threads (broadcasts) and sent by the
+connection thread. Packets have a priority class: control packets are sent
+first, then chat, then movement. Chat and movement classes are bounded, the
+oldest packets being dropped when they are full, and a movement update of an
+object replaces the previous one still queued for that object, as only the
+latest position matters. Control packets can't be dropped without breaking
+the session, so when their class is full the queue is marked as overflowed
+and the connection should be closed.
+"""
+
+import collections
+import itertools
+import threading
+import time
+from enum import Enum
+
+from durator.config import CONFIG
+
+
+class PacketPriority(Enum):
+    """Priority classes, in the order they are sent."""
+
+    CONTROL = 0
+    CHAT = 1
+    MOVEMENT = 2
+
+
+class OutgoingQueue:
+    """Thread-safe priority queue of WorldPackets for one client.
+
+    Attributes:
+    - queues: one OrderedDict per priority, mapping a coalesce key (or a
+        unique key) to a packet
+    - max_sizes: maximum number of packets per priority
+    - high_water: total depth above which the client is considered slow
+    - high_water_since: time when the queue went over high_water, or None
+    - overflowed: True if a control packet could not be queued
+    - num_dropped, num_replaced: counters per priority
+    - max_depth: highest total depth seen
+    """
+
+    MAX_SIZES = {
+        PacketPriority.CONTROL: int(CONFIG["world"].get("outgoing_queue_size_control", "1024")),
+        PacketPriority.CHAT: int(CONFIG["world"].get("outgoing_queue_size_chat", "256")),
+        PacketPriority.MOVEMENT: int(CONFIG["world"].get("outgoing_queue_size_movement", "256")),
+    }
+    HIGH_WATER = int(CONFIG["world"].get("outgoing_queue_high_water", "512"))
+
+    def __init__(self, max_sizes=None, high_water=None):
+        self.max_sizes = max_sizes or self.MAX_SIZES
+        self.high_water = high_water or self.HIGH_WATER
+        self.queues = {priority: collections.OrderedDict() for priority in PacketPriority}
+        self.lock = threading.Lock()
+        self.unique_keys = itertools.count()
+
+        self.depth = 0
+        self.high_water_since = None
+        self.overflowed = False
+        self.num_dropped = {priority: 0 for priority in PacketPriority}
+        self.num_replaced = 0
+        self.max_depth = 0
+
+    def put(self, packet, priority=PacketPriority.CONTROL, coalesce_key=None):
+        """Queue that packet. If coalesce_key is given, e.g. an object GUID
+        for movement updates, a queued packet with the same key and priority
+        is replaced, keeping its place in queue."""
+        with self.lock:
+            queue = self.queues[priority]
+            if coalesce_key is not None and coalesce_key in queue:
+                queue[coalesce_key] = packet
+                self.num_replaced += 1
+                return
+
+            if len(queue) >= self.max_sizes[priority]:
+                if priority is PacketPriority.CONTROL:
+                    self.overflowed = True
+                    self.num_dropped[priority] += 1
+                    return
+                queue.popitem(last=False)
+                self.num_dropped[priority] += 1
+                self.depth -= 1
+
+            key = coalesce_key if coalesce_key is not None else ("unique", next(self.unique_keys))
+            queue[key] = packet
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+            if self.depth > self.high_water and self.high_water_since is None:
+                self.high_water_since = time.monotonic()
+
+    def get_all(self):
+        """Remove and return all queued packets, by priority order."""
+        with self.lock:
+            packets = []
+            for queue in self.queues.values():
+                packets.extend(queue.values())
+                queue.clear()
+            self.depth = 0
+            self.high_water_since = None
+            return packets
+
+    def get(self):
+        """Remove and return the next packet by priority order, or None if
+        the queue is empty."""
+        with self.lock:
+            for queue in self.queues.values():
+                if queue:
+                    packet = queue.popitem(last=False)[1]
+                    self.depth -= 1
+                    if self.depth <= self.high_water:
+                        self.high_water_since = None
+                    return packet
+            return None
+
+    def empty(self):
+        return self.depth == 0
+
+    def get_high_water_time(self):
+        """Return for how long (seconds) the queue has been over its high
+        water mark, 0.0 if it is not."""
+        high_water_since = self.high_water_since
+        if high_water_since is None:
+            return 0.0
+        return time.monotonic() - high_water_since
+
+    def get_stats(self):
+        """Return a dict with depth gauges and drop counters."""
+        with self.lock:
+            return {
+                "depth": self.depth,
+                "max_depth": self.max_depth,
+                "depth_per_priority": {priority.name: len(queue) for priority, queue in self.queues.items()},
+                "dropped": {priority.name: count for priority, count in self.num_dropped.items()},
+                "replaced": self.num_replaced,
+                "overflowed": self.overflowed,
+            }
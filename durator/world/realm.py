@@ -1,10 +1,18 @@
 from enum import Enum
-from struct import Struct
+
+from durator.common.networking.packet_schema import CString, Fixed, PacketSchema
 
 
 class Realm:
 
-    REALM_PACKET_FMT = "<IB{name_len}s{addr_len}sf3B"
+    # uint32 realm ID, uint8 flags, string name, string address,
+    # float population, uint8 num chars/timezone/unknown
+    REALM_PACKET_SCHEMA = PacketSchema(
+        Fixed("IB", "realm_id", "flags"),
+        CString("name", "ascii"),
+        CString("address", "ascii"),
+        Fixed("f3B", "population", "num_chars", "timezone", "unknown"),
+    )
 
     def __init__(self, name, address, realm_id):
         self.name = name
@@ -14,20 +22,17 @@ class Realm:
     def get_state_packet(self, flags, population):
         """Return a RealmInfo_S packet describing the realm state. It starts
         with a uint8 of its size."""
-        name_bytes = self.name.encode("ascii") + b"\x00"
-        address_bytes = self.address.encode("ascii") + b"\x00"
-
-        realm_struct_format = Realm.REALM_PACKET_FMT.format(name_len=len(name_bytes), addr_len=len(address_bytes))
-        realm_struct = Struct(realm_struct_format)
-        packet = realm_struct.pack(
-            self.realm_id.value,
-            flags.value,
-            name_bytes,
-            address_bytes,
-            population.as_float(),
-            0,  # num_chars
-            0,  # timezone ?
-            0,  # unknown
+        packet = Realm.REALM_PACKET_SCHEMA.pack(
+            {
+                "realm_id": self.realm_id.value,
+                "flags": flags.value,
+                "name": self.name,
+                "address": self.address,
+                "population": population.as_float(),
+                "num_chars": 0,
+                "timezone": 0,  # ?
+                "unknown": 0,
+            }
         )
 
         size_bytes = int.to_bytes(len(packet), 1, "little")
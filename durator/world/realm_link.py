@@ -0,0 +1,91 @@
+import socket
+import threading
+
+from durator.common.log import get_logger
+from durator.config import CONFIG
+
+LOG = get_logger("world")
+
+
+class RealmLink:
+    """Long-lived connection from the world server to the login server.
+
+    The realm state (a RealmInfo_S packet prefixed by its uint8 size) is sent
+    when the link is opened and every time it changes; in between, keepalives
+    (a zero size byte) are sent every KEEPALIVE_INTERVAL seconds, so the login
+    server can tell a dead realm within a few seconds. If the link breaks, it
+    is opened again after RECONNECT_DELAY seconds.
+    """
+
+    KEEPALIVE_INTERVAL = float(CONFIG["login"]["realm_heartbeat_time"])
+    RECONNECT_DELAY = 5
+    KEEPALIVE = b"\x00"
+
+    def __init__(self, server, address=None):
+        self.server = server
+        self.address = address or (CONFIG["login"]["realm_conn_hostname"], int(CONFIG["login"]["realm_conn_port"]))
+        self.socket = None
+        self.state_changed = threading.Event()
+        self.shutdown_flag = threading.Event()
+        self.num_state_updates = 0
+        self.num_keepalives = 0
+
+    def run(self):
+        """Keep the link open and up to date until stop is called; this has
+        to run in another thread."""
+        while not self.shutdown_flag.is_set():
+            if self.socket is None and not self._open():
+                self.shutdown_flag.wait(self.RECONNECT_DELAY)
+                continue
+
+            state_changed = self.state_changed.wait(self.KEEPALIVE_INTERVAL)
+            if self.shutdown_flag.is_set():
+                break
+            if state_changed:
+                self.state_changed.clear()
+                self._send_state()
+            else:
+                self._send(self.KEEPALIVE)
+                self.num_keepalives += 1
+        self._close()
+
+    def stop(self):
+        self.shutdown_flag.set()
+        self.state_changed.set()
+
+    def push_state(self):
+        """Notify the link that the realm state changed, so it is sent now."""
+        self.state_changed.set()
+
+    def _open(self):
+        """Connect to the login server and send the current realm state.
+        Return False if it failed."""
+        self.socket = socket.socket()
+        try:
+            self.socket.connect(self.address)
+        except OSError as exc:
+            LOG.error("Couldn't join login server! %s", exc)
+            self.socket = None
+            return False
+        LOG.debug("Realm link with login server opened.")
+        self.state_changed.clear()
+        self._send_state()
+        return self.socket is not None
+
+    def _send_state(self):
+        self._send(self.server.get_realm_state_packet())
+        self.num_state_updates += 1
+
+    def _send(self, data):
+        if self.socket is None:
+            return
+        try:
+            self.socket.sendall(data)
+        except OSError as exc:
+            LOG.warning("Realm link with login server lost: %s", exc)
+            self._close()
+
+    def _close(self):
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
@@ -1,10 +1,12 @@
 import os
-import queue
+import socket
 from struct import Struct
 
-from durator.common.account.managers import AccountSessionManager
-from durator.common.log import LOG
-from durator.common.networking.connection_automaton import ConnectionAutomaton
+from durator.common.account.managers import AccountDataManager, AccountSessionManager
+from durator.common.log import get_logger
+from durator.common.networking.connection_automaton import ThreadedConnectionAutomaton
+from durator.common.networking.packet_capture import DIRECTION_RECEIVED, DIRECTION_SENT
+from durator.common.networking.rate_limit import RateLimit
 from durator.config import CONFIG
 from durator.world.handlers.ack.move_worldport import MoveWorldportAckHandler
 from durator.world.handlers.auth_session import AuthSessionHandler
@@ -14,7 +16,7 @@ from durator.world.handlers.character.char_enum import CharEnumHandler
 from durator.world.handlers.chat.join_channel import JoinChannelHandler
 from durator.world.handlers.chat.leave_channel import LeaveChannelHandler
 from durator.world.handlers.chat.message import MessageHandler
-from durator.world.handlers.game.account_data import UpdateAccountDataHandler
+from durator.world.handlers.game.account_data import RequestAccountDataHandler, UpdateAccountDataHandler
 from durator.world.handlers.game.login import PlayerLoginHandler
 from durator.world.handlers.game.logout import LogoutRequestHandler
 from durator.world.handlers.game.movement import MovementHandler
@@ -24,17 +26,22 @@ from durator.world.handlers.game.zone_update import ZoneUpdateHandler
 from durator.world.handlers.nop import NopHandler
 from durator.world.handlers.ping import PingHandler
 from durator.world.opcodes import OpCode
+from durator.world.outgoing_queue import OutgoingQueue
 from durator.world.world_connection_state import WorldConnectionState
 from durator.world.world_packet import WorldPacket, WorldPacketReceiver
 
+LOG = get_logger("world")
 
-class WorldConnection(ConnectionAutomaton):
+
+class WorldConnection(ThreadedConnectionAutomaton):
     """Handle the communication between a client and the world server.
 
     Attributes:
     - world_packet_receiver: object that helps with world packet reception
-    - outgoing_queue: a thread-safe queue with messages for that client,
-        e.g. chat messages from other players.
+    - outgoing_queue: a thread-safe OutgoingQueue with messages for that
+        client, e.g. chat messages from other players.
+    - send_buffer: bytes of sent packets that the socket could not take yet;
+        while it is not empty, packets stay in outgoing_queue.
     - shared_data: dict, holds misc temporary values that can be of use for
         several handlers; anything living longer than a few seconds should
         probably be stored somewhere else.
@@ -50,6 +57,7 @@ class WorldConnection(ConnectionAutomaton):
     LEGAL_OPS = {
         WorldConnectionState.INIT: [OpCode.CMSG_AUTH_SESSION],
         WorldConnectionState.ERROR: [],
+        WorldConnectionState.AUTH_WAIT_QUEUE: [],
         WorldConnectionState.AUTH_OK: [
             OpCode.CMSG_CHAR_ENUM,
             OpCode.CMSG_CHAR_CREATE,
@@ -95,6 +103,7 @@ class WorldConnection(ConnectionAutomaton):
         OpCode.CMSG_PING: PingHandler,
         OpCode.CMSG_AUTH_SESSION: AuthSessionHandler,
         OpCode.CMSG_ZONEUPDATE: ZoneUpdateHandler,
+        OpCode.CMSG_REQUEST_ACCOUNT_DATA: RequestAccountDataHandler,
         OpCode.CMSG_UPDATE_ACCOUNT_DATA: UpdateAccountDataHandler,
     }
 
@@ -102,7 +111,26 @@ class WorldConnection(ConnectionAutomaton):
     END_STATES = [WorldConnectionState.ERROR]
     MAIN_ERROR_STATE = WorldConnectionState.ERROR
 
+    RATE_LIMITED_OPS = {
+        **{
+            opcode: "movement"
+            for opcode in OP_HANDLERS
+            if opcode.name.startswith("MSG_MOVE_") and opcode is not OpCode.MSG_MOVE_WORLDPORT_ACK
+        },
+        OpCode.CMSG_MESSAGECHAT: "chat",
+        OpCode.CMSG_NAME_QUERY: "query",
+        OpCode.CMSG_QUERY_TIME: "query",
+        OpCode.CMSG_JOIN_CHANNEL: "channel",
+        OpCode.CMSG_LEAVE_CHANNEL: "channel",
+    }
+    RATE_LIMITS = {
+        op_class: RateLimit.from_string(CONFIG["world"]["rate_limit_" + op_class])
+        for op_class in set(RATE_LIMITED_OPS.values())
+        if CONFIG["world"].get("rate_limit_" + op_class)
+    }
+
     RECV_TIMEOUT = float(CONFIG["world"]["recv_timeout"])
+    SLOW_CLIENT_TIMEOUT = float(CONFIG["world"].get("slow_client_timeout", "10"))
 
     def __init__(self, server, connection):
         super().__init__(connection)
@@ -110,7 +138,9 @@ class WorldConnection(ConnectionAutomaton):
         self.socket.settimeout(self.RECV_TIMEOUT)
 
         self.world_packet_receiver = WorldPacketReceiver(self.socket)
-        self.outgoing_queue = queue.Queue()
+        self.outgoing_queue = OutgoingQueue()
+        self.send_buffer = bytearray()
+        self.capture_id = server.packet_capture.new_connection_id()
         self.shared_data = {}
 
         self.account = None
@@ -125,17 +155,46 @@ class WorldConnection(ConnectionAutomaton):
     def _recv_packet(self):
         try:
             packet = self.world_packet_receiver.get_next_packet()
+            if packet is not None:
+                opcode_value = packet.opcode._value_ if packet.opcode is not None else None
+                self._count_packet(DIRECTION_RECEIVED, opcode_value, len(packet.data))
+                if self.server.packet_capture.enabled:
+                    self._capture_packet(DIRECTION_RECEIVED, packet)
             return packet
         except ConnectionResetError:
-            LOG.info("Lost connection with " + self.account.name + ".")
+            LOG.info("Lost connection with %s.", self.account.name)
             return None
 
     def _parse_packet(self, packet):
         return packet.opcode, packet.data
 
     def send_packet(self, world_packet):
+        """Encrypt and send that packet. What the socket can't take now stays
+        in send_buffer and is sent first on the next loops, so a client that
+        stops reading does not block nor break the connection."""
         ready_packet = world_packet.to_socket(self.session_cipher)
-        self.socket.sendall(ready_packet)
+        self._count_packet(DIRECTION_SENT, world_packet.opcode._value_, len(world_packet.data))
+        if self.server.packet_capture.enabled:
+            self._capture_packet(DIRECTION_SENT, world_packet)
+        self.send_buffer += ready_packet
+        self._flush_send_buffer()
+
+    def _flush_send_buffer(self):
+        """Send as much of send_buffer as the socket takes, waiting at most
+        the socket timeout for it to be writable. Return True if it is empty.
+        Other errors than the timeout (e.g. connection reset) are raised."""
+        while self.send_buffer:
+            try:
+                num_sent = self.socket.send(self.send_buffer)
+            except socket.timeout:
+                return False
+            del self.send_buffer[:num_sent]
+        return True
+
+    def _capture_packet(self, direction, world_packet):
+        opcode_value = world_packet.opcode.value if world_packet.opcode is not None else None
+        account_name = self.account.name if self.account else None
+        self.server.packet_capture.capture(direction, self.capture_id, opcode_value, world_packet.data, account_name)
 
     def _actions_before_main_loop(self):
         LOG.debug("Sending auth challenge to setup session cipher.")
@@ -150,30 +209,51 @@ class WorldConnection(ConnectionAutomaton):
         self.send_packet(packet)
 
     def _actions_at_loop_begin(self):
-        while not self.outgoing_queue.empty():
-            try:
-                packet = self.outgoing_queue.get(block=False)
-            except queue.Empty:
+        if self.outgoing_queue.overflowed or self.outgoing_queue.get_high_water_time() > self.SLOW_CLIENT_TIMEOUT:
+            LOG.warning("WorldConnection: client too slow, disconnecting: %s", self.outgoing_queue.get_stats())
+            self.state = self.MAIN_ERROR_STATE
+            return
+        try:
+            # Packets are taken from the queue only while the socket takes
+            # them, so that the queue limits and coalescing apply to a slow
+            # client, until its high water time is over.
+            if not self._flush_send_buffer():
                 return
-            self.send_packet(packet)
+            while not self.send_buffer:
+                packet = self.outgoing_queue.get()
+                if packet is None:
+                    return
+                self.send_packet(packet)
+        except OSError as exc:
+            LOG.warning("WorldConnection: could not send queued packets: %s", exc)
+            self.state = self.MAIN_ERROR_STATE
 
     def _actions_after_main_loop(self):
         LOG.debug("WorldConnection: session ended.")
+        if self.rate_limiter is not None and self.rate_limiter.get_stats():
+            LOG.info("WorldConnection: rate limited packets: %s", self.rate_limiter.get_stats())
         if self.account and self.session_cipher:
             AccountSessionManager.delete_session(self.account)
+            AccountDataManager.forget_account_data(self.account)
         if self.player:
             self.unset_player()
+        self.server.admission.release(self)
+        self.server.world_connections.remove(self)
 
-        with self.server.world_connections_lock:
-            self.server.world_connections.remove(self)
+    def _on_state_change(self, old_state, new_state):
+        self.server.world_connections.update_state(self, old_state, new_state)
 
-    def set_player(self, char_data):
-        """Ask the ObjectManager to create a Player object with the char_data
-        from the database."""
-        self.player = self.server.object_manager.add_player(char_data)
+    def set_player(self, player):
+        """Add to the world a Player object, previously loaded from the
+        database by the ObjectManager."""
+        self.server.object_manager.add_player(player)
+        self.player = player
+        self.server.world_connections.set_player_guid(self, player.guid)
 
     def unset_player(self):
         """Transfer the Player data back to the database, after a logout or
         after the connection has been closed."""
+        self.server.world_connections.unset_player_guid(self)
+        self.server.chat_manager.leave_all_channels(self.player.guid)
         self.server.object_manager.remove_player(self.player.guid)
         self.player = None
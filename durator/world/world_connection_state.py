@@ -9,3 +9,4 @@ class WorldConnectionState(Enum):
     ERROR = 1  # End state
     AUTH_OK = 2  # Session cipher is up, client is at char screen
     IN_WORLD = 3  # Player is in world
+    AUTH_WAIT_QUEUE = 4  # Session cipher is up, client waits for a free slot
@@ -2,10 +2,11 @@ import traceback
 from struct import Struct
 
 from durator.common.crypto.session_cipher import SessionCipher
-from durator.common.log import LOG
-from durator.config import DEBUG
+from durator.common.log import get_logger
+from durator.common.networking.opcode_table import OpcodeTable
 from durator.world.opcodes import OpCode
-from lib.utilities import get_data_dump as dump_data
+
+LOG = get_logger("world")
 
 
 class WorldPacket:
@@ -17,27 +18,37 @@ class WorldPacket:
     def __init__(self, opcode=None, data=b""):
         self.opcode = opcode
         self.data = data
+        self._plain_bytes = None
 
     def to_socket(self, session_cipher=None):
         """Return ready-to-send bytes, possibly encrypted, from the packet."""
-        if DEBUG:
-            print(">>>", self.opcode)
-            print(dump_data(self.data), end="")
-
-        opcode_bytes = self.OUTGOING_OPCODE_BIN.pack(self.opcode.value)
-        packet = opcode_bytes + self.data
-        size_bytes = self.OUTGOING_SIZE_BIN.pack(len(packet))
-        packet = size_bytes + packet
-
+        packet = self._get_plain_bytes()
         if session_cipher is not None:
             packet = session_cipher.encrypt(packet)
 
         return packet
 
+    def _get_plain_bytes(self):
+        """Return the unencrypted header and data. A broadcast packet is sent
+        to many connections, so they are cached as long as data is the same
+        object; only the header encryption is done for each connection."""
+        data = self.data
+        cached = self._plain_bytes
+        if cached is not None and cached[0] is data:
+            return cached[1]
+
+        opcode_bytes = self.OUTGOING_OPCODE_BIN.pack(self.opcode.value)
+        packet = opcode_bytes + data
+        packet = self.OUTGOING_SIZE_BIN.pack(len(packet)) + packet
+        self._plain_bytes = (data, packet)
+        return packet
+
 
 class WorldPacketReceiver:
     """Helper class that can get a complete WorldPacket from a connection."""
 
+    OPCODE_TABLE = OpcodeTable(OpCode, "world")
+
     def __init__(self, socket):
         self.socket = socket
         self.session_cipher = None
@@ -61,11 +72,6 @@ class WorldPacketReceiver:
         except WorldPacketReceiverException:
             return None
 
-        if DEBUG:
-            if self.opcode is not None:
-                print("<<<", self.opcode)
-            print(dump_data(self.content), end="")
-
         packet = WorldPacket(self.opcode, self.content)
         self.clean()
         return packet
@@ -100,18 +106,14 @@ class WorldPacketReceiver:
         opcode_bytes = self.content[:4]
         opcode_value = int.from_bytes(opcode_bytes, "little")
         self.content = self.content[4:]
-
-        try:
-            self.opcode = OpCode(opcode_value)
-        except ValueError:
-            LOG.warning(f"Unknown opcode {opcode_value:X}")
+        self.opcode = self.OPCODE_TABLE.get(opcode_value)
 
     def _get_more_data(self):
         some_data = None
         try:
             some_data = self.socket.recv(1024)
         except ConnectionError as exc:
-            LOG.warning("WorldPacketReceiver: ConnectionError: " + str(exc))
+            LOG.warning("WorldPacketReceiver: ConnectionError: %s", exc)
             traceback.print_tb(exc.__traceback__)
 
         if not some_data:
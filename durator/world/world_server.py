@@ -1,15 +1,31 @@
 import socket
 import threading
-import time
 
-from durator.common.log import LOG
+from durator.common.admin_console import AdminConsole
+from durator.common.log import get_logger
+from durator.common.metrics import METRICS, MetricsExporter
+from durator.common.networking.packet_capture import PacketCapture
 from durator.config import CONFIG
+from durator.db.executor import DbExecutor
+from durator.world.admission import AdmissionControl
+from durator.world.connection_index import ConnectionIndex
 from durator.world.game.chat.manager import ChatManager
 from durator.world.game.object.manager import ObjectManager
+from durator.world.opcodes import OpCode
+from durator.world.outgoing_queue import PacketPriority
 from durator.world.realm import Realm, RealmFlags, RealmId, RealmPopulation
+from durator.world.realm_link import RealmLink
 from durator.world.world_connection import WorldConnection
 from lib.utilities import simple_thread
 
+LOG = get_logger("world")
+
+BROADCAST_FANOUT = METRICS.histogram(
+    "durator_broadcast_fanout",
+    "Number of connections a broadcast packet is queued for.",
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+).labels()
+
 
 class WorldServer:
     """World server accepting connections from clients.
@@ -21,22 +37,27 @@ class WorldServer:
     """
 
     BACKLOG_SIZE = 64
-    LOGIN_SERVER_HEARTBEAT_RATE = int(CONFIG["login"]["realm_heartbeat_time"])
 
     def __init__(self):
         self.hostname = CONFIG["realm"]["hostname"]
         self.port = int(CONFIG["realm"]["port"])
         self.realm = None
+        self.realm_flags = RealmFlags.NORMAL
         self.population = RealmPopulation.LOW
         self._create_realm()
 
-        self.login_server_socket = None
+        self.realm_link = RealmLink(self)
         self.clients_socket = None
 
-        self.world_connections = []
-        self.world_connections_lock = threading.Lock()
+        self.world_connections = ConnectionIndex()
         self.object_manager = ObjectManager(self)
         self.chat_manager = ChatManager(self)
+        self.db_executor = DbExecutor()
+        self.admission = AdmissionControl(self)
+        self.packet_capture = PacketCapture("world", OpCode)
+        self.metrics_exporter = MetricsExporter("world")
+        self.admin_console = AdminConsole("world")
+        self._register_gauges()
 
         self.shutdown_flag = threading.Event()
 
@@ -46,15 +67,47 @@ class WorldServer:
         realm_id = RealmId(int(CONFIG["realm"]["id"]))
         self.realm = Realm(realm_name, realm_address, realm_id)
 
+    def _register_gauges(self):
+        METRICS.gauge(
+            "durator_connections",
+            "World connections in each state.",
+            lambda: {(state.name,): count for state, count in self.world_connections.get_state_counts().items()},
+            ("state",),
+        )
+        METRICS.gauge(
+            "durator_outgoing_queue_depth",
+            "Packets waiting in the outgoing queues, total and of the fullest queue.",
+            self._get_outgoing_queue_depths,
+            ("aggregate",),
+        )
+        METRICS.gauge("durator_db_queue_depth", "Database jobs waiting for a worker.", self.db_executor.get_queue_depth)
+
+    def _get_outgoing_queue_depths(self):
+        depths = [connection.outgoing_queue.depth for connection in self.world_connections.get_targets()]
+        return {("total",): sum(depths), ("max",): max(depths, default=0)}
+
     def start(self):
-        LOG.info("Starting world server " + self.realm.name)
+        LOG.info("Starting world server %s", self.realm.name)
         self._listen_clients()
+        self.db_executor.start()
+        self.packet_capture.start()
+        self.metrics_exporter.start()
+        self.admin_console.start()
 
-        simple_thread(self._handle_login_server_connection)
+        simple_thread(self.realm_link.run)
+        simple_thread(self.admission.run)
         self._accept_clients()
 
         self.shutdown_flag.set()
+        self.realm_link.stop()
         self._stop_listen_clients()
+        throttle_stats = self.chat_manager.get_throttle_stats()
+        if throttle_stats["throttled"]:
+            LOG.info("Chat messages throttled: %s", throttle_stats)
+        self.db_executor.stop()
+        self.packet_capture.stop()
+        self.metrics_exporter.stop()
+        self.admin_console.stop()
         LOG.info("World server stopped.")
 
     # ------------------------------
@@ -73,9 +126,10 @@ class WorldServer:
         self.clients_socket = None
 
     def _accept_clients(self):
-        """Regularly try to access client while looking for interrupts."""
+        """Regularly try to access client while looking for interrupts, until
+        the shutdown flag is set."""
         try:
-            while True:
+            while not self.shutdown_flag.is_set():
                 self._try_accept_client()
         except KeyboardInterrupt:
             LOG.info("KeyboardInterrupt received, stop accepting clients.")
@@ -89,13 +143,11 @@ class WorldServer:
             pass
 
     def _handle_client(self, connection, address):
-        """Start the threaded WorldConnection and add it to the local list."""
+        """Start the threaded WorldConnection and add it to the index."""
         address_string = str(address[0]) + ":" + str(address[1])
-        LOG.info("Accepting client connection from " + address_string)
+        LOG.info("Accepting client connection from %s", address_string)
         world_connection = WorldConnection(self, connection)
-
-        with self.world_connections_lock:
-            self.world_connections.append(world_connection)
+        self.world_connections.add(world_connection)
 
         simple_thread(world_connection.handle_connection)
 
@@ -103,53 +155,34 @@ class WorldServer:
     # Login server connection
     # ------------------------------
 
-    def _handle_login_server_connection(self):
-        """Update forever the realm state to the login server."""
-        while not self.shutdown_flag.is_set():
-            state_packet = self.realm.get_state_packet(RealmFlags.NORMAL, self.population)
-
-            self._open_login_server_socket()
-            if self.login_server_socket:
-                self.login_server_socket.sendall(state_packet)
-                self._close_login_server_socket()
+    def get_realm_state_packet(self):
+        return self.realm.get_state_packet(self.realm_flags, self.population)
 
-            time.sleep(self.LOGIN_SERVER_HEARTBEAT_RATE)
-
-    def _open_login_server_socket(self):
-        """Open the login server socket, or set it to None if it couldn't
-        connect properly."""
-        self.login_server_socket = socket.socket()
-        login_server_address = (CONFIG["login"]["realm_conn_hostname"], int(CONFIG["login"]["realm_conn_port"]))
-        try:
-            self.login_server_socket.connect(login_server_address)
-        except ConnectionError as exc:
-            LOG.error("Couldn't join login server! " + str(exc))
-            self.login_server_socket = None
-
-    def _close_login_server_socket(self):
-        self.login_server_socket.close()
-        self.login_server_socket = None
+    def update_realm_state(self, flags=None, population=None):
+        """Change the realm flags and/or population; if they changed, the new
+        state is pushed to the login server."""
+        flags = self.realm_flags if flags is None else flags
+        population = self.population if population is None else population
+        if flags == self.realm_flags and population == self.population:
+            return
+        self.realm_flags = flags
+        self.population = population
+        self.realm_link.push_state()
 
     # ------------------------------
     # Server utilities
     # ------------------------------
 
-    def broadcast(self, packet, state=None, guids=None):
-        """Send a WorldPacket to all eligible WorldConnection."""
-        with self.world_connections_lock:
-            for connection in self.world_connections:
-                eligible = WorldServer._get_broadcast_eligibility(connection, state, guids)
-                if eligible:
-                    connection.outgoing_queue.put(packet)
-
-    @staticmethod
-    def _get_broadcast_eligibility(connection, state, guids):
-        """Return whether a connection is eligible to receive a broadcast.
+    def broadcast(self, packet, state=None, guids=None, priority=PacketPriority.CONTROL, coalesce_key=None):
+        """Send a WorldPacket to all eligible WorldConnection, see
+        OutgoingQueue.put for the priority and coalesce_key.
 
         If state is provided, send packet only WorldConnections in that state.
         If guids is provided, send packet only to players in that GUID list.
+        Targets are looked up in the connection index and the packet is queued
+        outside of its lock.
         """
-        state_condition = state is None or connection.state == state
-        guid_condition = guids is None or (connection.player and connection.player.guid in guids)
-        eligible = state_condition and guid_condition
-        return eligible
+        targets = self.world_connections.get_targets(state, guids)
+        BROADCAST_FANOUT.observe(len(targets))
+        for connection in targets:
+            connection.outgoing_queue.put(packet, priority, coalesce_key)
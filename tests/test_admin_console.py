@@ -0,0 +1,136 @@
+import cProfile
+import io
+import os
+import pstats
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+
+from durator.common.admin_console import AdminConsole
+from durator.common.networking.connection_automaton import HANDLER_SECONDS
+from durator.common.profiling import HANDLER_PROFILER, HandlerProfiler, StackSampler, write_collapsed_stacks
+
+
+def _spin(stop_event):
+    while not stop_event.is_set():
+        sum(range(100))
+
+
+def _sorted_after(barrier, values):
+    barrier.wait()
+    return sorted(values)
+
+
+class TestAdminConsole(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.console = AdminConsole("test", enabled=True, port=0, profile_dir=self.directory.name)
+
+    def tearDown(self):
+        self.console.stop()
+        self.directory.cleanup()
+
+    def _run(self, line):
+        output = io.StringIO()
+        self.assertTrue(self.console.run_command(line.split(), output))
+        return output.getvalue()
+
+    def _get_num_sorted_calls(self):
+        """Return the calls to sorted in the profile written to the directory;
+        from Python 3.12 it may not be in the printed top functions."""
+        (file_name,) = os.listdir(self.directory.name)
+        stats = pstats.Stats(os.path.join(self.directory.name, file_name))
+        return stats.stats[("~", 0, "<built-in method builtins.sorted>")][1]
+
+    def test_commands(self):
+        self.assertIn("threads", self._run("help"))
+        self.assertEqual(self._run("xyz"), "Unknown command.\n")
+        self.assertIn('Thread "MainThread"', self._run("thr"))
+        self.assertEqual(self._run("profile stop"), "Not running.\n")
+        self.assertEqual(self._run("sample 0"), "Duration must be between 0 and 600 seconds.\n")
+        self.assertFalse(self.console.run_command(["quit"], io.StringIO()))
+
+    def test_profile(self):
+        """handler calls of all threads are merged in one profile"""
+        self.assertEqual(self._run("profile start"), "Started, use stop to end it.\n")
+        self.assertEqual(self._run("profile start"), "Already running.\n")
+        threads = [threading.Thread(target=HANDLER_PROFILER.run, args=(sorted, [3, 1, 2])) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        self.assertIn("Profile written to", self._run("profile stop"))
+        self.assertFalse(HANDLER_PROFILER.active)
+        self.assertEqual(self._get_num_sorted_calls(), 3)
+
+    def test_profile_concurrent_threads(self):
+        """threads running handlers at the same time are all profiled"""
+        self.assertEqual(self._run("profile start"), "Started, use stop to end it.\n")
+        barrier = threading.Barrier(2, timeout=5)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(HANDLER_PROFILER.run(_sorted_after, barrier, [2, 1])))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [[1, 2], [1, 2]])
+        self._run("profile stop")
+        self.assertEqual(self._get_num_sorted_calls(), 2)
+
+    @unittest.skipIf(sys.version_info < (3, 12), "cProfile allows several profilers before Python 3.12")
+    def test_profile_other_profiler(self):
+        """another active profiler disables profiling, not the handlers"""
+        other_profile = cProfile.Profile()
+        other_profile.enable()
+        try:
+            self.assertFalse(HandlerProfiler(shared_profile=True).start())
+            per_thread_profiler = HandlerProfiler(shared_profile=False)
+            self.assertTrue(per_thread_profiler.start())
+            results = []
+            thread = threading.Thread(target=lambda: results.append(per_thread_profiler.run(sorted, [2, 1])))
+            thread.start()
+            thread.join()
+            self.assertEqual(results, [[1, 2]])
+            per_thread_profiler.stop()
+        finally:
+            other_profile.disable()
+
+    def test_sample(self):
+        """the stacks of other threads are collapsed by thread name"""
+        stop_event = threading.Event()
+        thread = threading.Thread(target=_spin, args=(stop_event,), name="worker-42")
+        thread.start()
+        sampler = StackSampler(interval=0.001)
+        sampler.start()
+        while sampler.num_samples < 5:
+            stop_event.wait(0.01)
+        counts = sampler.stop()
+        stop_event.set()
+        thread.join()
+
+        worker_stacks = [stack for stack in counts if stack.startswith("worker-N;")]
+        self.assertTrue(any("_spin (test_admin_console.py:" in stack for stack in worker_stacks))
+        self.assertFalse(any(stack.startswith("stack-sampler") for stack in counts))
+        output = io.StringIO()
+        write_collapsed_stacks(counts, output)
+        self.assertTrue(output.getvalue().splitlines()[0].rsplit(" ", 1)[1].isdigit())
+
+    def test_top_handlers(self):
+        HANDLER_SECONDS.labels("TEST_SLOW_HANDLER").observe(100.0)
+        lines = self._run("top 1").splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith("TEST_SLOW_HANDLER"))
+
+    def test_tcp_client(self):
+        self.console.start()
+        with socket.create_connection(self.console.address, timeout=5) as client:
+            client_file = client.makefile("rwb")
+            client_file.write(b"help\nquit\n")
+            client_file.flush()
+            output = client_file.read().decode("utf8")
+        self.assertIn("Commands available:", output)
+        self.assertIn("profile", output)
@@ -0,0 +1,64 @@
+import queue
+import threading
+import unittest
+
+from durator.world.admission import AdmissionControl
+from durator.world.realm import RealmPopulation
+
+
+class _WorldServer:
+    def __init__(self):
+        self.shutdown_flag = threading.Event()
+        self.population = None
+
+    def update_realm_state(self, population=None):
+        self.population = population
+
+
+class _Connection:
+    def __init__(self):
+        self.outgoing_queue = queue.Queue()
+
+    def get_queue_positions(self):
+        positions = []
+        while not self.outgoing_queue.empty():
+            packet = self.outgoing_queue.get()
+            positions.append(int.from_bytes(packet.data[1:5], "little"))
+        return positions
+
+
+class TestAdmissionControl(unittest.TestCase):
+    def setUp(self):
+        self.server = _WorldServer()
+        self.admission = AdmissionControl(self.server, max_players=2, max_tick_lag=0)
+
+    def test_queue_order(self):
+        """sessions past capacity wait and are admitted in order"""
+        connections = [_Connection() for _ in range(4)]
+        results = [self.admission.request_admission(connection) for connection in connections]
+        self.assertEqual([position for _, position in results], [0, 0, 1, 2])
+        self.assertEqual(self.server.population, RealmPopulation.FULL)
+
+        self.admission.release(connections[0])
+        self.assertTrue(results[2][0].done())
+        self.assertFalse(results[3][0].done())
+        self.assertEqual(connections[3].get_queue_positions(), [1])
+
+        self.admission.release(connections[3])  # leaves the queue
+        self.admission.release(connections[1])
+        self.assertEqual(self.admission.get_stats()["admitted"], 1)
+        self.assertEqual(self.server.population, RealmPopulation.AVERAGE)
+
+    def test_tick_lag(self):
+        """nobody is admitted while the server lags"""
+        admission = AdmissionControl(self.server, max_players=0, max_tick_lag=0.05)
+        admission.record_tick_lag(1.0)
+        future, position = admission.request_admission(_Connection())
+        self.assertEqual(position, 1)
+
+        for _ in range(20):
+            admission.record_tick_lag(0.0)
+        with admission.lock:
+            admission._admit_waiting()
+        self.assertTrue(future.done())
+        self.assertEqual(admission.get_population(), RealmPopulation.LOW)
@@ -0,0 +1,148 @@
+import threading
+import unittest
+
+from durator.world.game.chat.language import Language
+from durator.world.game.chat.manager import MESSAGE_THROTTLED, ChatManager
+from durator.world.game.chat.message import ChatMessageType, ClientChatMessage
+from durator.world.game.chat.notification import NotificationType
+from durator.world.game.position import Position
+from durator.world.game.spatial_grid import SpatialGrid
+from durator.world.handlers.chat.message import MessageHandler
+from durator.world.opcodes import OpCode
+
+
+class _Player:
+    def __init__(self, guid):
+        self.guid = guid
+        self.name = "Player" + str(guid)
+        self.lock = threading.RLock()
+        self.map_id = 0
+        self.position = Position(guid * 10.0)
+
+
+class _ObjectManager:
+    def __init__(self, players):
+        self.players = {player.guid: player for player in players}
+        self.grid = SpatialGrid(10.0)
+        for player in players:
+            self.grid.update(player.guid, player.map_id, player.position.x, player.position.y, player.position.z)
+
+    def get_player(self, guid):
+        return self.players.get(guid)
+
+    def players_in_range_of(self, player, dist_range):
+        position = player.position
+        guids = self.grid.query(player.map_id, position.x, position.y, position.z, dist_range)
+        return [guid for guid in guids if guid != player.guid]
+
+
+class _WorldServer:
+    def __init__(self):
+        self.broadcasts = []
+        self.object_manager = None
+
+    def broadcast(self, packet, state=None, guids=None, priority=None, coalesce_key=None):
+        self.broadcasts.append(set(guids))
+
+
+class _Connection:
+    def __init__(self, server, player):
+        self.server = server
+        self.player = player
+
+
+class TestChatManager(unittest.TestCase):
+    def setUp(self):
+        self.server = _WorldServer()
+        self.chat_manager = ChatManager(self.server)
+        self.players = [_Player(guid) for guid in range(1, 4)]
+        self.server.object_manager = _ObjectManager(self.players)
+
+    def test_join_leave(self):
+        for player in self.players:
+            self.assertEqual(self.chat_manager.join_channel(player, "General", ""), 0)
+        self.assertEqual(self.server.broadcasts[-1], {1, 2})
+        self.assertEqual(self.chat_manager.join_channel(self.players[0], "Secret", "pass"), 0)
+        self.assertEqual(self.chat_manager.join_channel(self.players[1], "Secret", "wrong"), 1)
+
+        self.assertEqual(self.chat_manager.leave_channel(self.players[1], "General"), 0)
+        self.assertEqual(self.chat_manager.leave_channel(self.players[1], "General"), 1)
+        self.assertEqual(self.chat_manager.leave_channel(self.players[1], "Nope"), 2)
+        self.assertEqual(self.chat_manager.get_player_channels_names(2), [])
+        self.assertEqual(sorted(self.chat_manager.get_player_channels_names(1)), ["General", "Secret"])
+
+    def test_leave_all_channels(self):
+        for player in self.players:
+            self.chat_manager.join_channel(player, "General", "")
+        self.chat_manager.join_channel(self.players[0], "Secret", "")
+
+        self.chat_manager.leave_all_channels(1)
+        self.assertIn({2, 3}, self.server.broadcasts)
+        self.assertEqual(self.chat_manager.get_channels_names(), ["General"])
+        self.assertFalse(self.chat_manager.get_channel("General").is_member(1))
+        self.assertEqual(self.chat_manager.get_player_channels_names(1), [])
+
+    def test_local_messages(self):
+        """says reach players within 25 yards, yells within 300"""
+        far_player = _Player(100)
+        far_player.position.x = 250.0
+        self.players.append(far_player)
+        self.server.object_manager = _ObjectManager(self.players)
+        message = ClientChatMessage()
+        message.language = Language.UNIVERSAL
+        message.content = "Hello"
+
+        message.message_type = ChatMessageType.SAY
+        self.assertEqual(self.chat_manager.receive_message(1, message), 0)
+        self.assertEqual(self.server.broadcasts[-1], {1, 2, 3})
+        self.chat_manager.receive_message(100, message)
+        self.assertEqual(self.server.broadcasts[-1], {100})
+        message.message_type = ChatMessageType.YELL
+        self.chat_manager.receive_message(100, message)
+        self.assertEqual(self.server.broadcasts[-1], {1, 2, 3, 100})
+
+    def test_throttle(self):
+        """messages past the burst are suppressed, per channel"""
+        self.chat_manager.THROTTLE_RATE = 0.001
+        self.chat_manager.THROTTLE_BURST = 2
+        for chan_name in ("General", "Trade"):
+            self.chat_manager.join_channel(self.players[0], chan_name, "")
+        message = ClientChatMessage()
+        message.message_type = ChatMessageType.CHANNEL
+        message.language = Language.UNIVERSAL
+        message.channel_name = "General"
+        message.content = "Spam"
+
+        results = [self.chat_manager.receive_message(1, message) for _ in range(4)]
+        self.assertEqual(results, [0, 0, MESSAGE_THROTTLED, MESSAGE_THROTTLED])
+        message.channel_name = "Trade"
+        self.assertEqual(self.chat_manager.receive_message(1, message), 0)
+        self.assertEqual(self.chat_manager.receive_message(2, message), 1)
+        self.assertEqual(self.chat_manager.get_throttle_stats(), {"throttled": 2, "per_key": {"General": 2}})
+
+        self.chat_manager.leave_all_channels(1)
+        self.assertNotIn(1, self.chat_manager.throttle_buckets)
+
+    def test_throttled_responses(self):
+        """throttled channel messages get a notification, local ones a system message"""
+        self.chat_manager.THROTTLE_RATE = 0.001
+        self.chat_manager.THROTTLE_BURST = 1
+        self.server.chat_manager = self.chat_manager
+        self.chat_manager.join_channel(self.players[0], "General", "")
+        connection = _Connection(self.server, self.players[0])
+
+        channel_packet = ClientChatMessage.HEADER_BIN.pack(ChatMessageType.CHANNEL.value, Language.UNIVERSAL.value)
+        channel_packet += b"General\x00Spam\x00"
+        self.assertEqual(MessageHandler(connection, channel_packet).process(), (None, None))
+        _, response = MessageHandler(connection, channel_packet).process()
+        self.assertEqual(response.opcode, OpCode.SMSG_CHANNEL_NOTIFY)
+        self.assertEqual(response.data[0], NotificationType.THROTTLED.value)
+        self.assertEqual(response.data[1:9], b"General\x00")
+
+        say_packet = ClientChatMessage.HEADER_BIN.pack(ChatMessageType.SAY.value, Language.UNIVERSAL.value)
+        say_packet += b"Spam\x00"
+        self.assertEqual(MessageHandler(connection, say_packet).process(), (None, None))
+        _, response = MessageHandler(connection, say_packet).process()
+        self.assertEqual(response.opcode, OpCode.SMSG_MESSAGECHAT)
+        self.assertEqual(response.data[0], ChatMessageType.SYSTEM.value)
+        self.assertIn(MessageHandler.THROTTLED_TEXT.encode("utf8"), response.data)
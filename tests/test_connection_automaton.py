@@ -0,0 +1,136 @@
+import unittest
+from enum import Enum
+
+from durator.common.networking.connection_automaton import ConnectionAutomaton
+from durator.common.networking.rate_limit import RateLimit, RatePolicy
+
+
+class _OpCode(Enum):
+
+    HELLO = 1
+    PING = 2
+    CHAT = 5
+    UNKNOWN = 70
+
+
+class _State(Enum):
+
+    INIT = 0
+    READY = 1
+    FREE = 2
+    ERROR = 3
+
+
+class _HelloHandler:
+    def __init__(self, connection, packet):
+        self.conn = connection
+        self.packet = packet
+
+    def process(self):
+        self.conn.handled.append(("hello", self.packet))
+        return _State.READY, None
+
+
+class _ChatHandler:
+    @staticmethod
+    def handle(connection, packet):
+        connection.handled.append(("chat", packet))
+        return None, b"ack"
+
+
+class _DefaultHandler:
+    @staticmethod
+    def handle(connection, packet):
+        connection.handled.append(("default", packet))
+        return None, None
+
+
+class _Connection(ConnectionAutomaton):
+
+    LEGAL_OPS = {
+        _State.INIT: [_OpCode.HELLO],
+        _State.READY: [_OpCode.CHAT],
+        _State.ERROR: [],
+    }
+    UNMANAGED_OPS = [_OpCode.PING]
+    UNMANAGED_STATES = [_State.FREE]
+    DEFAULT_HANDLER = _DefaultHandler
+    OP_HANDLERS = {_OpCode.HELLO: _HelloHandler, _OpCode.CHAT: _ChatHandler}
+    INIT_STATE = _State.INIT
+    END_STATES = [_State.ERROR]
+    MAIN_ERROR_STATE = _State.ERROR
+    RATE_LIMITED_OPS = {_OpCode.CHAT: "chat"}
+
+    def __init__(self, chat_policy=None):
+        if chat_policy is not None:
+            self.RATE_LIMITS = {"chat": RateLimit(1, 3, chat_policy)}
+        super().__init__(None)
+        self.handled = []
+        self.sent = []
+
+    def _parse_packet(self, packet):
+        return packet
+
+    def send_packet(self, data):
+        self.sent.append(data)
+
+
+class TestConnectionAutomaton(unittest.TestCase):
+    def test_dispatch_table(self):
+        self.assertEqual(len(_Connection.DISPATCH_TABLE), 71)
+        self.assertIs(_Connection.DISPATCH_TABLE[_OpCode.CHAT.value], _ChatHandler.handle)
+        self.assertIs(_Connection.DISPATCH_TABLE[_OpCode.UNKNOWN.value], _DefaultHandler.handle)
+
+    def test_legality(self):
+        connection = _Connection()
+        self.assertTrue(connection.opcode_is_legal(_OpCode.HELLO))
+        self.assertTrue(connection.opcode_is_legal(_OpCode.PING))
+        self.assertFalse(connection.opcode_is_legal(_OpCode.CHAT))
+
+        connection._handle_packet((_OpCode.CHAT, b"too soon"))
+        connection._handle_packet((_OpCode.HELLO, b"hi"))
+        self.assertEqual(connection.state, _State.READY)
+        self.assertFalse(connection.opcode_is_legal(_OpCode.HELLO))
+        connection._handle_packet((_OpCode.CHAT, b"msg"))
+        connection._handle_packet((_OpCode.PING, b"ping"))
+        self.assertEqual(connection.handled, [("hello", b"hi"), ("chat", b"msg"), ("default", b"ping")])
+        self.assertEqual(connection.sent, [b"ack"])
+
+        connection.state = _State.FREE
+        connection._handle_packet((_OpCode.UNKNOWN, b"any"))
+        self.assertEqual(connection.handled[-1], ("default", b"any"))
+        connection.state = _State.ERROR
+        self.assertFalse(connection.opcode_is_legal(_OpCode.HELLO))
+        self.assertTrue(connection.opcode_is_legal(_OpCode.PING))
+
+    def test_opcode_metrics(self):
+        """handler latency is recorded per opcode, unknown values share metrics"""
+        connection = _Connection()
+        chat_metrics = _Connection.get_opcode_metrics(_OpCode.CHAT.value)
+        num_observed = chat_metrics.handler_seconds.get_snapshot()[1]
+        connection.state = _State.READY
+        connection._handle_packet((_OpCode.CHAT, b"msg"))
+        self.assertEqual(chat_metrics.handler_seconds.get_snapshot()[1], num_observed + 1)
+        self.assertIs(_Connection.get_opcode_metrics(_OpCode.CHAT.value), chat_metrics)
+
+        unknown_metrics = _Connection.get_opcode_metrics(None)
+        self.assertIs(_Connection.get_opcode_metrics(1000), unknown_metrics)
+        self.assertIs(_Connection.get_opcode_metrics(3).handler_seconds, unknown_metrics.handler_seconds)
+
+    def test_rate_limit_drop(self):
+        connection = _Connection(RatePolicy.DROP)
+        connection.state = _State.READY
+        for _ in range(5):
+            connection._handle_packet((_OpCode.CHAT, b"msg"))
+            connection._handle_packet((_OpCode.PING, b"ping"))
+        self.assertEqual(len(connection.handled), 3 + 5)
+        self.assertEqual(connection.rate_limiter.get_stats()["chat"]["dropped"], 2)
+        self.assertEqual(connection.state, _State.READY)
+
+    def test_rate_limit_disconnect(self):
+        connection = _Connection(RatePolicy.DISCONNECT)
+        connection.state = _State.READY
+        for _ in range(4):
+            connection._handle_packet((_OpCode.CHAT, b"msg"))
+        self.assertEqual(connection.state, _State.ERROR)
+        self.assertEqual(connection.rate_limiter.get_stats()["chat"]["disconnected"], 1)
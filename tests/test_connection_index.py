@@ -0,0 +1,44 @@
+import unittest
+
+from durator.world.connection_index import ConnectionIndex
+from durator.world.world_connection_state import WorldConnectionState
+
+
+class _Connection:
+    def __init__(self, index):
+        self.index = index
+        self.state = WorldConnectionState.INIT
+
+    def set_state(self, state):
+        old_state, self.state = self.state, state
+        self.index.update_state(self, old_state, state)
+
+
+class TestConnectionIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ConnectionIndex()
+        self.connections = [_Connection(self.index) for _ in range(3)]
+        for connection in self.connections:
+            self.index.add(connection)
+            connection.set_state(WorldConnectionState.AUTH_OK)
+        for guid, connection in enumerate(self.connections[:2], start=1):
+            connection.set_state(WorldConnectionState.IN_WORLD)
+            self.index.set_player_guid(connection, guid)
+
+    def test_targets(self):
+        self.assertEqual(len(self.index.get_targets()), 3)
+        self.assertEqual(set(self.index.get_targets(WorldConnectionState.IN_WORLD)), set(self.connections[:2]))
+        self.assertEqual(self.index.get_targets(guids=[2, 3]), [self.connections[1]])
+        self.assertEqual(self.index.get_targets(WorldConnectionState.AUTH_OK, guids=[1, 2]), [])
+        self.assertEqual(self.index.get_connection(1), self.connections[0])
+
+    def test_remove(self):
+        self.index.unset_player_guid(self.connections[0])
+        self.connections[0].set_state(WorldConnectionState.AUTH_OK)
+        self.assertIsNone(self.index.get_connection(1))
+        self.assertEqual(self.index.count(WorldConnectionState.AUTH_OK), 2)
+
+        self.index.remove(self.connections[1])
+        self.assertIsNone(self.index.get_connection(2))
+        self.assertEqual(self.index.count(WorldConnectionState.IN_WORLD), 0)
+        self.assertEqual(self.index.count(), 2)
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+
+from durator.common.account.account_data import AccountDataType
+from durator.common.account.managers import AccountDataManager, AccountManager, AccountSessionManager
+from durator.common.crypto.md5 import md5
+from durator.db.database import DB, SQLITE_MEMORY, atomic, db_connection, setup_database
+from durator.common.account.account import Account
+from durator.db.models import MODELS
+
+
+@db_connection
+def install_tables():
+    DB.create_tables(MODELS)
+
+
+class TestSqliteDatabase(unittest.TestCase):
+    def setUp(self):
+        setup_database("sqlite", SQLITE_MEMORY)
+        install_tables()
+
+    def test_account_survives_connection_close(self):
+        """in-memory data stays available between db_connection calls"""
+        AccountManager.create_account("test", "test")
+        account = AccountManager.get_account("TEST")
+        self.assertIsNotNone(account)
+        self.assertTrue(account.is_valid())
+
+    def test_session(self):
+        """sessions are stored and looked up by account name"""
+        account = AccountManager.create_account("test", "test")
+        session_key = bytes(range(40))
+        AccountSessionManager.add_session(account, session_key)
+        session = AccountSessionManager.get_session("TEST")
+        self.assertEqual(session.session_key_as_bytes, session_key)
+
+    def test_account_data(self):
+        """account data is stored compressed and served from cache"""
+        account = AccountManager.create_account("test", "test")
+        self.assertEqual(AccountDataManager.get_account_data_md5(account), [bytes(16)] * 5)
+
+        old_cached = AccountDataManager.get_cached_account_data(account, AccountDataType.BINDINGS)
+
+        content = b"SET uiScale 1.0\n" * 64
+        zlib_data = zlib.compress(content)
+        AccountDataManager.set_account_data(account, AccountDataType.BINDINGS, zlib_data)
+
+        # Objects already read by other threads are replaced, not modified.
+        self.assertEqual(old_cached.decompressed_size, 0)
+        self.assertEqual(old_cached.zlib_content, b"")
+        cached = AccountDataManager.get_cached_account_data(account, AccountDataType.BINDINGS)
+        self.assertIsNot(cached, old_cached)
+        self.assertEqual(cached.zlib_content, zlib_data)
+        self.assertEqual(cached.decompressed_size, len(content))
+        self.assertEqual(AccountDataManager.get_account_data_md5(account)[1], md5(content))
+
+        AccountDataManager.forget_account_data(account)
+        self.assertIsNone(AccountDataManager.get_cached_account_data(account, AccountDataType.BINDINGS))
+        stored = AccountDataManager.get_account_data(account, AccountDataType.BINDINGS)
+        self.assertEqual(bytes(stored.zlib_content), zlib_data)
+        AccountDataManager.forget_account_data(account)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            setup_database("postgres")
+
+
+class TestSqliteFileDatabase(unittest.TestCase):
+    def setUp(self):
+        self.db_dir = tempfile.TemporaryDirectory()
+        setup_database("sqlite", os.path.join(self.db_dir.name, "test.sqlite3"))
+        install_tables()
+
+    def tearDown(self):
+        setup_database("sqlite", SQLITE_MEMORY)
+        self.db_dir.cleanup()
+
+    def test_concurrent_transactions(self):
+        """transactions reading then writing wait for each other instead of failing"""
+        errors = []
+
+        @db_connection
+        def create_account(name):
+            try:
+                with atomic():
+                    Account.select().count()
+                    time.sleep(0.1)
+                    AccountManager.create_account(name, name)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=create_account, args=(f"test{index}",)) for index in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(Account.select().count(), 2)
@@ -0,0 +1,54 @@
+import threading
+import unittest
+
+from durator.db.executor import DbExecutor
+
+
+class TestDbExecutor(unittest.TestCase):
+    def setUp(self):
+        self.executor = DbExecutor(num_workers=4, max_queue_size=16)
+        self.executor.start()
+
+    def tearDown(self):
+        self.executor.stop()
+
+    def test_result(self):
+        future = self.executor.submit(pow, 2, 10)
+        self.assertEqual(future.result(timeout=5), 1024)
+
+    def test_exception(self):
+        def fail():
+            raise ValueError("nope")
+
+        future = self.executor.submit(fail)
+        with self.assertRaises(ValueError):
+            future.result(timeout=5)
+        self.executor.stop()
+        self.assertEqual(self.executor.get_stats()["failed"], 1)
+        self.executor.start()
+
+    def test_key_ordering(self):
+        """jobs with the same key are run in submission order"""
+        results = []
+        lock = threading.Lock()
+
+        def append(value):
+            with lock:
+                results.append(value)
+
+        futures = [self.executor.submit(append, value, key="conn") for value in range(100)]
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(results, list(range(100)))
+
+    def test_stats(self):
+        futures = [self.executor.submit(int, "1") for _ in range(10)]
+        for future in futures:
+            future.result(timeout=5)
+        self.executor.stop()
+        stats = self.executor.get_stats()
+        self.assertEqual(stats["submitted"], 10)
+        self.assertEqual(stats["done"], 10)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreaterEqual(stats["max_wait_time"], stats["mean_wait_time"])
+        self.executor.start()
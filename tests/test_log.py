@@ -0,0 +1,39 @@
+import logging
+import queue
+import unittest
+
+from durator.common.log import LazyQueueHandler, RepeatFilter
+
+
+def _get_record(msg, *args, created=0.0):
+    record = logging.LogRecord("durator.test", logging.WARNING, __file__, 1, msg, args, None)
+    record.created = created
+    return record
+
+
+class TestLog(unittest.TestCase):
+    def test_repeat_filter(self):
+        """messages over the limit are suppressed and counted in the next one"""
+        repeat_filter = RepeatFilter(2, 10.0)
+        results = [repeat_filter.filter(_get_record("client %d too slow", index, created=index)) for index in range(5)]
+        self.assertEqual(results, [True, True, False, False, False])
+        self.assertTrue(repeat_filter.filter(_get_record("other message", created=5.0)))
+        self.assertEqual(repeat_filter.num_suppressed, 3)
+
+        record = _get_record("client %d too slow", 42, created=10.0)
+        self.assertTrue(repeat_filter.filter(record))
+        self.assertEqual(record.getMessage(), "client 42 too slow (3 similar messages suppressed)")
+
+    def test_lazy_queue_handler(self):
+        """records are formatted by the listener unless their arguments can change"""
+        log_queue = queue.SimpleQueue()
+        handler = LazyQueueHandler(log_queue)
+        handler.handle(_get_record("GUID %X", 0xABC))
+        record = log_queue.get_nowait()
+        self.assertEqual((record.msg, record.args), ("GUID %X", (0xABC,)))
+
+        stats = {"dropped": 1}
+        handler.handle(_get_record("stats: %s", stats))
+        stats["dropped"] = 2
+        record = log_queue.get_nowait()
+        self.assertEqual(record.getMessage(), "stats: {'dropped': 1}")
@@ -0,0 +1,66 @@
+import socket
+import unittest
+
+from durator.auth.async_login_connection import AsyncLoginConnection
+from durator.auth.constants import LoginOpCode
+from durator.auth.login_connection import LoginConnection
+from durator.auth.srp_ephemeral_pool import SrpEphemeralPool
+from durator.common.networking.packet_capture import PacketCapture
+
+
+def get_challenge_packet(account_name):
+    """Return a challenge message; only its header matters for framing."""
+    name = account_name.encode("ascii")
+    content = bytes(29) + bytes([len(name)]) + name
+    header = LoginConnection.SIZED_HEADER_BIN.pack(LoginOpCode.LOGIN_CHALL.value, 0, len(content))
+    return header + content
+
+
+class _Server:
+    srp_ephemeral_pool = SrpEphemeralPool(size=0)
+    packet_capture = PacketCapture("login", LoginOpCode, enabled=False)
+
+
+class TestLoginFraming(unittest.TestCase):
+    def setUp(self):
+        self.client_socket, server_socket = socket.socketpair()
+        self.conn = LoginConnection(_Server(), server_socket)
+
+    def tearDown(self):
+        self.client_socket.close()
+        self.conn.socket.close()
+
+    def test_message_size(self):
+        challenge = get_challenge_packet("ACCOUNT")
+        self.assertEqual(LoginConnection.get_message_size(challenge[:1]), 4)
+        self.assertEqual(LoginConnection.get_message_size(challenge[:4]), len(challenge))
+        self.assertEqual(LoginConnection.get_message_size(bytes([LoginOpCode.LOGIN_PROOF.value])), 74)
+        self.assertEqual(LoginConnection.get_message_size(bytes([LoginOpCode.REALMLIST.value])), 5)
+        with self.assertRaises(ValueError):
+            LoginConnection.get_message_size(bytes([LoginOpCode.XFER_DATA.value]))
+
+    def test_fragmented_message(self):
+        challenge = get_challenge_packet("ACCOUNT")
+        self.client_socket.sendall(challenge[:2])
+        self.client_socket.sendall(challenge[2:10])
+        self.client_socket.sendall(challenge[10:])
+        self.assertEqual(self.conn._recv_packet(), challenge)
+
+    def test_coalesced_messages(self):
+        realmlist = bytes([LoginOpCode.REALMLIST.value]) + bytes(4)
+        challenge = get_challenge_packet("ACCOUNT")
+        self.client_socket.sendall(challenge + realmlist + realmlist[:2])
+        self.assertEqual(self.conn._recv_packet(), challenge)
+        self.assertEqual(self.conn._recv_packet(), realmlist)
+        self.client_socket.sendall(realmlist[2:])
+        self.assertEqual(self.conn._recv_packet(), realmlist)
+
+    def test_connection_closed(self):
+        self.client_socket.sendall(get_challenge_packet("ACCOUNT")[:10])
+        self.client_socket.close()
+        self.assertIsNone(self.conn._recv_packet())
+
+    def test_async_connection_has_no_socket_loop(self):
+        """the asyncio connection only receives through read_message"""
+        self.assertFalse(hasattr(AsyncLoginConnection, "_recv_packet"))
+        self.assertFalse(hasattr(AsyncLoginConnection, "handle_connection"))
@@ -0,0 +1,53 @@
+import unittest
+
+from durator.auth import login_crypto
+from durator.auth.srp import Srp
+from durator.common.crypto.sha1 import sha1, sha1_interleave
+from tests.test_srp import IDENT, SALT, SOME_CLIENT_EPH, SOME_SERVER_EPH, VERIFIER
+
+
+def _reference_sha1_interleave(big_int):
+    """Byte by byte implementation of the interleaved SHA1."""
+    big_array = int.to_bytes(big_int, 128, "little").rstrip(b"\x00")
+    if len(big_array) % 2 == 1:
+        big_array = big_array[1:]
+    part1 = b"".join(big_array[i : i + 1] for i in range(0, len(big_array), 2))
+    part2 = b"".join(big_array[i : i + 1] for i in range(1, len(big_array), 2))
+    hash1, hash2 = sha1(part1), sha1(part2)
+    return b"".join(hash1[i : i + 1] + hash2[i : i + 1] for i in range(20))
+
+
+def _reference_client_proof(server_eph, client_eph, session_key, account_name, salt):
+    """Client proof hashing the modulus and generator on every call."""
+    modulus_hash = sha1(int.to_bytes(Srp.MODULUS, 32, "little").rstrip(b"\x00"))
+    gen_hash = sha1(int.to_bytes(Srp.GENERATOR, 32, "little").rstrip(b"\x00"))
+    xor_hash = bytes(m_byte ^ g_byte for m_byte, g_byte in zip(modulus_hash, gen_hash))
+    to_hash = (
+        xor_hash
+        + sha1(account_name.encode("ascii"))
+        + salt
+        + int.to_bytes(client_eph, 32, "little")
+        + int.to_bytes(server_eph, 32, "little")
+        + session_key
+    )
+    return sha1(to_hash)
+
+
+class TestLoginCrypto(unittest.TestCase):
+    def test_constants(self):
+        self.assertEqual(login_crypto.MODULUS_BYTES, int.to_bytes(Srp.MODULUS, 32, "little"))
+        self.assertEqual(login_crypto.GENERATOR_BYTES, b"\x07")
+        self.assertEqual(len(login_crypto.MODULUS_GENERATOR_HASH_XOR), 20)
+
+    def test_sha1_interleave(self):
+        for big_int in (SOME_CLIENT_EPH, SOME_SERVER_EPH, VERIFIER, SALT, 0xFF00, 0x0102FF):
+            self.assertEqual(sha1_interleave(big_int), _reference_sha1_interleave(big_int))
+
+    def test_client_proof(self):
+        salt = int.to_bytes(SALT, 32, "little")
+        session_key = sha1_interleave(VERIFIER)
+        expected = _reference_client_proof(SOME_SERVER_EPH, SOME_CLIENT_EPH, session_key, IDENT, salt)
+        for _ in range(2):  # Second call uses the cached account name hash.
+            proof = Srp.compute_client_proof(SOME_SERVER_EPH, SOME_CLIENT_EPH, session_key, IDENT, salt)
+            self.assertEqual(proof, expected)
+        self.assertEqual(login_crypto.get_account_name_hash(IDENT), sha1(IDENT.encode("ascii")))
@@ -0,0 +1,72 @@
+import unittest
+import urllib.request
+
+from durator.common.metrics import MetricsExporter, MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        counter = self.registry.counter("test_packets_total", "Packets.", ("direction", "opcode"))
+        child = counter.labels("sent", "PING")
+        self.assertIs(counter.labels("sent", "PING"), child)
+        child.inc()
+        child.inc(2)
+        counter.labels("received", 'say "hi"').inc()
+        self.assertIs(self.registry.counter("test_packets_total", "Packets.", ("direction", "opcode")), counter)
+        with self.assertRaises(ValueError):
+            self.registry.histogram("test_packets_total", "Packets.")
+        with self.assertRaises(ValueError):
+            counter.labels("sent")
+
+        lines = self.registry.get_text().splitlines()
+        self.assertEqual(lines[:2], ["# HELP test_packets_total Packets.", "# TYPE test_packets_total counter"])
+        self.assertIn('test_packets_total{direction="sent",opcode="PING"} 3', lines)
+        self.assertIn('test_packets_total{direction="received",opcode="say \\"hi\\""} 1', lines)
+        self.assertEqual(self.registry.get_summary(), {"test_packets_total": 4})
+
+    def test_histogram(self):
+        """buckets are cumulative in the exposition, quantiles are bucket bounds"""
+        histogram = self.registry.histogram("test_seconds", "Latency.", buckets=(0.1, 1.0)).labels()
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        lines = self.registry.get_text().splitlines()
+        self.assertEqual(
+            lines[2:],
+            [
+                'test_seconds_bucket{le="0.1"} 2',
+                'test_seconds_bucket{le="1.0"} 3',
+                'test_seconds_bucket{le="+Inf"} 4',
+                "test_seconds_sum 2.65",
+                "test_seconds_count 4",
+            ],
+        )
+        self.assertEqual(histogram.get_quantile(0.5), 0.1)
+        self.assertEqual(histogram.get_quantile(0.75), 1.0)
+        self.assertEqual(histogram.get_quantile(1.0), float("inf"))
+
+    def test_gauge(self):
+        """gauges are evaluated on collection, registering again replaces them"""
+        counts = {("IN_WORLD",): 2}
+        self.registry.gauge("test_connections", "Connections.", lambda: counts, ("state",))
+        counts[("INIT",)] = 1
+        self.assertIn('test_connections{state="INIT"} 1', self.registry.get_text().splitlines())
+        self.registry.gauge("test_connections", "Connections.", lambda: {}, ("state",))
+        depth = self.registry.gauge("test_depth", "Depth.", lambda: 7)
+        with self.assertRaises(TypeError):
+            depth.labels()
+        self.assertEqual(self.registry.get_summary(), {"test_connections": {}, "test_depth": 7})
+
+    def test_exporter(self):
+        self.registry.counter("test_total", "Test.").labels().inc()
+        exporter = MetricsExporter("test", registry=self.registry, enabled=True, port=0, summary_interval=0)
+        exporter.start()
+        try:
+            url = "http://{}:{}/metrics".format(*exporter.address)
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+                self.assertIn("test_total 1", response.read().decode("utf8").splitlines())
+        finally:
+            exporter.stop()
@@ -0,0 +1,42 @@
+import unittest
+
+from durator.auth.constants import LoginOpCode
+from durator.common.networking.opcode_table import OpcodeTable
+from durator.world.opcodes import OpCode
+from durator.world.world_packet import WorldPacketReceiver
+
+
+class _Socket:
+    def __init__(self, data):
+        self.data = data
+
+    def recv(self, size):
+        data, self.data = self.data[:size], self.data[size:]
+        return data
+
+
+class TestOpcodeTable(unittest.TestCase):
+    def test_get(self):
+        table = OpcodeTable(LoginOpCode)
+        for opcode in LoginOpCode:
+            self.assertIs(table.get(opcode.value), opcode)
+        self.assertEqual(table.get_stats()["unknown"], 0)
+
+    def test_unknown(self):
+        """unknown opcodes are counted but logged at most once per interval"""
+        table = OpcodeTable(OpCode)
+        with self.assertLogs("durator", "WARNING") as logs:
+            for value in (0xFFFF, 0xFFFF, 0xFFFFFFFF, 0x2):
+                self.assertIsNone(table.get(value))
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(table.get_stats()["unknown"], 4)
+        self.assertEqual(dict(table.unknown_samples), {0xFFFF: 1, 0xFFFFFFFF: 1, 0x2: 1})
+
+    def test_receiver(self):
+        ping = b"\x00\x08" + OpCode.CMSG_PING.value.to_bytes(4, "little") + b"\x01\x00\x00\x00"
+        unknown = b"\x00\x04" + b"\xFF\xFF\x00\x00"
+        receiver = WorldPacketReceiver(_Socket(ping + unknown))
+        self.assertIs(receiver.get_next_packet().opcode, OpCode.CMSG_PING)
+        num_unknown = receiver.OPCODE_TABLE.get_stats()["unknown"]
+        self.assertIsNone(receiver.get_next_packet().opcode)
+        self.assertEqual(receiver.OPCODE_TABLE.get_stats()["unknown"], num_unknown + 1)
@@ -0,0 +1,58 @@
+import time
+import unittest
+
+from durator.world.outgoing_queue import OutgoingQueue, PacketPriority
+
+
+class TestOutgoingQueue(unittest.TestCase):
+    def setUp(self):
+        max_sizes = {PacketPriority.CONTROL: 2, PacketPriority.CHAT: 2, PacketPriority.MOVEMENT: 3}
+        self.queue = OutgoingQueue(max_sizes=max_sizes, high_water=4)
+
+    def test_priority_order(self):
+        self.queue.put("move", PacketPriority.MOVEMENT, coalesce_key=1)
+        self.queue.put("chat", PacketPriority.CHAT)
+        self.queue.put("control")
+        self.assertEqual(self.queue.get_all(), ["control", "chat", "move"])
+        self.assertTrue(self.queue.empty())
+
+    def test_get(self):
+        """packets are taken one by one by priority, leaving high water"""
+        for index in range(3):
+            self.queue.put(f"move {index}", PacketPriority.MOVEMENT, coalesce_key=index)
+        self.queue.put("chat", PacketPriority.CHAT)
+        self.queue.put("control")
+        self.assertGreater(self.queue.get_high_water_time(), 0.0)
+        self.assertEqual(self.queue.get(), "control")
+        self.assertEqual(self.queue.get_high_water_time(), 0.0)
+        self.assertEqual([self.queue.get() for _ in range(4)], ["chat", "move 0", "move 1", "move 2"])
+        self.assertIsNone(self.queue.get())
+        self.assertTrue(self.queue.empty())
+
+    def test_movement_coalescing(self):
+        """a newer movement update replaces the queued one of the same object"""
+        self.queue.put("move 1 a", PacketPriority.MOVEMENT, coalesce_key=1)
+        self.queue.put("move 2 a", PacketPriority.MOVEMENT, coalesce_key=2)
+        self.queue.put("move 1 b", PacketPriority.MOVEMENT, coalesce_key=1)
+        self.assertEqual(self.queue.get_all(), ["move 1 b", "move 2 a"])
+        self.assertEqual(self.queue.get_stats()["replaced"], 1)
+
+    def test_bounds(self):
+        for index in range(4):
+            self.queue.put(f"chat {index}", PacketPriority.CHAT)
+        self.assertEqual(self.queue.get_stats()["dropped"]["CHAT"], 2)
+        self.assertFalse(self.queue.overflowed)
+        for index in range(3):
+            self.queue.put(f"control {index}")
+        self.assertTrue(self.queue.overflowed)
+        self.assertEqual(self.queue.get_all(), ["control 0", "control 1", "chat 2", "chat 3"])
+
+    def test_high_water(self):
+        for index in range(4):
+            self.queue.put(index, PacketPriority.MOVEMENT if index < 2 else PacketPriority.CHAT)
+        self.assertEqual(self.queue.get_high_water_time(), 0.0)
+        self.queue.put("control")
+        time.sleep(0.01)
+        self.assertGreater(self.queue.get_high_water_time(), 0.0)
+        self.queue.get_all()
+        self.assertEqual(self.queue.get_high_water_time(), 0.0)
@@ -0,0 +1,67 @@
+import io
+import tempfile
+import unittest
+
+from durator.common.networking.capture_dump import dump_capture
+from durator.common.networking.packet_capture import (
+    DIRECTION_RECEIVED,
+    DIRECTION_SENT,
+    UNKNOWN_OPCODE,
+    PacketCapture,
+    read_capture,
+)
+from durator.world.opcodes import OpCode
+
+
+class TestPacketCapture(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _get_capture(self, **kwargs):
+        kwargs.setdefault("opcodes", "")
+        kwargs.setdefault("accounts", "")
+        return PacketCapture("world", OpCode, enabled=True, directory=self.directory.name, **kwargs)
+
+    def test_capture(self):
+        capture = self._get_capture()
+        capture.start()
+        connection_id = capture.new_connection_id()
+        capture.capture(DIRECTION_RECEIVED, connection_id, OpCode.CMSG_PING.value, bytearray(b"\x01\x00\x00\x00"))
+        capture.capture(DIRECTION_SENT, connection_id, OpCode.SMSG_PONG.value, b"\x01\x00\x00\x00", "Shgck")
+        capture.capture(DIRECTION_RECEIVED, connection_id, None, b"")
+        capture.stop()
+        self.assertEqual(capture.get_stats(), {"captured": 3, "written": 3, "dropped": 0})
+
+        with open(capture.path, "rb") as capture_file:
+            name, records = read_capture(capture_file)
+            records = list(records)
+        self.assertEqual(name, "world")
+        self.assertEqual([record.opcode_value for record in records], [0x1DC, 0x1DD, UNKNOWN_OPCODE])
+        self.assertEqual(records[1].direction, DIRECTION_SENT)
+        self.assertEqual(records[1].account_name, "Shgck")
+        self.assertEqual(records[0].data, b"\x01\x00\x00\x00")
+
+        with open(capture.path, "rb") as capture_file:
+            output = io.StringIO()
+            dump_capture(capture_file, output, opcodes={"SMSG_PONG"})
+        self.assertIn("#1 Shgck >>> SMSG_PONG (4 bytes)", output.getvalue())
+        self.assertNotIn("CMSG_PING", output.getvalue())
+
+    def test_filters(self):
+        capture = self._get_capture(opcodes="CMSG_PING, SMSG_PONG", accounts="shgck")
+        capture.capture(DIRECTION_RECEIVED, 1, OpCode.CMSG_PING.value, b"", "SHGCK")
+        capture.capture(DIRECTION_RECEIVED, 1, OpCode.CMSG_PING.value, b"", None)
+        capture.capture(DIRECTION_RECEIVED, 2, OpCode.CMSG_PING.value, b"", "OTHER")
+        capture.capture(DIRECTION_RECEIVED, 1, OpCode.CMSG_MESSAGECHAT.value, b"", "SHGCK")
+        self.assertEqual(len(capture.records), 1)
+
+    def test_overflow(self):
+        """the oldest packets are dropped when the writer lags behind"""
+        capture = self._get_capture(buffer_size=2)
+        for index in range(5):
+            capture.capture(DIRECTION_RECEIVED, 1, OpCode.CMSG_PING.value, bytes([index]))
+        self.assertEqual([record[-1] for record in capture.records], [b"\x03", b"\x04"])
+        self.assertEqual(capture.get_stats()["dropped"], 3)
@@ -0,0 +1,40 @@
+import unittest
+from struct import Struct
+
+from durator.common.networking.packet_reader import PacketReader, PacketReadError
+from durator.world.game.chat.language import Language
+from durator.world.game.chat.message import ChatMessageType, ClientChatMessage
+
+
+class TestPacketReader(unittest.TestCase):
+    def test_read(self):
+        reader = PacketReader(b"\x01\x00\x02\x00" + "wörld".encode("utf8") + b"\x00abc\x00\xFF\xEE")
+        self.assertEqual(reader.read_struct(Struct("<2H")), (1, 2))
+        self.assertEqual(reader.read_cstring(), "wörld")
+        self.assertEqual(reader.read_cstring("ascii"), "abc")
+        self.assertEqual(reader.remaining, 2)
+        reader.skip(1)
+        self.assertEqual(reader.read_bytes(1), b"\xEE")
+        self.assertEqual(reader.read_remaining(), b"")
+        self.assertEqual(reader.offset, 17)
+
+    def test_bounds(self):
+        """reads past the end fail without moving the offset"""
+        reader = PacketReader(b"\x01\x02\x03abc")
+        self.assertRaises(PacketReadError, reader.read_struct, Struct("<2I"))
+        self.assertRaises(PacketReadError, reader.read_bytes, 7)
+        self.assertRaises(PacketReadError, reader.skip, 7)
+        self.assertRaises(PacketReadError, reader.read_cstring)
+        self.assertEqual(reader.offset, 0)
+        self.assertEqual(reader.read_bytes(6), b"\x01\x02\x03abc")
+
+    def test_chat_message(self):
+        header = Struct("<2I").pack(ChatMessageType.CHANNEL.value, Language.COMMON.value)
+        data = header + b"Trade\x00WTS [Thunderfury]\x00"
+        message = ClientChatMessage.from_client(data)
+        self.assertIs(message.message_type, ChatMessageType.CHANNEL)
+        self.assertEqual(message.channel_name, "Trade")
+        self.assertEqual(message.content, "WTS [Thunderfury]")
+
+        data = Struct("<2I").pack(ChatMessageType.SAY.value, Language.COMMON.value) + b"unterminated"
+        self.assertRaises(PacketReadError, ClientChatMessage.from_client, data)
@@ -0,0 +1,92 @@
+import unittest
+
+from durator.common.networking.packet_schema import Bytes, CString, Fixed, Optional, PacketSchema, Repeat
+from durator.world.game.chat.language import Language
+from durator.world.game.chat.message import ChatMessageTag, ChatMessageType, ServerChatMessage
+from durator.world.game.chat.notification import Notification, NotificationType
+from durator.world.game.movement import Movement, MovementFlags
+from durator.world.game.position import Position
+from durator.world.realm import Realm, RealmFlags, RealmId, RealmPopulation
+
+
+class _Channel:
+    name = "Trade"
+    internal_id = 0
+
+
+class TestPacketSchema(unittest.TestCase):
+    def test_compile(self):
+        """consecutive fixed fields are merged in a single Struct"""
+        schema = PacketSchema(Fixed("I", "a"), Fixed("2H", "b", "c"), CString("name"), Fixed("xB", "d"))
+        self.assertEqual(len(schema.steps), 3)
+        self.assertEqual(schema.steps[0][1].format, "<I2H")
+        data = schema.pack({"a": 1, "b": 2, "c": 3, "name": "abc", "d": 4})
+        self.assertEqual(data, bytes.fromhex("01000000" "0200" "0300" "61626300" "00" "04"))
+
+    def test_optional_repeat(self):
+        item_schema = PacketSchema(Fixed("B", "value"), Bytes("raw"))
+        schema = PacketSchema(
+            Fixed("B", "count"),
+            Repeat("items", item_schema),
+            Optional(lambda values: values["count"] > 1, Fixed("H", "extra")),
+            byte_order=">",
+        )
+        items = [{"value": 1, "raw": b"\xAA"}, {"value": 2, "raw": b""}]
+        self.assertEqual(schema.pack({"count": 2, "items": items, "extra": 5}), b"\x02\x01\xAA\x02\x00\x05")
+        self.assertEqual(schema.pack({"count": 1, "items": items[:1]}), b"\x01\x01\xAA")
+
+    def test_chat_message(self):
+        message = ServerChatMessage()
+        message.message_type = ChatMessageType.CHANNEL
+        message.language = Language.COMMON
+        message.channel_name = "General - Elwynn"
+        message.content = "Hello wörld"
+        message.sender_guid = 0x1234
+        message.tag = ChatMessageTag.GM
+        expected = (
+            "0e07000000" "47656e6572616c202d20456c77796e6e00" "3412000000000000" "0d000000"
+            "48656c6c6f2077c3b6726c6400" "03"
+        )
+        self.assertEqual(message.to_bytes(), bytes.fromhex(expected))
+        self.assertEqual(message.content_size, 13)
+
+    def test_notification(self):
+        notification = Notification(NotificationType.JOINED, _Channel())
+        notification.join_leave_guid = 42
+        self.assertEqual(notification.to_bytes(), bytes.fromhex("00" "547261646500" "2a00000000000000"))
+        notification = Notification(NotificationType.YOU_JOINED, _Channel())
+        self.assertEqual(notification.to_bytes(), bytes.fromhex("02" "547261646500" "00000000" "00"))
+
+    def test_movement(self):
+        movement = Movement()
+        movement.flags = (
+            MovementFlags.ON_TRANSPORT.value
+            | MovementFlags.IS_SWIMMING.value
+            | MovementFlags.IS_FALLING.value
+            | MovementFlags.SPLINE_ELEVATION.value
+        )
+        movement.time = 99
+        movement.position = Position(1.5, 2.5, 3.5, 0.25)
+        movement.transport_guid = 7
+        movement.transport_position = Position(4.0, 5.0, 6.0, 7.0)
+        movement.swim_pitch = 0.5
+        movement.jump_data.time = 3
+        movement.jump_data.velocity = 1.0
+        movement.jump_data.sin = 0.5
+        movement.jump_data.cos = 0.25
+        movement.jump_data.xy_speed = 2.0
+        movement.spline_elevation_unk = 9.0
+        expected = (
+            "00202006" "63000000" "0000c03f" "00002040" "00006040" "0000803e"
+            "0700000000000000" "00008040" "0000a040" "0000c040" "0000e040"
+            "0000003f"
+            "03000000" "0000803f" "0000003f" "0000803e" "00000040"
+            "00001041"
+        )
+        self.assertEqual(movement.to_bytes(), bytes.fromhex(expected))
+        self.assertEqual(Movement.from_bytes(movement.to_bytes()).to_bytes(), movement.to_bytes())
+
+    def test_realm_state(self):
+        realm = Realm("Lordaeron", "127.0.0.1:13250", RealmId.SERVER1_PVP)
+        expected = "26" "01000000" "00" "4c6f72646165726f6e00" "3132372e302e302e313a313332353000" "00000040" "000000"
+        self.assertEqual(realm.get_state_packet(RealmFlags.NORMAL, RealmPopulation.HIGH), bytes.fromhex(expected))
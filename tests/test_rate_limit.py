@@ -0,0 +1,27 @@
+import time
+import unittest
+
+from durator.common.networking.rate_limit import RateLimit, RateLimiter, RatePolicy, TokenBucket
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_parse(self):
+        limit = RateLimit.from_string("20 40 delay")
+        self.assertEqual((limit.rate, limit.burst, limit.policy), (20.0, 40.0, RatePolicy.DELAY))
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=100, burst=2)
+        self.assertEqual(bucket.take(), 0.0)
+        self.assertEqual(bucket.take(), 0.0)
+        self.assertGreater(bucket.take(), 0.0)
+        time.sleep(0.02)
+        self.assertEqual(bucket.take(), 0.0)
+
+    def test_delay(self):
+        limiter = RateLimiter({"chat": RateLimit(100, 1, RatePolicy.DELAY)})
+        self.assertIsNone(limiter.check("chat"))
+        first_policy, first_delay = limiter.check("chat")
+        _, second_delay = limiter.check("chat")
+        self.assertIs(first_policy, RatePolicy.DELAY)
+        self.assertGreater(second_delay, first_delay)
+        self.assertEqual(limiter.get_stats()["chat"]["delayed"], 2)
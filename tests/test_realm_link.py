@@ -0,0 +1,120 @@
+import socket
+import threading
+import time
+import unittest
+
+from durator.auth.login_server import LoginServer
+from durator.auth.realm_connection import RealmConnection
+from durator.world.realm import Realm, RealmFlags, RealmId, RealmPopulation
+from durator.world.realm_link import RealmLink
+
+
+class _WorldServer:
+    def __init__(self):
+        self.realm = Realm("Test", "127.0.0.1:13250", RealmId.SERVER0_NORMAL)
+        self.population = RealmPopulation.LOW
+
+    def get_realm_state_packet(self):
+        return self.realm.get_state_packet(RealmFlags.NORMAL, self.population)
+
+
+def _wait_for(condition, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestRealmLink(unittest.TestCase):
+    def setUp(self):
+        self.login_server = LoginServer()
+
+    def test_push_and_close(self):
+        """the realm is registered, updated and removed as soon as its link closes"""
+        login_server = self.login_server
+        login_server.REALMS_HOST = "127.0.0.1"
+        login_server.REALMS_PORT = 0
+        login_server._listen_realms()
+        address = login_server.realms_socket.getsockname()
+        accept_thread = threading.Thread(target=login_server._accept_realms)
+        accept_thread.start()
+
+        world_server = _WorldServer()
+        link = RealmLink(world_server, address)
+        link.KEEPALIVE_INTERVAL = 0.05
+        link_thread = threading.Thread(target=link.run)
+        link_thread.start()
+        try:
+            self.assertTrue(_wait_for(lambda: "Test" in login_server.realms))
+            self.assertTrue(_wait_for(lambda: link.num_keepalives >= 2))
+
+            world_server.population = RealmPopulation.FULL
+            link.push_state()
+            expected_packet = world_server.get_realm_state_packet()[1:]
+            self.assertTrue(_wait_for(lambda: login_server.realms["Test"]["packet"] == expected_packet))
+        finally:
+            link.stop()
+            link_thread.join()
+        self.assertTrue(_wait_for(lambda: "Test" not in login_server.realms))
+
+        login_server.shutdown_flag.set()
+        accept_thread.join()
+        login_server._stop_listen_realms()
+
+    def test_link_timeout(self):
+        """a silent realm is removed after the link timeout"""
+        world_socket, login_socket = socket.socketpair()
+        connection = RealmConnection(self.login_server, login_socket, "test")
+        connection.LINK_TIMEOUT = 0.2
+        thread = threading.Thread(target=connection.handle_connection)
+        thread.start()
+
+        world_socket.sendall(_WorldServer().get_realm_state_packet())
+        self.assertTrue(_wait_for(lambda: "Test" in self.login_server.realms))
+        thread.join(timeout=5)
+        self.assertNotIn("Test", self.login_server.realms)
+        world_socket.close()
+
+
+class TestRealmlist(unittest.TestCase):
+    def setUp(self):
+        self.login_server = LoginServer()
+        self.realm_packet = _WorldServer().get_realm_state_packet()[1:]
+
+    def _register(self, packet, link="link"):
+        realm_state = {"packet": packet, "last_update": time.time(), "link": link}
+        self.login_server.register_realm("Test", realm_state)
+
+    def test_rebuilt_on_change(self):
+        login_server = self.login_server
+        empty_realmlist = login_server.get_realmlist()
+        self.assertEqual(empty_realmlist[-3], 0)  # no realms
+
+        self._register(self.realm_packet)
+        self.assertEqual(login_server.realmlist_version, 1)
+        realmlist = login_server.get_realmlist()
+        self.assertIn(self.realm_packet, realmlist)
+        self.assertEqual(int.from_bytes(realmlist[1:3], "little"), len(realmlist) - 3)
+
+        self._register(self.realm_packet)
+        login_server.refresh_realm("Test", "link")
+        self.assertEqual(login_server.realmlist_version, 1)
+
+        login_server.unregister_realm("Test", "other link")
+        self.assertEqual(login_server.realmlist_version, 1)
+        login_server.unregister_realm("Test", "link")
+        self.assertEqual(login_server.realmlist_version, 2)
+        self.assertEqual(login_server.get_realmlist(), empty_realmlist)
+
+    def test_expiry(self):
+        login_server = self.login_server
+        self._register(self.realm_packet)
+        login_server._maintain_realm_list()
+        self.assertIn(self.realm_packet, login_server.get_realmlist())
+
+        login_server.realms["Test"]["last_update"] -= login_server.REALM_MAX_UPDATE_TIME + 1
+        login_server._maintain_realm_list()
+        self.assertNotIn("Test", login_server.realms)
+        self.assertNotIn(self.realm_packet, login_server.get_realmlist())
@@ -0,0 +1,27 @@
+import unittest
+
+from durator.world.game.spatial_grid import SpatialGrid
+
+
+class TestSpatialGrid(unittest.TestCase):
+    def setUp(self):
+        self.grid = SpatialGrid(10.0)
+        self.grid.update(1, 0, 0.0, 0.0, 0.0)
+        self.grid.update(2, 0, 15.0, -5.0, 0.0)
+        self.grid.update(3, 0, -40.0, 0.0, 0.0)
+        self.grid.update(4, 1, 0.0, 0.0, 0.0)
+
+    def test_query(self):
+        self.assertEqual(sorted(self.grid.query(0, 0.0, 0.0, 0.0, 25.0)), [1, 2])
+        self.assertEqual(sorted(self.grid.query(0, 0.0, 0.0, 0.0, 100.0)), [1, 2, 3])
+        self.assertEqual(self.grid.query(0, 0.0, 0.0, 20.0, 15.0), [])
+        self.assertEqual(self.grid.query(1, 1.0, 1.0, 0.0, 5.0), [4])
+
+    def test_update_remove(self):
+        self.grid.update(3, 0, 5.0, 5.0, 0.0)
+        self.assertEqual(sorted(self.grid.query(0, 0.0, 0.0, 0.0, 25.0)), [1, 2, 3])
+        self.grid.remove(1)
+        self.grid.remove(1)
+        self.assertEqual(sorted(self.grid.query(0, 0.0, 0.0, 0.0, 25.0)), [2, 3])
+        self.assertEqual(len(self.grid), 3)
+        self.assertNotIn((0, -4, 0), self.grid.cells)
@@ -1,7 +1,10 @@
+import time
 import unittest
 
 import durator.auth.srp as srp
 import durator.common.crypto.sha1 as sha1
+from durator.auth.srp_ephemeral_pool import FixedBasePow, SrpEphemeralPool
+from durator.auth.srp_executor import SrpExecutor
 
 IDENT = "IDENT"
 SALT = 17462768296609894957082901611113140576623891301766575857231659296666997310951
@@ -31,3 +34,71 @@ class TestSrp(unittest.TestCase):
         )
         result = sha1.sha1_interleave(big_int)
         self.assertEqual(result, expected)
+
+    def test_compute_proofs(self):
+        """proofs computed in one job match the step by step computation"""
+        account = _Account()
+        srp_a = srp.Srp()
+        srp_a.generate_server_ephemeral(VERIFIER)
+        srp_a.generate_session_key(SOME_CLIENT_EPH, VERIFIER)
+        srp_a.generate_client_proof(SOME_CLIENT_EPH, account)
+        srp_a.generate_server_proof(SOME_CLIENT_EPH)
+
+        srp_b = srp.Srp()
+        srp_b.priv_ephemeral = srp_a.priv_ephemeral
+        executor = SrpExecutor(num_processes=0)
+        srp_b.submit_server_ephemeral(executor, VERIFIER).result()
+        srp_b.submit_proofs(executor, SOME_CLIENT_EPH, account).result()
+
+        self.assertEqual(srp_b.server_ephemeral, srp_a.server_ephemeral)
+        self.assertEqual(srp_b.session_key, srp_a.session_key)
+        self.assertEqual(srp_b.client_proof, srp_a.client_proof)
+        self.assertEqual(srp_b.server_proof, srp_a.server_proof)
+
+    def test_executor_process_pool(self):
+        executor = SrpExecutor(num_processes=1)
+        try:
+            future = executor.submit(srp.Srp.compute_server_ephemeral, 1, VERIFIER)
+            self.assertEqual(future.result(timeout=30), srp.Srp.compute_server_ephemeral(1, VERIFIER))
+        finally:
+            executor.stop()
+
+    def test_fixed_base_pow(self):
+        for window_bits in (1, 4, 6):
+            fixed_base = FixedBasePow(srp.Srp.GENERATOR, srp.Srp.MODULUS, window_bits, 152)
+            for priv_ephemeral in srp.Srp.generate_priv_ephemerals(20) + [0, 2**152 - 1]:
+                expected = pow(srp.Srp.GENERATOR, priv_ephemeral, srp.Srp.MODULUS)
+                self.assertEqual(fixed_base.pow(priv_ephemeral), expected)
+
+    def test_ephemeral_pool(self):
+        pool = SrpEphemeralPool(size=4, window_bits=6)
+        self.assertIsNone(pool.get())
+        pool.fill()
+        self.assertEqual(pool.get_depth(), 4)
+
+        srp_a = srp.Srp(pool.get())
+        srp_a.submit_server_ephemeral(SrpExecutor(num_processes=0), VERIFIER).result()
+        expected = srp.Srp.compute_server_ephemeral(srp_a.priv_ephemeral, VERIFIER)
+        self.assertEqual(srp_a.server_ephemeral, expected)
+
+        stats = pool.get_stats()
+        self.assertEqual((stats["depth"], stats["hits"], stats["misses"]), (3, 1, 1))
+        self.assertGreater(stats["refill_rate"], 0)
+
+    def test_ephemeral_pool_refill(self):
+        pool = SrpEphemeralPool(size=8, window_bits=4)
+        pool.start()
+        try:
+            for _ in range(100):
+                if pool.get_depth() == 8:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(pool.get_depth(), 8)
+        finally:
+            pool.stop()
+
+
+class _Account:
+    name = IDENT
+    srp_salt_as_bytes = int.to_bytes(SALT, 32, "little")
+    srp_verifier_as_int = VERIFIER
@@ -0,0 +1,52 @@
+import socket
+import unittest
+
+from durator.common.networking.packet_capture import PacketCapture
+from durator.world.opcodes import OpCode
+from durator.world.outgoing_queue import PacketPriority
+from durator.world.world_connection import WorldConnection
+from durator.world.world_connection_state import WorldConnectionState
+from durator.world.world_packet import WorldPacket
+
+
+class _WorldServer:
+    packet_capture = PacketCapture("world", OpCode, enabled=False)
+
+
+class TestWorldConnectionSend(unittest.TestCase):
+    def setUp(self):
+        self.client_socket, server_socket = socket.socketpair()
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        self.client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        self.conn = WorldConnection(_WorldServer(), server_socket)
+
+    def tearDown(self):
+        self.client_socket.close()
+        self.conn.socket.close()
+
+    def _receive_all(self):
+        self.client_socket.settimeout(0.01)
+        data = b""
+        try:
+            while True:
+                data += self.client_socket.recv(65536)
+        except socket.timeout:
+            return data
+
+    def test_client_not_reading(self):
+        """packets wait in queue while the client does not read, then are all sent in order"""
+        packets = [WorldPacket(OpCode.SMSG_MESSAGECHAT, bytes([index]) * 1000) for index in range(100)]
+        for packet in packets:
+            self.conn.outgoing_queue.put(packet, PacketPriority.CHAT)
+        for _ in range(10):
+            self.conn._actions_at_loop_begin()
+        self.assertEqual(self.conn.state, WorldConnectionState.INIT)
+        self.assertTrue(self.conn.send_buffer)
+        self.assertFalse(self.conn.outgoing_queue.empty())
+
+        received = b""
+        while not self.conn.outgoing_queue.empty() or self.conn.send_buffer:
+            received += self._receive_all()
+            self.conn._actions_at_loop_begin()
+        received += self._receive_all()
+        self.assertEqual(received, b"".join(packet.to_socket() for packet in packets))